@@ -0,0 +1,26 @@
+# benchmarks/backtest.py
+# Usage: python -m benchmarks.backtest [tickers] [days] [workers]
+
+import sys
+import time
+from benchmarks.synthetic import synthetic_panel
+from modules.backtest import run_backtest
+
+
+def main():
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 252
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    panel = synthetic_panel(tickers, days)
+    start = time.perf_counter()
+    result = run_backtest(panel, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{tickers:,} tickers x {days} days, {workers} worker(s): {elapsed:.2f} s")
+    print({k: round(v, 4) if isinstance(v, float) else v for k, v in result["summary"].items()})
+    print(result["tiers"].to_string())
+
+
+if __name__ == "__main__":
+    main()
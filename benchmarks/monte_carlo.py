@@ -0,0 +1,48 @@
+# benchmarks/monte_carlo.py
+# Usage: python -m benchmarks.monte_carlo [positions] [paths] [workers]
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from modules.monte_carlo import simulate_plan_distribution
+
+
+def synthetic_plan(n_positions, rng):
+    plan, bars = [], {}
+    for i in range(n_positions):
+        ticker = f"T{i:03d}"
+        price = float(rng.uniform(5, 10))
+        closes = price * np.exp(np.cumsum(rng.normal(0, 0.01, 14)))
+        bars[ticker] = pd.DataFrame({'Close': closes})
+        plan.append({
+            'Ticker': ticker,
+            'Buy': round(price, 2),
+            'Sell': round(price * 1.02, 2),
+            'Shares': int(150 / price),
+            'Volatility %': 3.0,
+        })
+    return plan, bars
+
+
+def main():
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    paths = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    plan, bars = synthetic_plan(positions, np.random.default_rng(0))
+    simulate_plan_distribution(plan, bars, 100, n_paths=1_000, workers=1)  # warm-up
+
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        result = simulate_plan_distribution(plan, bars, 100, n_paths=paths, workers=workers)
+        runs.append(time.perf_counter() - start)
+
+    print(f"{positions} positions x {paths:,} paths, {workers} worker(s): "
+          f"best {min(runs) * 1000:.1f} ms, median {np.median(runs) * 1000:.1f} ms")
+    print({k: round(v, 3) for k, v in result["summary"].items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# benchmarks/param_sweep.py
+# Usage: python -m benchmarks.param_sweep [tickers] [days] [samples] [workers]
+
+import sys
+import time
+from benchmarks.synthetic import synthetic_panel
+from modules.param_sweep import random_params, run_sweep
+
+
+def main():
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 252
+    samples = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    panel = synthetic_panel(tickers, days)
+    settings = random_params(samples=samples, seed=0)
+    start = time.perf_counter()
+    table = run_sweep(panel, settings, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{samples} settings on {tickers:,} tickers x {days} days, {workers} worker(s): {elapsed:.2f} s")
+    print(table.head(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
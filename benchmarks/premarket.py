@@ -0,0 +1,68 @@
+# benchmarks/premarket.py
+# Pre-market gap scan over a large universe: the vectorized reduction alone,
+# and the full batched fetch against a provider that sleeps per download (a
+# stand-in for Yahoo's latency; downloads are serialized like the real one).
+#
+# Usage: python -m benchmarks.premarket [tickers] [download latency s]
+
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from modules import premarket_scan
+from modules.premarket_scan import premarket_stats, rank_gappers, fetch_premarket
+
+SESSION = pd.Timestamp("2026-10-16").date()
+
+
+def synthetic_bars(tickers, seed=0):
+    """Wide 2d/5m bars incl. extended hours (prior day 4:00-20:00, session 4:00-9:25 ET)."""
+    index = pd.date_range("2026-10-15 04:00", "2026-10-15 19:55", freq="5min", tz="America/New_York") \
+        .append(pd.date_range("2026-10-16 04:00", "2026-10-16 09:25", freq="5min", tz="America/New_York"))
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(2, 200, len(tickers))
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.003, (len(index), len(tickers))), axis=0))
+    close[rng.random(close.shape) < 0.3] = np.nan   # thin extended-hours trading
+    volume = rng.integers(0, 50_000, close.shape).astype(float)
+    fields = {"Close": close, "High": close * 1.001, "Low": close * 0.999, "Volume": volume}
+    return pd.concat({f: pd.DataFrame(v, index=index, columns=tickers) for f, v in fields.items()}, axis=1)
+
+
+class SlowProvider:
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def download(self, tickers, period="5d", interval="1h", prepost=False):
+        with self.lock:
+            time.sleep(self.latency)
+            return synthetic_bars(list(tickers))
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 8_000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+
+    bars = synthetic_bars(tickers)
+    start = time.perf_counter()
+    stats = premarket_stats(bars, SESSION)
+    reduced = time.perf_counter() - start
+    start = time.perf_counter()
+    gappers = rank_gappers(stats, min_gap=0.5)
+    ranked = time.perf_counter() - start
+    print(f"{n_tickers:,} tickers, {len(bars)} bars: premarket_stats {reduced:.3f} s, "
+          f"rank_gappers {ranked:.3f} s ({len(gappers)} gappers)")
+
+    provider = SlowProvider(latency)
+    premarket_scan.get_provider = lambda: provider
+    start = time.perf_counter()
+    stats = fetch_premarket(tickers, SESSION)
+    batches = -(-n_tickers // premarket_scan.BATCH_SIZE)
+    print(f"fetch_premarket, {batches} batches at {latency:.1f} s each: "
+          f"{time.perf_counter() - start:.3f} s ({len(stats):,} tickers)")
+
+
+if __name__ == "__main__":
+    main()
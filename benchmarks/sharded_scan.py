@@ -0,0 +1,53 @@
+# benchmarks/sharded_scan.py
+# Feature computation for a large scan: per-ticker pandas (the threaded
+# analyze_ticker path) vs. the sharded process pool at 1..N workers.
+# Usage: python -m benchmarks.sharded_scan [tickers] [max_workers]
+
+import os
+import sys
+import time
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import synthetic_panel
+from modules.sharded_scan import pack_bars, sharded_features
+
+
+def synthetic_frames(n_tickers, bars=35):
+    panel = synthetic_panel(n_tickers, n_days=5)
+    return [pd.DataFrame({field: panel[field][i].ravel()[-bars:] for field in ("High", "Low", "Close", "Volume")})
+            for i in range(n_tickers)]
+
+
+def pandas_features(hist):
+    # The math analyze_ticker does on each ticker's bars
+    last_close, prev_close = hist['Close'].iloc[-1], hist['Close'].iloc[-2]
+    change = round(((last_close - prev_close) / prev_close) * 100, 2)
+    volatility = round(((hist['High'] - hist['Low']) / hist['Close']).mean() * 100, 2)
+    return change, volatility, int(hist['Volume'].iloc[-1])
+
+
+def main():
+    tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    frames = synthetic_frames(tickers)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=32) as executor:
+        list(executor.map(pandas_features, frames))
+    print(f"{tickers:,} tickers, per-ticker pandas in 32 threads: {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    bars = pack_bars(frames)
+    print(f"pack bars: {time.perf_counter() - start:.3f} s")
+
+    for workers in sorted({1, *(2 ** k for k in range(1, max_workers.bit_length())), max_workers}):
+        start = time.perf_counter()
+        features = sharded_features(bars, workers)
+        elapsed = time.perf_counter() - start
+        print(f"sharded features, {workers} worker(s): {elapsed:.3f} s ({int(features['valid'].sum()):,} valid)")
+
+
+if __name__ == "__main__":
+    main()
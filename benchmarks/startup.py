@@ -0,0 +1,79 @@
+# benchmarks/startup.py
+# Cold-start cost of the app's imports, per page.
+#
+# Usage: python -m benchmarks.startup [--top 15] [--runs 3]
+#
+# Each measurement runs in a fresh interpreter with `-X importtime`, so the
+# numbers reflect a new container serving its first page. "eager" imports every
+# page module the way main.py used to; each route row imports only that page.
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from ui.routes import ROUTES
+
+BASE = ["streamlit", "utils.init_state", "ui.menu", "ui.routes"]
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(.+)")
+
+
+def import_profile(modules):
+    code = "; ".join(f"import {m}" for m in modules)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name.strip(), int(self_us), int(cumulative_us), len(indent) // 2))
+    return wall, rows
+
+
+def top_level(rows):
+    # Packages imported directly by the -c statement (depth 0 in the tree)
+    return sorted(((name, cum) for name, _, cum, depth in rows if depth == 0),
+                  key=lambda r: r[1], reverse=True)
+
+
+def best_of(modules, runs):
+    results = [import_profile(modules) for _ in range(runs)]
+    return min(results, key=lambda r: r[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and startup benchmark.")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    scenarios = {"base (no page)": BASE, "eager (all pages)": BASE + [m for m, _ in ROUTES.values()]}
+    scenarios.update({f"route: {label}": BASE + [module] for label, (module, _) in ROUTES.items()})
+
+    print(f"{'scenario':<34}{'wall ms':>10}{'imports ms':>12}")
+    reports = {}
+    for label, modules in scenarios.items():
+        wall, rows = best_of(modules, args.runs)
+        total = sum(cum for _, cum in top_level(rows)) / 1000
+        reports[label] = rows
+        print(f"{label:<34}{wall * 1000:>10.0f}{total:>12.0f}")
+
+    print(f"\nSlowest imports, eager startup (cumulative ms, top {args.top}):")
+    heaviest = sorted(reports["eager (all pages)"], key=lambda r: r[2], reverse=True)
+    shown = 0
+    for name, self_us, cumulative_us, depth in heaviest:
+        if depth > 1:
+            continue
+        print(f"  {cumulative_us / 1000:>8.1f}  {'  ' * depth}{name}")
+        shown += 1
+        if shown >= args.top:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# benchmarks/synthetic.py
+# Random-walk hourly bars shaped like modules.backtest panels.
+
+import numpy as np
+import pandas as pd
+from modules.backtest import SLOTS
+
+
+def synthetic_panel(n_tickers=1_000, n_days=252, slots=SLOTS, seed=0):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(2, 40, n_tickers)[:, None]
+    sigma = rng.uniform(0.004, 0.03, n_tickers)[:, None]
+    steps = rng.standard_normal((n_tickers, n_days * slots)) * sigma
+    close = start * np.exp(np.cumsum(steps, axis=1))
+    open_ = np.concatenate([start, close[:, :-1]], axis=1)
+    spread = np.abs(rng.standard_normal(close.shape)) * sigma * close
+    high = np.maximum(open_, close) + spread
+    low = np.maximum(np.minimum(open_, close) - spread, 0.01)
+    volume = rng.lognormal(12, 1.2, close.shape).round()
+
+    shape = (n_tickers, n_days, slots)
+    return {
+        "tickers": [f"T{i:04d}" for i in range(n_tickers)],
+        "dates": pd.bdate_range("2024-01-02", periods=n_days),
+        "Open": open_.reshape(shape),
+        "High": high.reshape(shape),
+        "Low": low.reshape(shape),
+        "Close": close.reshape(shape),
+        "Volume": volume.reshape(shape),
+    }
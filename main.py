@@ -4,29 +4,40 @@ import streamlit as st
 # --- Config and Title ---
 st.set_page_config(page_title="Day Trading Scanner", layout="wide")
 
-from utils.init_state import init_allocation_state
-from ui.menu import display_sidebar
-from modules.risk_allocation import show_risk_allocation
-from modules.profit_plan import show_profit_plan
-from modules.gpt_summary import show_gpt_summary
-from modules.scan_market import scan_market
+import os
+from contextlib import nullcontext
+from utils.init_state import init_env, init_allocation_state
+from utils import perf, data_context
+from utils.prefetch import start_prefetch
+from ui.menu import display_sidebar, display_perf_panel
+from ui.routes import load_page, page_windows
 
 
 st.markdown("<h1 style='text-align: center; font-size: 60px;'>\U0001F4C8 Day Trader AI Agent</h1>", unsafe_allow_html=True)
 
 # --- Session Init ---
+init_env()  # before any page module reads its USE_OPENAI flag
 init_allocation_state()
+start_prefetch()  # no-op unless PREFETCH_ENABLED=true; starts once per process
+if os.getenv("API_ENABLED", "false").lower() == "true":
+    from modules.api_server import start_api_server  # pandas/pyarrow only when the API is on
+    start_api_server()  # serves the latest scan to other consumers
 
 # --- Sidebar Menu ---
 choice = display_sidebar()
+run = perf.start_run(choice)
+data_context.start_context(page_windows(choice))  # bars fetched once per ticker and interval this rerun
 
 
-# --- Action Routing ---
-if choice == "Scan Market":
-    scan_market()
-elif choice == "Risk Allocation":
-    show_risk_allocation()
-elif choice == "Generate Profit Plan":
-    show_profit_plan()
-elif choice == "GPT Market Summary":
-    show_gpt_summary()
+# --- Action Routing (page modules are imported lazily) ---
+profiling = st.session_state.get("perf_panel") and st.session_state.pop("perf_profile", False)
+try:
+    with perf.profile(run) if profiling else nullcontext():
+        page = load_page(choice)
+        if page:
+            with perf.span(f"page:{choice}"):
+                page()
+finally:
+    perf.finish_run(run)  # failed runs count toward the latency percentiles too
+if st.session_state.get("perf_panel"):
+    display_perf_panel(run)
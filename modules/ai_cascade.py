@@ -0,0 +1,120 @@
+# modules/ai_cascade.py
+#
+# "Auto (cascade)" AI scoring: every candidate is scored by the fast, cheap
+# model; only names worth a second opinion go to the strong model, within a
+# per-scan budget of calls and tokens:
+#
+#   top_rank      - among the TOP_RANKS best quantitative Scores
+#   disagreement  - cheap AI score and the Score's percentile rank disagree
+#   borderline    - cheap AI score sits on a label boundary (BORDERLINE band)
+#
+# Rows the cheap pass did not analyze in time (results marked "skipped") are
+# never escalated, and no strong call starts once the AI deadline has passed.
+#
+# Every decision (escalated or not, and why) is kept for the UI and appended to
+# AI_CASCADE_LOG as JSON lines when that is set.
+
+import datetime
+import json
+import os
+import time
+import pandas as pd
+from utils.perf import span, count
+from utils.ai_models import CASCADE, CHEAP_MODEL, STRONG_MODEL
+CANDIDATES = int(os.getenv("AI_CASCADE_CANDIDATES", "40"))
+MAX_CALLS = int(os.getenv("AI_CASCADE_MAX_CALLS", "8"))
+MAX_TOKENS = int(os.getenv("AI_CASCADE_MAX_TOKENS", "6000"))
+TOP_RANKS = 3
+BORDERLINE = (4, 7)         # cheap scores in this band (inclusive) are borderline
+DISAGREEMENT = 0.4          # |Score percentile - AI score / 10| above this disagrees
+DEFAULT_TOKENS = 450        # per-call estimate before any usage is known
+CASCADE_LOG = os.getenv("AI_CASCADE_LOG")
+
+PRIORITY = {"top_rank": 0, "disagreement": 1, "borderline": 2}
+
+
+def escalation_reason(rank, quant_pct, ai_score, failed):
+    if failed:
+        return None  # the cheap pass already gets its own retries
+    if rank < TOP_RANKS:
+        return "top_rank"
+    if abs(quant_pct - ai_score / 10) > DISAGREEMENT:
+        return "disagreement"
+    if BORDERLINE[0] <= ai_score <= BORDERLINE[1]:
+        return "borderline"
+    return None
+
+
+def plan_escalations(df, cheap_results, max_calls=MAX_CALLS, max_tokens=MAX_TOKENS):
+    """Decision table (one row per candidate) with the escalations that fit the budget."""
+    order = df["Score"].rank(ascending=False, method="first").astype(int).to_numpy() - 1
+    quant_pct = df["Score"].rank(pct=True).to_numpy()
+    used = [r.get("tokens", 0) for r in cheap_results if r.get("tokens")]
+    per_call = int(sum(used) / len(used)) if used else DEFAULT_TOKENS
+
+    decisions = pd.DataFrame({
+        "Ticker": df["Ticker"].astype(str).to_numpy(),
+        "Rank": order + 1,
+        "Score": df["Score"].to_numpy(),
+        "Cheap AI Score": [r["score"] for r in cheap_results],
+        "Reason": [
+            None if r.get("skipped") else escalation_reason(rank, pct, r["score"], r["summary"].startswith("⚠️"))
+            for rank, pct, r in zip(order, quant_pct, cheap_results)
+        ],
+    })
+    decisions["Gap"] = (quant_pct - decisions["Cheap AI Score"] / 10).abs()
+    wanted = decisions[decisions["Reason"].notna()].assign(
+        _priority=lambda d: d["Reason"].map(PRIORITY)
+    ).sort_values(["_priority", "Gap", "Rank"], ascending=[True, False, True])
+
+    allowed = min(max_calls, max_tokens // max(per_call, 1))
+    decisions["Escalated"] = decisions.index.isin(wanted.index[:allowed])
+    decisions["Decision"] = decisions["Escalated"].map({True: "escalate", False: "keep"})
+    decisions.loc[decisions["Reason"].notna() & ~decisions["Escalated"], "Decision"] = "over budget"
+    decisions.loc[[bool(r.get("skipped")) for r in cheap_results], "Decision"] = "not analyzed in time"
+    return decisions
+
+
+def run_cascade(df, analyze_batch, cheap=CHEAP_MODEL, strong=STRONG_MODEL,
+                max_calls=MAX_CALLS, max_tokens=MAX_TOKENS, deadline=None):
+    """AI results for df's rows plus the decision table.
+
+    `analyze_batch(df, model)` returns one analysis dict per row (scan_market's
+    run_ai_batch: shared cache, retries of invalid replies). Past `deadline`
+    (time.monotonic()) nothing is escalated.
+    """
+    with span("ai.cascade.cheap", rows=len(df), model=cheap):
+        results = [dict(r, model=cheap) for r in analyze_batch(df, cheap)]
+
+    decisions = plan_escalations(df, results, max_calls, max_tokens)
+    if deadline is not None and time.monotonic() >= deadline and decisions["Escalated"].any():
+        decisions.loc[decisions["Escalated"], "Decision"] = "past deadline"
+        decisions["Escalated"] = False
+    escalate = decisions.index[decisions["Escalated"]]
+    decisions["Strong AI Score"] = pd.NA
+    decisions["Tokens"] = [r.get("tokens", 0) for r in results]
+
+    if len(escalate):
+        with span("ai.cascade.strong", rows=len(escalate), model=strong):
+            strong_results = analyze_batch(df.iloc[escalate], strong)
+        for i, result in zip(escalate, strong_results):
+            decisions.at[i, "Tokens"] += result.get("tokens", 0)
+            if result["summary"].startswith("⚠️"):
+                decisions.at[i, "Decision"] = "escalation failed"
+                continue
+            decisions.at[i, "Strong AI Score"] = result["score"]
+            results[i] = dict(result, model=strong)
+    count("ai.escalated", len(escalate))
+
+    decisions = decisions.drop(columns="Gap")
+    log_decisions(decisions, cheap, strong)
+    return results, decisions
+
+
+def log_decisions(decisions, cheap, strong):
+    if not CASCADE_LOG:
+        return
+    stamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    with open(CASCADE_LOG, "a", encoding="utf-8") as f:
+        for record in decisions.astype(object).where(decisions.notna(), None).to_dict("records"):
+            f.write(json.dumps({"at": stamp, "cheap": cheap, "strong": strong, **record}, default=str) + "\n")
@@ -0,0 +1,349 @@
+# modules/api_server.py
+#
+# Local read-only HTTP API over the latest scan, so bots and other dashboards
+# can poll ranked candidates without running the Streamlit script:
+#
+#   GET /scan        latest scan: every candidate, ranked
+#   GET /tiers       top 30 with Risk Tier, as the Risk Allocation page builds them
+#   GET /plan        profit plan; ?budget=3000&low=60&medium=30&high=10
+#   GET /headlines   market headlines (shared news cache)
+#   GET /health      refresh time and errors, incl. headline sources that failed
+#
+# JSON by default; ?format=arrow (or Accept: application/vnd.apache.arrow.stream)
+# returns an Arrow IPC stream. Every response has an ETag and If-None-Match
+# answers 304. ?since=<Scan ID> on /scan and /tiers returns only rows that are
+# new or changed since that scan (plus the tickers that dropped out);
+# ?since=<unix seconds> on /headlines returns headlines first seen after it.
+#
+# The API never scans, fetches bars or calls OpenAI itself. Scans come from
+# snapshot_store; /plan prices peaks from hourly bars already in market_cache
+# and answers 503 until the app has fetched some;
+# a background thread picks up new snapshots and refreshes headlines through
+# market_cache every API_REFRESH seconds. Bodies are serialized once per
+# version, so a poll costs a dict lookup. Run it inside the app
+# (API_ENABLED=true, sharing the app's caches) or standalone:
+#
+#   python -m modules.api_server [--host 127.0.0.1] [--port 8765]
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import pyarrow as pa
+from modules import snapshot_store
+from modules.scan_schema import with_risk_tiers, AI_SCORE
+from modules.scan_utils import classify_risk_tier, BARS_MAX_AGE
+from utils import market_cache
+from utils.market_data import slice_period
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8765"))
+API_REFRESH = float(os.getenv("API_REFRESH", "30"))   # seconds between background refreshes
+
+TIER_ROWS = 30
+DEFAULT_BUDGET = 3000
+DEFAULT_ALLOCATIONS = {"Low": 60, "Medium": 30, "High": 10}   # init_allocation_state's defaults
+DIFF_COLUMNS = ["Rank", "Score", "Last Close ($)", "Change (%)", "Volume", "Volatility (%)", AI_SCORE]
+HEADLINE_COLUMNS = ["Headline", "Link", "Source", "Published", "First Seen"]
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+BODY_CACHE = 256
+PLAN_PERIOD = "2d"
+PLAN_BAR_WINDOWS = ("2d", "5d", "30d")   # hourly windows the pages cache, narrowest first
+
+
+class NotCached(Exception):
+    """The resource needs data the app has not fetched yet."""
+
+
+def cached_bars(ticker, period=PLAN_PERIOD, interval="1h"):
+    """Bars for `period` sliced from a window already in market_cache; None when none is (never fetches)."""
+    for window in PLAN_BAR_WINDOWS:
+        bars = market_cache.get(("history", ticker, window, interval), BARS_MAX_AGE)
+        if bars is not None:
+            return bars if window == period else slice_period(bars, period)
+    return None
+
+
+def tiers_for(scan):
+    top = scan.head(TIER_ROWS)
+    return with_risk_tiers(top, classify_risk_tier(top["Volatility (%)"], top[AI_SCORE])) if not top.empty else top
+
+
+def changed_since(current, previous, key="Ticker"):
+    """(rows of `current` new or changed vs `previous`, tickers only in `previous`)."""
+    if previous.empty:
+        return current, []
+    cols = [c for c in DIFF_COLUMNS if c in current.columns and c in previous.columns]
+    cur = current.set_index(current[key].astype(str))[cols]
+    prev = previous.drop_duplicates(key).set_index(previous[key].astype(str).drop_duplicates())[cols]
+    aligned = prev.reindex(cur.index)
+    same = ((cur == aligned) | (cur.isna() & aligned.isna())).all(axis=1).to_numpy()
+    removed = sorted(set(prev.index) - set(cur.index))
+    return current[~same], removed
+
+
+def encode(frame, fmt, meta):
+    """(body, content type) for one resource."""
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"api"] = json.dumps(meta, default=str).encode()
+        table = table.replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_TYPE
+    rows = frame.to_json(orient="records", date_format="iso")
+    body = '{"meta":' + json.dumps(meta, default=str) + ',"rows":' + rows + '}'
+    return body.encode("utf-8"), "application/json"
+
+
+class ApiState:
+    """Latest resources (replaced whole on refresh) and their serialized bodies."""
+
+    def __init__(self, snapshot_root=None):
+        self.root = snapshot_root
+        self.latest = (None, pd.DataFrame(), pd.DataFrame())              # (scan_id, scan, tiers)
+        self.news = ("none", pd.DataFrame(columns=HEADLINE_COLUMNS))     # (version, headlines)
+        self.refreshed_at = None
+        self.errors = {}
+        self._first_seen = {}   # headline link -> unix time it was first served
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def latest_scan_id(self):
+        for date in reversed(snapshot_store.trading_dates(self.root)):
+            scans = snapshot_store.list_scans(date, self.root)
+            if not scans.empty:
+                return scans["Scan ID"].iloc[-1]
+        return None
+
+    def refresh(self):
+        try:
+            scan_id = self.latest_scan_id()
+            if scan_id and scan_id != self.latest[0]:
+                scan = snapshot_store.load_scan(scan_id, self.root)
+                self.latest = (scan_id, scan, tiers_for(scan))
+            self.errors.pop("scan", None)
+        except Exception as e:
+            self.errors["scan"] = str(e)
+        try:
+            self._set_headlines(self._fetch_headlines())
+            self.errors.pop("headlines", None)
+        except Exception as e:
+            self.errors["headlines"] = str(e)
+        self.refreshed_at = time.time()
+
+    def _fetch_headlines(self):
+        from modules.gpt_summary import collect_headlines, HEADLINES_MAX_AGE
+        source_errors = None
+
+        def fetch():
+            nonlocal source_errors
+            source_errors = []
+            return collect_headlines(on_error=source_errors.append)
+
+        headlines = market_cache.get_or_fetch(("headlines",), fetch, HEADLINES_MAX_AGE)
+        if source_errors:   # only known when this refresh did the fetch
+            self.errors["headline_sources"] = [str(e) for e in source_errors]
+        elif source_errors is not None:
+            self.errors.pop("headline_sources", None)
+        return headlines
+
+    def _set_headlines(self, headlines):
+        now = time.time()
+        first_seen = {link: self._first_seen.get(link, now) for _, link, _, _ in headlines}
+        self._first_seen = first_seen
+        version = hashlib.sha1("\n".join(first_seen).encode("utf-8")).hexdigest()[:16]
+        if version != self.news[0]:
+            rows = [(h, link, src, published, first_seen[link]) for h, link, src, published in headlines]
+            self.news = (version, pd.DataFrame(rows, columns=HEADLINE_COLUMNS))
+
+    # --- Resources: (version, build) where build() -> (frame, meta) ---
+
+    def resource(self, name, params):
+        since = params.get("since")
+        scan_id, scan, tiers = self.latest
+        if name == "scan" or name == "tiers":
+            def build():
+                frame = scan if name == "scan" else tiers
+                meta = {"resource": name, "scan_id": scan_id, "full": since is None}
+                if since is not None and since != scan_id:
+                    previous = snapshot_store.load_scan(since, self.root)
+                    meta["full"] = previous.empty   # unknown scan: everything is new
+                    previous = previous if name == "scan" else tiers_for(previous)
+                    frame, meta["removed"] = changed_since(frame, previous)
+                elif since is not None:
+                    frame, meta["removed"] = frame.iloc[:0], []
+                return frame, meta
+            return f"{scan_id}:{since}", build
+        if name == "plan":
+            budget = float(params.get("budget", DEFAULT_BUDGET))
+            allocations = {tier: float(params.get(key, DEFAULT_ALLOCATIONS[tier]))
+                           for tier, key in (("Low", "low"), ("Medium", "medium"), ("High", "high"))}
+            bars = {t: cached_bars(t) for t in tiers["Ticker"]} if not tiers.empty else {}
+            bars = {t: b for t, b in bars.items() if b is not None}
+            if not tiers.empty and not bars:
+                raise NotCached("no bars cached for the latest scan yet")
+            return (f"{scan_id}:{len(bars)}:{budget}:{allocations['Low']}-{allocations['Medium']}-{allocations['High']}",
+                    lambda: self._plan(scan_id, tiers, budget, allocations, bars))
+        if name == "headlines":
+            version, frame = self.news
+            cutoff = float(since) if since is not None else None
+
+            def build():
+                rows = frame if cutoff is None else frame[frame["First Seen"] > cutoff]
+                return rows, {"resource": name, "full": cutoff is None}
+            return f"{version}:{since}", build
+        raise KeyError(name)
+
+    def _plan(self, scan_id, tiers, budget, allocations, bars):
+        from modules.profit_plan import simulate_plan
+        meta = {"resource": "plan", "scan_id": scan_id, "budget": budget, "allocations": allocations}
+        if tiers.empty:
+            return pd.DataFrame(), meta
+        # Names without cached bars are priced from volatility alone (simulate_plan's fallback)
+        meta["uncached"] = [t for t in tiers["Ticker"] if t not in bars]
+        plan, spent, profit = simulate_plan(tiers, budget, allocations, history=lambda t, *_: bars[t])
+        meta.update(total_invested=round(spent, 2), expected_profit=round(profit, 2))
+        return pd.DataFrame(plan), meta
+
+    def body(self, name, params, fmt):
+        """(etag, body, content type), built and serialized once per resource version."""
+        version, build = self.resource(name, params)
+        key = (name, version, fmt)
+        with self._lock:
+            cached = self._bodies.get(key)
+            if cached:
+                self._bodies.move_to_end(key)
+                return cached
+        frame, meta = build()
+        meta["version"] = version
+        body, content_type = encode(frame, fmt, meta)
+        etag = '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20] + '"'
+        with self._lock:
+            self._bodies[key] = (etag, body, content_type)
+            while len(self._bodies) > BODY_CACHE:
+                self._bodies.popitem(last=False)
+        return etag, body, content_type
+
+    def health(self):
+        scan_id, scan, _ = self.latest
+        return {"scan_id": scan_id, "candidates": len(scan), "headlines": len(self.news[1]),
+                "refreshed_at": self.refreshed_at, "errors": self.errors}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    state = None   # set by ApiServer
+    RESOURCES = ("scan", "tiers", "plan", "headlines")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        name = url.path.strip("/")
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if name == "health":
+            return self._send(200, json.dumps(self.state.health()).encode("utf-8"), "application/json")
+        if name not in self.RESOURCES:
+            return self._error(404, f"unknown resource '{name}'")
+        fmt = params.pop("format", "arrow" if ARROW_TYPE in self.headers.get("Accept", "") else "json")
+        if fmt not in ("json", "arrow"):
+            return self._error(400, f"unknown format '{fmt}'")
+        try:
+            etag, body, content_type = self.state.body(name, params, fmt)
+        except (ValueError, KeyError) as e:
+            return self._error(400, f"bad request: {e}")
+        except NotCached as e:
+            return self._error(503, str(e))
+        if etag in self.headers.get("If-None-Match", ""):
+            return self._send(304, b"", None, etag)
+        self._send(200, body, content_type, etag)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # pollers would flood the app's log
+
+
+class ApiServer:
+    def __init__(self, host=API_HOST, port=API_PORT, refresh=API_REFRESH, snapshot_root=None):
+        self.state = ApiState(snapshot_root)
+        handler = type("BoundApiHandler", (ApiHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.refresh = refresh
+        self._stop = threading.Event()
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def start(self):
+        self.state.refresh()
+        threading.Thread(target=self.httpd.serve_forever, name="api-server", daemon=True).start()
+        threading.Thread(target=self._refresh_loop, name="api-refresh", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh):
+            self.state.refresh()
+
+
+_server = None
+_lock = threading.Lock()
+
+
+def start_api_server():
+    """Start the process-wide API once; returns it, or None when disabled or the port is taken."""
+    global _server
+    if os.getenv("API_ENABLED", "false").lower() != "true":
+        return None
+    with _lock:
+        if _server is None:
+            try:
+                _server = ApiServer().start()
+            except OSError as e:
+                print(f"API server not started on {API_HOST}:{API_PORT}: {e}")
+                return None
+    return _server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the latest scan, tiers, plan and headlines over HTTP.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--refresh", type=float, default=API_REFRESH)
+    args = parser.parse_args()
+
+    server = ApiServer(args.host, args.port, args.refresh).start()
+    print(f"Serving on http://{args.host}:{server.address[1]} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
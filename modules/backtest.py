@@ -0,0 +1,296 @@
+# modules/backtest.py
+#
+# Replays historical hourly bars through the scan's feature, filter, score and
+# risk-tier logic and simulates the profit-plan entry/exit for each pick. Each
+# day's Score is normalized across that day's filtered candidates, as the live
+# scan does (modules.scoring, SCORE_METHOD).
+#
+# Bars live in a "panel": a dict of (tickers x days x slots) arrays, one slot
+# per hourly bar of the session, so every step is a NumPy op over all tickers
+# and days at once.
+#
+# Usage: python -m modules.backtest TICKERS_FILE [--period 1y] [--workers 4]
+
+import argparse
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from modules.scan_utils import (
+    passes_filters, classify_risk_tier, SCORE_WEIGHTS,
+    RELAX_BELOW, RELAXED_VOLUME, RELAXED_VOLATILITY
+)
+from modules.scoring import normalized_score, default_method
+from utils.market_data import get_provider
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+SLOTS = 7           # hourly bars in a regular US session
+LOOKBACK_DAYS = 5   # analyze_stock looks at 5d of hourly bars
+WARMUP_DAYS = LOOKBACK_DAYS - 1
+
+DEFAULT_PARAMS = {
+    "price_range": (5.0, 10.0),
+    "min_volume": 500_000,
+    "min_volatility": 2.0,
+    "weights": SCORE_WEIGHTS,
+    "method": None,      # Score normalization; None: SCORE_METHOD, like the live scan
+    "top_n": 30,
+    "ai_score": 0,       # AI recommendations can't be replayed; assume a constant
+    "decision_slot": 1,  # scan runs after this many bars of the session
+}
+
+
+# --- Panel construction ---
+
+def build_panel(frames, slots=SLOTS):
+    """Reshape wide (timestamp x ticker) frames per field into a bar panel."""
+    close = frames["Close"]
+    index = close.index
+    if index.tz is not None:
+        index = index.tz_convert("America/New_York")
+
+    day_codes, days = pd.factorize(index.normalize(), sort=True)
+    slot = pd.Series(day_codes).groupby(day_codes).cumcount().to_numpy()
+    keep = slot < slots
+    tickers = list(close.columns)
+
+    panel = {"tickers": tickers, "dates": pd.DatetimeIndex(days).tz_localize(None)}
+    for field in FIELDS:
+        values = frames[field].reindex(index=close.index, columns=tickers).to_numpy(dtype=np.float64)
+        arr = np.full((len(tickers), len(days), slots), np.nan)
+        arr[:, day_codes[keep], slot[keep]] = values[keep].T
+        panel[field] = arr
+    return panel
+
+
+def load_panel(tickers, period="1y", interval="1h", batch_size=200):
+    frames = {field: [] for field in FIELDS}
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        data = get_provider().download(batch, period, interval)
+        if data.empty:
+            continue
+        for field in FIELDS:
+            part = data[field]
+            if isinstance(part, pd.Series):
+                part = part.to_frame(batch[0])
+            frames[field].append(part)
+    if not frames["Close"]:
+        raise ValueError("No bar data returned for the requested tickers.")
+    return build_panel({field: pd.concat(parts, axis=1) for field, parts in frames.items()})
+
+
+def slice_days(panel, start, stop):
+    sliced = {field: panel[field][:, start:stop] for field in FIELDS}
+    sliced["tickers"] = panel["tickers"]
+    sliced["dates"] = panel["dates"][start:stop]
+    return sliced
+
+
+# --- Vectorized replay ---
+
+def _last_valid(arr):
+    # Value of the last non-NaN slot of each day (half days, missing bars)
+    valid = ~np.isnan(arr)
+    last = arr.shape[2] - 1 - np.argmax(valid[:, :, ::-1], axis=2)
+    out = np.take_along_axis(arr, last[:, :, None], axis=2)[:, :, 0]
+    return np.where(valid.any(axis=2), out, np.nan)
+
+
+def _max_or_nan(arr):
+    out = np.where(np.isnan(arr), -np.inf, arr).max(axis=2)
+    return np.where(np.isinf(out), np.nan, out)
+
+
+def _shift_days(arr, n=1):
+    out = np.full_like(arr, np.nan)
+    out[:, n:] = arr[:, :-n]
+    return out
+
+
+def compute_features(panel, decision_slot=1):
+    """Per (ticker, day) features as of the decision bar plus the same-day outcome.
+
+    Mirrors analyze_stock (5d hourly window, last two closes, last bar volume,
+    mean bar range) and simulate_plan (sell at max(price * (1 + max(3, vol) / 2%),
+    48h peak), otherwise exit at the session close).
+    """
+    s = decision_slot
+    high, low, close, volume = panel["High"], panel["Low"], panel["Close"], panel["Volume"]
+    n_days = close.shape[1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bar_range = (high - low) / close
+    valid = ~np.isnan(bar_range)
+
+    # Rolling mean bar range: prior full days plus today's bars up to the decision
+    day_sum = np.concatenate([np.zeros((close.shape[0], 1)), np.nansum(bar_range, axis=2).cumsum(axis=1)], axis=1)
+    day_cnt = np.concatenate([np.zeros((close.shape[0], 1)), valid.sum(axis=2).cumsum(axis=1)], axis=1)
+    days = np.arange(n_days)
+    first = np.maximum(days - WARMUP_DAYS, 0)
+    range_sum = day_sum[:, days] - day_sum[:, first] + np.nansum(bar_range[:, :, :s], axis=2)
+    range_cnt = day_cnt[:, days] - day_cnt[:, first] + valid[:, :, :s].sum(axis=2)
+
+    price = close[:, :, s - 1]
+    prev_close = close[:, :, s - 2] if s >= 2 else _shift_days(_last_valid(close))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volatility = range_sum / range_cnt * 100
+        change = (price - prev_close) / prev_close * 100
+
+    peak_48h = np.fmax(_shift_days(_max_or_nan(high)), _max_or_nan(high[:, :, :s]))
+    est_price = price * (1 + np.maximum(3, volatility) / 2 / 100)
+    target = np.fmax(est_price, peak_48h)
+
+    hit = (high[:, :, s:] >= target[:, :, None]).any(axis=2)
+    exit_price = np.where(hit, target, _last_valid(close))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret = exit_price / price - 1
+
+    features = {
+        "price": price,
+        "change": change,
+        "volume": volume[:, :, s - 1],
+        "volatility": volatility,
+        "target": target,
+        "return": ret,
+        "hit": hit,
+    }
+    features["valid"] = np.isfinite(np.stack([price, change, volatility, features["volume"], ret])).all(axis=0)
+    features["valid"][:, :WARMUP_DAYS] = False
+    return features
+
+
+def select_candidates(features, params):
+    """Filter (with the relaxed second pass), score and pick the top N per day."""
+    price, volume, volatility = features["price"], features["volume"], features["volatility"]
+    valid = features["valid"]
+    with np.errstate(invalid="ignore"):
+        strict = valid & passes_filters(price, volume, volatility, params["price_range"],
+                                        params["min_volume"], params["min_volatility"])
+        relaxed = valid & passes_filters(price, volume, volatility, params["price_range"],
+                                         params["min_volume"] * RELAXED_VOLUME,
+                                         params["min_volatility"] * RELAXED_VOLATILITY)
+    mask = np.where(strict.sum(axis=0) < RELAX_BELOW, relaxed, strict)
+
+    # Like the live scan, the Score is normalized across each day's filtered candidates
+    change, volatility, volume = (np.where(mask, x, np.nan) for x in (features["change"], volatility, volume))
+    score = normalized_score(change, volatility, volume, params["weights"], params.get("method") or default_method(),
+                             axis=0)
+    ranked = np.where(mask, score, -np.inf)
+    order = np.argsort(-ranked, axis=0, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(order.shape[0])[:, None], axis=0)
+    selected = mask & (rank < params["top_n"])
+    return mask, selected, score
+
+
+def evaluate(features, params, tickers, dates, day_offset=0):
+    """Candidate-level frame for one parameter set."""
+    mask, selected, score = select_candidates(features, params)
+    t_idx, d_idx = np.nonzero(mask)
+    volatility = features["volatility"][t_idx, d_idx]
+    ai_score = np.broadcast_to(params["ai_score"], mask.shape)[t_idx, d_idx]
+    return pd.DataFrame({
+        "Date": dates[d_idx],
+        "Day": d_idx + day_offset,
+        "Ticker": np.asarray(tickers)[t_idx],
+        "Price": features["price"][t_idx, d_idx],
+        "Change (%)": features["change"][t_idx, d_idx],
+        "Volume": features["volume"][t_idx, d_idx],
+        "Volatility (%)": volatility,
+        "Score": score[t_idx, d_idx],
+        "Risk Tier": classify_risk_tier(volatility, ai_score),
+        "Target": features["target"][t_idx, d_idx],
+        "Return": features["return"][t_idx, d_idx],
+        "Hit": features["hit"][t_idx, d_idx],
+        "Selected": selected[t_idx, d_idx],
+    })
+
+
+def _evaluate_chunk(panel, params, day_offset):
+    features = compute_features(panel, params["decision_slot"])
+    return evaluate(features, params, panel["tickers"], panel["dates"], day_offset)
+
+
+# --- Reporting ---
+
+def score_ic(candidates):
+    """Mean daily Spearman correlation between Score and same-day return."""
+    if candidates.empty:
+        return np.nan
+    by_day = candidates.groupby("Day")
+    score_rank = by_day["Score"].rank()
+    return_rank = by_day["Return"].rank()
+    a = score_rank - score_rank.groupby(candidates["Day"]).transform("mean")
+    b = return_rank - return_rank.groupby(candidates["Day"]).transform("mean")
+    frame = pd.DataFrame({"ab": a * b, "aa": a * a, "bb": b * b, "Day": candidates["Day"]})
+    sums = frame.groupby("Day")[["ab", "aa", "bb"]].sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ic = sums["ab"] / np.sqrt(sums["aa"] * sums["bb"])
+    return float(ic.replace([np.inf, -np.inf], np.nan).mean())
+
+
+def summarize(candidates):
+    trades = candidates[candidates["Selected"]]
+    daily = trades.groupby("Date")["Return"].mean()
+    summary = {
+        "Days": int(candidates["Day"].nunique()),
+        "Trades": int(len(trades)),
+        "Hit Rate": float(trades["Hit"].mean()) if len(trades) else np.nan,
+        "Win Rate": float((trades["Return"] > 0).mean()) if len(trades) else np.nan,
+        "Mean Return (%)": float(trades["Return"].mean() * 100) if len(trades) else np.nan,
+        "Median Return (%)": float(trades["Return"].median() * 100) if len(trades) else np.nan,
+        "Cumulative Return (%)": float(((1 + daily).prod() - 1) * 100) if len(daily) else np.nan,
+        "Daily Sharpe": float(daily.mean() / daily.std() * np.sqrt(252)) if len(daily) > 1 and daily.std() > 0 else np.nan,
+        "Score IC": score_ic(candidates),
+    }
+    tiers = trades.groupby("Risk Tier", observed=True).agg(
+        Trades=("Return", "size"),
+        **{"Hit Rate": ("Hit", "mean"), "Mean Return (%)": ("Return", lambda r: r.mean() * 100)}
+    )
+    return summary, tiers, daily
+
+
+def run_backtest(panel, params=None, workers=1, chunks=None):
+    """Replay a bar panel; date ranges are split across a process pool when workers > 1."""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    n_days = len(panel["dates"])
+    chunks = chunks or max(1, workers)
+
+    # Each range carries WARMUP_DAYS of history so its first day sees a full window
+    bounds = np.array_split(np.arange(WARMUP_DAYS, n_days), chunks)
+    jobs = [(slice_days(panel, b[0] - WARMUP_DAYS, b[-1] + 1), params, b[0] - WARMUP_DAYS)
+            for b in bounds if len(b)]
+
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_evaluate_chunk, *zip(*jobs)))
+    else:
+        parts = [_evaluate_chunk(*job) for job in jobs]
+
+    candidates = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    summary, tiers, daily = summarize(candidates)
+    return {"summary": summary, "tiers": tiers, "daily": daily, "candidates": candidates}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the scan Score and risk tiers on hourly bars.")
+    parser.add_argument("tickers_file", help="text file with one ticker per line")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--top-n", type=int, default=DEFAULT_PARAMS["top_n"])
+    parser.add_argument("--ai-score", type=float, default=DEFAULT_PARAMS["ai_score"])
+    args = parser.parse_args()
+
+    with open(args.tickers_file) as f:
+        tickers = [line.strip().upper() for line in f if line.strip()]
+
+    panel = load_panel(tickers, period=args.period)
+    result = run_backtest(panel, {"top_n": args.top_n, "ai_score": args.ai_score}, workers=args.workers)
+    for key, value in result["summary"].items():
+        print(f"{key:>22}: {value:.4f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    print()
+    print(result["tiers"].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,26 @@
 # modules/gpt_summary.py
 
 import streamlit as st
-import requests
+from utils import http_client
 from bs4 import BeautifulSoup
 from email.utils import parsedate_to_datetime
 import pytz
 import datetime
-from serpapi import GoogleSearch
 import os
+from utils.perf import span
+from utils import market_cache
 
-def parse_source(url, selector, source_name, prefix="https://", rss=False):
+HEADLINES_MAX_AGE = 900  # seconds
+
+def parse_source(url, selector, source_name, prefix="https://", rss=False, on_error=st.warning):
     headers = {'User-Agent': 'Mozilla/5.0'}
     all_headlines = []
     central = pytz.timezone("US/Central")
     now = datetime.datetime.now(central)
 
     try:
-        r = requests.get(url, headers=headers)
+        with span("http.news_source", net=True, source=source_name):
+            r = http_client.get(url, headers=headers)
         r.raise_for_status()
         if rss:
             soup = BeautifulSoup(r.content, features="xml")
@@ -36,35 +40,33 @@ def parse_source(url, selector, source_name, prefix="https://", rss=False):
                 link = href if href.startswith("http") else prefix + href
                 all_headlines.append((headline, link, source_name, now.strftime('%Y-%m-%d %I:%M %p %Z')))
     except Exception as e:
-        st.warning(f"{source_name} error: {e}")
+        on_error(f"{source_name} error: {e}")
 
     return all_headlines
 
-def show_gpt_summary():
-    st.title("📰 Market News Summary")
-
+def collect_headlines(on_error=st.warning):
     central = pytz.timezone("US/Central")
     now = datetime.datetime.now(central)
     now_str = now.strftime('%B %d, %Y at %I:%M %p %Z')
     today = now.date()
 
-    st.info(f"🕒 Fetching market-moving news for {today}...")
-
     all_headlines = []
-    all_headlines += parse_source("https://news.google.com/rss/search?q=site:reuters.com+business&hl=en-US&gl=US&ceid=US:en", "", "Reuters", rss=True)
-    all_headlines += parse_source("https://www.bloomberg.com/markets", "a[data-testid='StoryModuleHeadlineLink']", "Bloomberg", "https://www.bloomberg.com")
-    all_headlines += parse_source("https://finance.yahoo.com/news/", "li.js-stream-content h3 a", "Yahoo Finance", "https://finance.yahoo.com")
+    all_headlines += parse_source("https://news.google.com/rss/search?q=site:reuters.com+business&hl=en-US&gl=US&ceid=US:en", "", "Reuters", rss=True, on_error=on_error)
+    all_headlines += parse_source("https://www.bloomberg.com/markets", "a[data-testid='StoryModuleHeadlineLink']", "Bloomberg", "https://www.bloomberg.com", on_error=on_error)
+    all_headlines += parse_source("https://finance.yahoo.com/news/", "li.js-stream-content h3 a", "Yahoo Finance", "https://finance.yahoo.com", on_error=on_error)
 
     try:
         serpapi_key = os.getenv("SERPAPI_KEY")
         if serpapi_key:
+            from serpapi import GoogleSearch  # only needed when a key is configured
             params = {
                 "engine": "google_news",
                 "q": f"US stock market {today}",
                 "api_key": serpapi_key
             }
-            search = GoogleSearch(params)
-            results = search.get_dict()
+            with span("http.serpapi", net=True):
+                search = GoogleSearch(params)
+                results = search.get_dict()
             for article in results.get("news_results", [])[:10]:
                 title = article.get("title")
                 link = article.get("link")
@@ -72,7 +74,26 @@ def show_gpt_summary():
                 date_str = article.get("date") or now_str
                 all_headlines.append((title, link, f"Google News ({source})", date_str))
     except Exception as e:
-        st.warning(f"Google News error: {e}")
+        on_error(f"Google News error: {e}")
+
+    return all_headlines
+
+def get_headlines(max_age=HEADLINES_MAX_AGE):
+    """(headlines, fetched_at), preferring the prefetched copy when fresh."""
+    return market_cache.get_or_fetch_entry(("headlines",), collect_headlines, max_age)
+
+def show_gpt_summary():
+    st.title("📰 Market News Summary")
+
+    central = pytz.timezone("US/Central")
+    now = datetime.datetime.now(central)
+    now_str = now.strftime('%B %d, %Y at %I:%M %p %Z')
+    today = now.date()
+
+    st.info(f"🕒 Fetching market-moving news for {today}...")
+
+    all_headlines, fetched_at = get_headlines()
+    st.caption(f"🕒 Data age: {market_cache.format_age(now.timestamp() - fetched_at)}")
 
     key_terms = ["fed", "inflation", "rate", "earnings", "geopolitical", "jobs", "cpi", "gdp", "conflict", "oil"]
     relevant = [(h, l, src, t) for h, l, src, t in all_headlines if any(k in h.lower() for k in key_terms)]
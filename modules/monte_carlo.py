@@ -0,0 +1,157 @@
+# modules/monte_carlo.py
+#
+# Paths are driftless: the mean of a day or two of hourly returns is noise that
+# would swamp a one-session horizon, so only sigma is calibrated, from
+# returns between bars of the same session (the overnight gap is not an
+# hourly move).
+#
+# A sell target is hit when a path touches it between bars, not only when a
+# bar closes above it: each step's touch probability comes from the Brownian
+# bridge between its two closes. Checking closes alone would miss touches and
+# sell paths that overshot the target at the target, biasing profits down.
+
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATHS = 10_000
+STEPS_PER_SESSION = 7      # hourly bars in a regular US session
+CONFIDENCE = 0.95          # VaR / CVaR level
+PARKINSON = 2 * np.sqrt(np.log(2))  # high-low range -> return std
+MC_WORKERS = int(os.getenv("MC_WORKERS", "1"))
+
+
+def session_returns(hist):
+    """Log returns between consecutive bars of the same session (overnight gaps dropped)."""
+    closes = hist['Close'].dropna()
+    returns = np.diff(np.log(closes.to_numpy(dtype=float)))
+    if isinstance(closes.index, pd.DatetimeIndex):
+        days = closes.index.normalize()
+        returns = returns[np.asarray(days[1:] == days[:-1])]
+    return returns
+
+
+def calibrate_from_bars(hist, fallback_volatility):
+    """Per-step (drift, sigma) of log returns from recent hourly bars; drift is always 0.
+
+    Falls back to the scan's average bar range when there are too few bars.
+    """
+    returns = session_returns(hist) if hist is not None and not hist.empty else np.empty(0)
+    if len(returns) >= 2:
+        sigma = returns.std(ddof=1)
+        if sigma > 0:
+            return 0.0, float(sigma)
+    return 0.0, float(fallback_volatility) / 100 / PARKINSON
+
+
+def simulate_paths(prices, drift, sigma, n_paths, n_steps=STEPS_PER_SESSION, rng=None):
+    """Geometric random-walk price paths, shaped tickers x paths x steps."""
+    rng = rng or np.random.default_rng()
+    prices = np.asarray(prices, dtype=np.float32)[:, None, None]
+    drift = np.asarray(drift, dtype=np.float32)[:, None, None]
+    sigma = np.asarray(sigma, dtype=np.float32)[:, None, None]
+
+    shocks = rng.standard_normal((prices.shape[0], n_paths, n_steps), dtype=np.float32)
+    shocks *= sigma
+    shocks += drift - np.float32(0.5) * sigma ** 2
+    np.cumsum(shocks, axis=2, out=shocks)
+    np.exp(shocks, out=shocks)
+    shocks *= prices
+    return shocks
+
+
+def position_pnl(paths, buy, sell, shares, sigma=None, rng=None):
+    """Exit at the plan's sell target if a path touches it, else at the last bar.
+
+    With `sigma` (per-step log-return std per ticker), touches between bars
+    count too, drawn from the Brownian-bridge touch probability.
+    """
+    buy = np.asarray(buy, dtype=np.float32)[:, None]
+    sell = np.asarray(sell, dtype=np.float32)[:, None]
+    shares = np.asarray(shares, dtype=np.float32)[:, None]
+
+    hit = paths.max(axis=2) >= sell
+    if sigma is not None:
+        rng = rng or np.random.default_rng()
+        target = np.log(sell)[:, :, None]
+        log_paths = np.log(paths)
+        start = np.concatenate([np.broadcast_to(np.log(buy)[:, :, None], paths.shape[:2] + (1,)),
+                                log_paths[:, :, :-1]], axis=2)
+        var = np.asarray(sigma, dtype=np.float32)[:, None, None] ** 2
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            touch = np.exp(-2 * (target - start) * (target - log_paths) / var)
+        hit |= (rng.random(paths.shape, dtype=np.float32) < touch).any(axis=2)
+    exit_price = np.where(hit, sell, paths[:, :, -1])
+    return (exit_price - buy) * shares, hit
+
+
+def _simulate_chunk(buy, sell, shares, drift, sigma, n_paths, n_steps, seed):
+    rng = np.random.default_rng(seed)
+    paths = simulate_paths(buy, drift, sigma, n_paths, n_steps, rng)
+    pnl, hit = position_pnl(paths, buy, sell, shares, sigma, rng)
+    return pnl.sum(axis=0, dtype=np.float64), pnl.sum(axis=1, dtype=np.float64), hit.sum(axis=1)
+
+
+def summarize_distribution(totals, profit_goal, confidence=CONFIDENCE):
+    totals = np.asarray(totals, dtype=np.float64)
+    cutoff = np.quantile(totals, 1 - confidence)
+    tail = totals[totals <= cutoff]
+    return {
+        "Mean Profit": float(totals.mean()),
+        "Median Profit": float(np.median(totals)),
+        "Std Dev": float(totals.std()),
+        "P5": float(np.quantile(totals, 0.05)),
+        "P95": float(np.quantile(totals, 0.95)),
+        "P(Goal)": float((totals >= profit_goal).mean()),
+        "P(Loss)": float((totals < 0).mean()),
+        "VaR": float(max(-cutoff, 0.0)),
+        "CVaR": float(max(-tail.mean(), 0.0)) if tail.size else 0.0,
+    }
+
+
+def simulate_plan_distribution(plan, bars, profit_goal, n_paths=DEFAULT_PATHS,
+                               n_steps=STEPS_PER_SESSION, workers=MC_WORKERS, seed=None):
+    """Monte Carlo profit distribution for a profit plan.
+
+    `plan` is the list of rows from `simulate_plan`; `bars` maps ticker to the
+    hourly history used to calibrate each position.
+    """
+    if not plan:
+        return None
+
+    buy = np.array([row['Buy'] for row in plan], dtype=float)
+    sell = np.array([row['Sell'] for row in plan], dtype=float)
+    shares = np.array([row['Shares'] for row in plan], dtype=float)
+    params = [calibrate_from_bars(bars.get(row['Ticker']), row['Volatility %']) for row in plan]
+    drift = np.array([p[0] for p in params])
+    sigma = np.array([p[1] for p in params])
+
+    # Split paths into independent chunks so results don't depend on worker count
+    workers = max(1, int(workers))
+    chunk_sizes = [len(c) for c in np.array_split(np.arange(n_paths), workers) if len(c)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [(buy, sell, shares, drift, sigma, size, n_steps, s) for size, s in zip(chunk_sizes, seeds)]
+
+    if workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*a) for a in args]
+
+    totals = np.concatenate([c[0] for c in chunks])
+    ticker_pnl = sum(c[1] for c in chunks) / n_paths
+    ticker_hits = sum(c[2] for c in chunks) / n_paths
+
+    positions = pd.DataFrame({
+        'Ticker': [row['Ticker'] for row in plan],
+        'P(Hit Sell)': np.round(ticker_hits * 100, 1),
+        'Expected Profit': np.round(ticker_pnl, 2),
+        'Hourly Sigma %': np.round(sigma * 100, 2),
+    })
+
+    return {
+        "totals": totals,
+        "summary": summarize_distribution(totals, profit_goal),
+        "positions": positions,
+    }
@@ -0,0 +1,156 @@
+# modules/param_sweep.py
+#
+# Grid / random search over the scan thresholds and Score weights, evaluated
+# with the backtester. Bar arrays are placed in shared memory once; each pool
+# worker maps them without copying and computes the features a single time.
+#
+# Usage: python -m modules.param_sweep TICKERS_FILE [--mode random --samples 200] [--workers 4]
+
+import argparse
+import concurrent.futures
+import itertools
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from modules.backtest import (
+    FIELDS, DEFAULT_PARAMS, load_panel, compute_features, evaluate, summarize
+)
+
+DEFAULT_SPACE = {
+    "price_min": [1.0, 2.0, 5.0],
+    "price_max": [10.0, 20.0, 50.0],
+    "min_volume": [100_000, 250_000, 500_000, 1_000_000],
+    "min_volatility": [1.0, 1.5, 2.0, 3.0],
+    "w_change": [0.2, 0.4, 0.6],
+    "w_volatility": [0.2, 0.4, 0.6],
+    "w_volume": [0.0, 0.2, 0.4],
+}
+OBJECTIVE = "Mean Return (%)"
+MIN_TRADES = 50
+
+
+def grid_params(space=DEFAULT_SPACE):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_params(space=DEFAULT_SPACE, samples=200, seed=None):
+    rng = np.random.default_rng(seed)
+    grid = grid_params(space)
+    picks = rng.choice(len(grid), size=min(samples, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+
+def to_backtest_params(setting, base=DEFAULT_PARAMS):
+    return {
+        **base,
+        "price_range": (setting["price_min"], setting["price_max"]),
+        "min_volume": setting["min_volume"],
+        "min_volatility": setting["min_volatility"],
+        "weights": (setting["w_change"], setting["w_volatility"], setting["w_volume"]),
+    }
+
+
+# --- Shared-memory panel ---
+
+def share_panel(panel):
+    """Copy bar arrays into shared memory; returns (blocks, spec for workers)."""
+    blocks, spec = [], {"tickers": panel["tickers"], "dates": panel["dates"], "arrays": {}}
+    for field in FIELDS:
+        arr = panel[field]
+        shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        spec["arrays"][field] = (shm.name, arr.shape, arr.dtype.str)
+    return blocks, spec
+
+
+def attach_panel(spec):
+    blocks, panel = [], {"tickers": spec["tickers"], "dates": spec["dates"]}
+    for field, (name, shape, dtype) in spec["arrays"].items():
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        panel[field] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    return blocks, panel
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    blocks, panel = attach_panel(spec)
+    _worker.update(blocks=blocks, panel=panel, features={})
+
+
+def _features(decision_slot):
+    cache = _worker["features"]
+    if decision_slot not in cache:
+        cache[decision_slot] = compute_features(_worker["panel"], decision_slot)
+    return cache[decision_slot]
+
+
+def _evaluate_setting(setting, base):
+    params = to_backtest_params(setting, base)
+    panel = _worker["panel"]
+    candidates = evaluate(_features(params["decision_slot"]), params, panel["tickers"], panel["dates"])
+    summary, _, _ = summarize(candidates)
+    return {**setting, **summary}
+
+
+def run_sweep(panel, settings, workers=1, base=None, objective=OBJECTIVE, min_trades=MIN_TRADES):
+    """Evaluate every setting and return them ranked by `objective`."""
+    base = {**DEFAULT_PARAMS, **(base or {})}
+    if workers > 1:
+        blocks, spec = share_panel(panel)
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(spec,)
+            ) as executor:
+                rows = list(executor.map(_evaluate_setting, settings, itertools.repeat(base),
+                                         chunksize=max(1, len(settings) // (workers * 4))))
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    else:
+        _worker.update(panel=panel, features={})
+        rows = [_evaluate_setting(setting, base) for setting in settings]
+
+    table = pd.DataFrame(rows)
+    eligible = table["Trades"] >= min_trades
+    table = table.assign(Eligible=eligible).sort_values(
+        by=["Eligible", objective], ascending=[False, False], na_position="last"
+    ).reset_index(drop=True)
+    table.index += 1
+    table.index.name = "Rank"
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep scan thresholds and Score weights over historical bars.")
+    parser.add_argument("tickers_file", help="text file with one ticker per line")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--objective", default=OBJECTIVE)
+    parser.add_argument("--min-trades", type=int, default=MIN_TRADES)
+    parser.add_argument("--out", help="write the ranked table to this CSV file")
+    args = parser.parse_args()
+
+    with open(args.tickers_file) as f:
+        tickers = [line.strip().upper() for line in f if line.strip()]
+
+    panel = load_panel(tickers, period=args.period)
+    settings = grid_params() if args.mode == "grid" else random_params(samples=args.samples, seed=args.seed)
+    table = run_sweep(panel, settings, workers=args.workers,
+                      objective=args.objective, min_trades=args.min_trades)
+
+    print(table.head(20).to_string())
+    if args.out:
+        table.to_csv(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# modules/premarket_scan.py
+#
+# Pre-market gap scanner (4:00-9:30 ET). One batched download of recent
+# 5-minute bars *including extended hours* per BATCH_SIZE tickers gives both
+# the prior regular-session close and today's pre-market trading, so no
+# per-ticker .info or quote calls are made. One vectorized pass over the wide
+# frame computes, per ticker:
+#
+#   Gap (%)             last pre-market price vs. prior regular close
+#   Pre-Market Volume   today's volume before 9:30
+#   Float Volume (%)    pre-market volume over float shares, from *cached*
+#                       metadata only (blank when no scan has fetched it)
+#
+# Gaps are measured for the current session: today's from 4:00 ET on a
+# weekday, otherwise the last weekday's (holidays not handled). Until the
+# session's first pre-market bar prints, the scan is empty rather than showing
+# the previous session's gaps.
+#
+# Gappers are ranked on |gap| and activity (float-relative volume when known,
+# else pre-market volume), both as universe percentile ranks.
+#
+# Batches download one at a time (the provider serializes yf.download, whose
+# results live in module globals); a second worker reduces the previous batch
+# meanwhile.
+#
+# Results are cached for PREMARKET_MAX_AGE so every session polling the page
+# shares one fetch a minute, and the prefetch scheduler's "premarket" job keeps
+# it warm during the session. When the full-universe daily stats are cached,
+# sub-dollar and illiquid symbols are dropped before downloading.
+
+import concurrent.futures
+import datetime
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import pytz
+import streamlit as st
+from modules.scoring import normalize, top_k_indices
+from modules.scan_utils import get_movers
+from modules.universe_scan import load_symbols, cached_universe_stats, SYMBOL_FILE, BATCH_SIZE, BATCH_WORKERS
+from utils.market_data import get_provider
+from utils.perf import span, count, bind
+from utils import market_cache
+
+EASTERN = pytz.timezone("US/Eastern")
+PREMARKET_PERIOD = "2d"
+PREMARKET_INTERVAL = "5m"
+PREMARKET_MAX_AGE = int(os.getenv("PREMARKET_MAX_AGE", "60"))   # seconds
+OPEN_MINUTE = 9 * 60 + 30
+CLOSE_MINUTE = 16 * 60
+PREMARKET_START = 4 * 60
+MIN_PRICE = 1.0            # universe trim on cached daily stats
+MIN_AVG_VOLUME = 50_000
+GAP_WEIGHTS = (0.6, 0.4)   # |gap|, activity
+SOURCES = ["symbol file", "movers"]
+
+
+def is_premarket(now=None):
+    now = (now or datetime.datetime.now(EASTERN)).astimezone(EASTERN)
+    minutes = now.hour * 60 + now.minute
+    return now.weekday() < 5 and PREMARKET_START <= minutes < OPEN_MINUTE
+
+
+def current_session(now=None):
+    """Trading date whose pre-market is open or most recently was (weekends roll back; holidays don't)."""
+    now = (now or datetime.datetime.now(EASTERN)).astimezone(EASTERN)
+    day = now.date()
+    if now.weekday() >= 5 or now.hour * 60 + now.minute < PREMARKET_START:
+        day -= datetime.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def _eastern_index(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_convert(EASTERN) if index.tz is not None else index
+
+
+def _last_valid(values):
+    """Last non-NaN value per column of a (T x N) array (NaN if none)."""
+    if values.shape[0] == 0:
+        return np.full(values.shape[1], np.nan)
+    seen = ~np.isnan(values)
+    last = values.shape[0] - 1 - np.argmax(seen[::-1], axis=0)
+    out = values[last, np.arange(values.shape[1])]
+    out[~seen.any(axis=0)] = np.nan
+    return out
+
+
+def premarket_stats(data, session=None):
+    """Gap and pre-market activity per ticker from wide (field, ticker) bars incl. extended hours.
+
+    `session` (a date) is the session to measure; tickers without pre-market
+    bars on it are left out. Default: the latest date in the bars.
+    """
+    index = _eastern_index(data.index)
+    minutes = np.asarray(index.hour * 60 + index.minute)
+    day = index.normalize()
+    today = day.max() if session is None else pd.Timestamp(session).tz_localize(day.tz)
+    prior = np.asarray(day < today) & (minutes >= OPEN_MINUTE) & (minutes < CLOSE_MINUTE)
+    pre = np.asarray(day == today) & (minutes < OPEN_MINUTE)
+
+    tickers = data["Close"].columns
+    close = data["Close"].to_numpy(dtype=np.float64)
+    volume = data["Volume"].to_numpy(dtype=np.float64)
+    high = data["High"].to_numpy(dtype=np.float64)
+    low = data["Low"].to_numpy(dtype=np.float64)
+
+    prior_close = _last_valid(close[prior])
+    pre_price = _last_valid(close[pre])
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)   # all-NaN columns
+        stats = pd.DataFrame({
+            "Prior Close ($)": prior_close,
+            "Pre-Market ($)": pre_price,
+            "Gap (%)": (pre_price - prior_close) / prior_close * 100,
+            "Pre-Market High ($)": np.nanmax(high[pre], axis=0) if pre.any() else np.nan,
+            "Pre-Market Low ($)": np.nanmin(low[pre], axis=0) if pre.any() else np.nan,
+            "Pre-Market Volume": np.nansum(volume[pre], axis=0),
+        }, index=pd.Index(tickers, name="Ticker"))
+    return stats.dropna(subset=["Gap (%)"])
+
+
+def _batch(batch, session):
+    try:
+        data = get_provider().download(batch, PREMARKET_PERIOD, PREMARKET_INTERVAL, prepost=True)
+    except Exception:
+        count("premarket.batch_failed")
+        return None
+    return premarket_stats(data, session) if not data.empty else None
+
+
+def fetch_premarket(tickers, session=None, batch_size=BATCH_SIZE, workers=BATCH_WORKERS):
+    session = session or current_session()
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    with span("premarket.fetch", tickers=len(tickers), batches=len(batches)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        parts = [p for p in executor.map(bind(lambda b: _batch(b, session)), batches) if p is not None]
+    if not parts:
+        return None
+    stats = pd.concat(parts)
+    stats = stats[~stats.index.duplicated()]
+    stats.attrs["failed_batches"] = len(batches) - len(parts)
+    return stats
+
+
+def cached_float_shares(tickers):
+    """Float (else shares outstanding) from metadata already in market_cache; NaN when unknown."""
+    shares = np.full(len(tickers), np.nan)
+    for i, ticker in enumerate(tickers):
+        info = market_cache.get(("info", ticker))
+        if info:
+            shares[i] = info.get("floatShares") or info.get("sharesOutstanding") or np.nan
+    return shares
+
+
+def default_source(path=None):
+    return SOURCES[0] if os.path.exists(path or SYMBOL_FILE) else SOURCES[1]
+
+
+def premarket_universe(source, path=None):
+    """Tickers to scan: the symbol file (trimmed by cached daily stats) or the mover list.
+
+    The trim does not depend on page filters, so every session and the
+    prefetch job share one cached result.
+    """
+    if source == "movers":
+        return get_movers()
+    tickers = load_symbols(path)
+    stats = cached_universe_stats(path)
+    if stats is not None and not stats.empty:
+        dropped = stats.index[(stats["Last Close ($)"] < MIN_PRICE) | (stats["Avg Volume"] < MIN_AVG_VOLUME)]
+        dropped = set(dropped)
+        tickers = [t for t in tickers if t not in dropped]
+    return tickers
+
+
+def get_premarket(tickers, max_age=PREMARKET_MAX_AGE):
+    """(stats, fetched_at) for `tickers`, shared across sessions for max_age seconds."""
+    session = current_session()
+    key = ("premarket", session, len(tickers), hash(tuple(tickers)))
+    entry = market_cache.get_or_fetch_entry(key, lambda: fetch_premarket(list(tickers), session), max_age)
+    return entry if entry[0] is not None else (pd.DataFrame(), None)
+
+
+def rank_gappers(stats, price_range=(1.0, 50.0), min_gap=3.0, min_volume=0, direction="Both", top=50):
+    """Filtered gappers with float-relative volume and a 0-10 Gap Score, best first."""
+    if stats.empty:
+        return stats
+    gap = stats["Gap (%)"]
+    price = stats["Pre-Market ($)"]
+    keep = (price >= price_range[0]) & (price <= price_range[1]) & \
+        (gap.abs() >= min_gap) & (stats["Pre-Market Volume"] >= min_volume)
+    if direction == "Up":
+        keep &= gap > 0
+    elif direction == "Down":
+        keep &= gap < 0
+    gappers = stats[keep].copy()
+    if gappers.empty:
+        return gappers.assign(**{"Float Volume (%)": [], "Gap Score": []})
+
+    shares = cached_float_shares(gappers.index)
+    volume = gappers["Pre-Market Volume"].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gappers["Float Volume (%)"] = volume / shares * 100
+    float_rank = normalize(gappers["Float Volume (%)"])
+    activity = np.where(np.isnan(float_rank), normalize(volume), float_rank)
+    w_gap, w_activity = GAP_WEIGHTS
+    gap_rank = normalize(gappers["Gap (%)"].abs())
+    gappers["Gap Score"] = 10 * (w_gap * gap_rank + w_activity * activity) / (w_gap + w_activity)
+    return gappers.iloc[top_k_indices(gappers["Gap Score"].to_numpy(), top)].reset_index()
+
+
+def show_premarket_scan():
+    st.title("🌅 Pre-Market Gappers")
+
+    now = datetime.datetime.now(EASTERN)
+    session = current_session(now)
+    if is_premarket(now):
+        st.caption(f"🟢 Pre-market session · {now:%H:%M} ET")
+    else:
+        st.caption(f"⚪ Outside pre-market (4:00-9:30 ET) · {now:%a %H:%M} ET; "
+                   f"gaps are from the {session:%a %b %d} pre-market")
+
+    col1, col2, col3 = st.columns(3)
+    price_range = col1.slider("Price Range ($)", 1.0, 100.0, (2.0, 30.0), step=0.5, key="pm_price")
+    min_gap = col2.slider("Minimum |Gap| (%)", 0.0, 30.0, 4.0, step=0.5, key="pm_gap")
+    min_volume = col3.number_input("Min pre-market volume", 0, 10_000_000, 50_000, step=10_000, key="pm_volume")
+    direction = col1.radio("Direction", ["Both", "Up", "Down"], horizontal=True, key="pm_direction")
+    source = col2.radio("Universe", SOURCES, horizontal=True, key="pm_universe",
+                        index=SOURCES.index(default_source()))
+    refresh = col3.button("🔄 Refresh now")
+
+    try:
+        tickers = premarket_universe(source)
+    except FileNotFoundError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    if not tickers:
+        st.warning("⚠️ No tickers to scan.")
+        return
+
+    started = time.perf_counter()
+    stats, fetched_at = get_premarket(tickers, max_age=0 if refresh else PREMARKET_MAX_AGE)
+    elapsed = time.perf_counter() - started
+    gappers = rank_gappers(stats, price_range, min_gap, min_volume, direction)
+
+    if stats.empty:
+        st.info(f"No pre-market prints for the {session:%a %b %d} session yet.")
+        return
+    failed = stats.attrs.get("failed_batches", 0)
+    st.caption(
+        f"📡 {len(tickers):,} tickers · {len(stats):,} with pre-market prints · {len(gappers)} gappers · "
+        f"data age {market_cache.format_age(time.time() - fetched_at if fetched_at else None)} · {elapsed:.1f} s"
+        + (f" · {failed} batch(es) failed" if failed else "")
+    )
+    if gappers.empty:
+        st.info("No gappers match these filters.")
+        return
+
+    st.dataframe(
+        gappers[["Ticker", "Gap (%)", "Pre-Market ($)", "Prior Close ($)", "Pre-Market Volume",
+                 "Float Volume (%)", "Pre-Market High ($)", "Pre-Market Low ($)", "Gap Score"]].style.format({
+            "Gap (%)": "{:+.2f}", "Pre-Market ($)": "{:.2f}", "Prior Close ($)": "{:.2f}",
+            "Pre-Market Volume": "{:,.0f}", "Float Volume (%)": "{:.2f}", "Pre-Market High ($)": "{:.2f}",
+            "Pre-Market Low ($)": "{:.2f}", "Gap Score": "{:.1f}",
+        }, na_rep="—"),
+        use_container_width=True, hide_index=True
+    )
+    st.download_button("📥 Download CSV", gappers.to_csv(index=False), file_name="premarket_gappers.csv",
+                       mime="text/csv")
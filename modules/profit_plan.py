@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-from modules.stock_dashboard import display_stock_dashboard
+import plotly.graph_objects as go
+from modules.stock_dashboard import display_stock_dashboard, fetch_dashboard_bundle
 from utils.openai_helper import get_final_score_justification
+from modules.monte_carlo import simulate_plan_distribution, DEFAULT_PATHS
+from utils.perf import span
+from utils import data_context
+from modules.scan_schema import AI_SCORE
+from modules.risk_engine import (
+    get_risk_model, risk_contributions, sector_concentration, correlated_exposure, CORR_THRESHOLD
+)
 import os
 
 USE_OPENAI = os.getenv("USE_OPENAI", "False").lower() == "true"
@@ -17,6 +24,14 @@ def show_profit_plan():
     st.markdown("### \U0001F4C8 Plan Configuration")
     budget = st.number_input("Enter your total investment budget ($):", min_value=100, value=3000)
     profit_goal = st.number_input("Enter your desired profit goal ($):", min_value=10, value=100)
+    use_simulation = st.checkbox("🎲 Monte Carlo simulation", value=False, key="mc_enabled")
+    n_paths = st.select_slider("Simulated paths per position", [1_000, 5_000, 10_000, 50_000],
+                               value=DEFAULT_PATHS, key="mc_paths", disabled=not use_simulation)
+    cap_correlated = st.checkbox("🧮 Cap correlated exposure", value=False, key="cap_correlated")
+    max_correlated = st.slider(
+        f"Max % of budget in names correlated ≥ {CORR_THRESHOLD:.1f}", 10, 100, 40, step=5,
+        key="max_correlated", disabled=not cap_correlated
+    )
 
     # Fetch allocation percentages
     risk_allocations = {
@@ -25,10 +40,17 @@ def show_profit_plan():
         "High": st.session_state.high_risk
     }
 
+    allocated = st.session_state['allocated_stocks']
+    risk = get_risk_model(allocated['Ticker'].astype(str).tolist()) if cap_correlated else None
+
+    bars = {}
     plan, total_spent, total_profit = simulate_plan(
-        df=st.session_state['allocated_stocks'],
+        df=allocated,
         budget=budget,
-        allocations=risk_allocations
+        allocations=risk_allocations,
+        bars=bars,
+        risk=risk,
+        max_correlated=max_correlated / 100 if cap_correlated else None
     )
 
     if plan:
@@ -38,8 +60,15 @@ def show_profit_plan():
         plan_df = pd.DataFrame(plan)
         st.dataframe(plan_df)
 
+        show_plan_risk(plan, allocated, risk)
+
+        if use_simulation:
+            show_simulation(plan, bars, profit_goal, n_paths)
+
+        with span("plan.dashboard_prefetch", tickers=len(plan)):
+            bundle = fetch_dashboard_bundle([row['Ticker'] for row in plan])
         for row in plan:
-            display_stock_dashboard(row['Ticker'])
+            display_stock_dashboard(row['Ticker'], bundle[row['Ticker']])
             if USE_OPENAI:
                 st.markdown("### 🧠 AI Score Justification")
                 justification = get_final_score_justification(str(row))
@@ -48,9 +77,60 @@ def show_profit_plan():
     else:
         st.warning("No suitable stocks met the profit criteria for your budget.")
 
-def simulate_plan(df, budget, allocations):
+def show_plan_risk(plan, allocated, risk=None):
+    with st.expander("🧮 Plan Risk: correlation & sector concentration"):
+        risk = risk or get_risk_model([row['Ticker'] for row in plan])
+        if risk is None:
+            st.write("- No bar history available for a risk estimate")
+            return
+        contributions = risk_contributions(risk, {row['Ticker']: row['Invest'] for row in plan})
+        contributions = contributions[contributions["Weight (%)"] > 0]
+        sectors = dict(zip(allocated['Ticker'].astype(str), allocated['Sector'].astype(str)))
+        by_sector, hhi = sector_concentration(contributions, sectors)
+        st.caption(
+            f"{risk.n_obs} hourly returns · shrinkage {risk.shrinkage:.2f} · "
+            f"sector HHI {hhi:.2f} (1.0 = a single sector)"
+        )
+        st.dataframe(contributions.round(2), use_container_width=True, hide_index=True)
+        st.dataframe(by_sector.round(2), use_container_width=True)
+
+def show_simulation(plan, bars, profit_goal, n_paths):
+    with span("plan.monte_carlo", paths=n_paths):
+        result = simulate_plan_distribution(plan, bars, profit_goal, n_paths=n_paths)
+    summary = result["summary"]
+
+    st.subheader("\U0001F3B2 Simulated Profit Distribution")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Mean Profit", f"${summary['Mean Profit']:.2f}")
+    col2.metric("P(Goal)", f"{summary['P(Goal)'] * 100:.1f}%")
+    col3.metric("VaR 95%", f"${summary['VaR']:.2f}")
+    col4.metric("CVaR 95%", f"${summary['CVaR']:.2f}")
+    st.caption(
+        f"{n_paths:,} paths per position · median ${summary['Median Profit']:.2f} · "
+        f"P5 ${summary['P5']:.2f} · P95 ${summary['P95']:.2f} · P(Loss) {summary['P(Loss)'] * 100:.1f}%"
+    )
+
+    fig = go.Figure(go.Histogram(x=result["totals"], nbinsx=60, name="Plan Profit"))
+    fig.add_vline(x=profit_goal, line_dash="dash", line_color="green")
+    fig.update_layout(
+        xaxis_title="Plan Profit ($)",
+        yaxis_title="Paths",
+        template="plotly_white",
+        height=300,
+        margin=dict(l=0, r=0, t=10, b=0),
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(result["positions"], use_container_width=True)
+
+def simulate_plan(df, budget, allocations, bars=None, risk=None, max_correlated=None, history=None):
+    """Greedy plan per tier. With a risk model and `max_correlated` (fraction of
+    budget), dollars in names correlated with a candidate, including itself,
+    never exceed that fraction. `history(ticker, period, interval)` supplies the
+    bars (default: this run's DataContext)."""
     plan = []
+    held = {}
     total_spent = total_profit = 0
+    history = history or data_context.current().history
 
     for tier in ["Low", "Medium", "High"]:
         tier_df = df[df['Risk Tier'] == tier]
@@ -62,19 +142,26 @@ def simulate_plan(df, budget, allocations):
         sorted_tier = tier_df.sort_values(by=["Score"], ascending=False).reset_index(drop=True)
 
         for _, row in sorted_tier.iterrows():
-            price = row.get("Last Close ($)", 0)
+            price = float(row.get("Last Close ($)", 0))
             if price == 0:
                 continue
 
-            stock = yf.Ticker(row['Ticker'])
-            hist = stock.history(period="2d", interval="1h")
+            try:
+                hist = history(row['Ticker'], "2d", "1h")
+            except Exception:
+                hist = pd.DataFrame()
             peak_48h = hist['High'].max() if not hist.empty else price
+            if bars is not None:
+                bars[row['Ticker']] = hist
 
             volatility = max(3, row['Volatility (%)']) / 2
             est_price = price * (1 + volatility / 100)
             sell_price = max(est_price, peak_48h)
 
-            max_shares = int(tier_budget / price)
+            room = tier_budget
+            if risk is not None and max_correlated is not None:
+                room = min(room, budget * max_correlated - correlated_exposure(risk, row['Ticker'], held))
+            max_shares = int(room / price)
             if max_shares <= 0:
                 continue
 
@@ -94,11 +181,12 @@ def simulate_plan(df, budget, allocations):
                 'Invest': round(invest, 2),
                 'Profit': round(profit, 2),
                 'ROI % of Budget': round(potential_roi, 2),
-                'AI Score': row['AI Recommendation (0-10)'],
+                'AI Score': row[AI_SCORE],
                 'Volatility %': row['Volatility (%)'],
                 'Risk Tier': tier
             })
 
+            held[row['Ticker']] = invest
             total_spent += invest
             total_profit += profit
 
@@ -1,13 +1,19 @@
 import streamlit as st
 import pandas as pd
-import requests
+from utils import http_client
 from bs4 import BeautifulSoup
-from textblob import TextBlob
 from utils.openai_helper import call_openai_chat, is_ai_enabled
+from modules.scan_utils import classify_risk_tier
+from modules.scan_schema import is_scan_frame, with_risk_tiers, AI_SCORE, RISK_TIERS
+from utils.perf import span
+from utils import market_cache
+
+NEWS_MAX_AGE = 900  # seconds
 
 def scrape_yahoo_finance():
     url = 'https://finance.yahoo.com'
-    response = requests.get(url)
+    with span("http.yahoo_finance", net=True):
+        response = http_client.get(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     articles = []
     for item in soup.find_all('h3'):
@@ -18,7 +24,8 @@ def scrape_yahoo_finance():
 
 def scrape_cnbc():
     url = 'https://www.cnbc.com'
-    response = requests.get(url)
+    with span("http.cnbc", net=True):
+        response = http_client.get(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     articles = []
     for item in soup.find_all('h3', class_='Card-title'):
@@ -29,7 +36,8 @@ def scrape_cnbc():
 
 def scrape_marketwatch():
     url = 'https://www.marketwatch.com'
-    response = requests.get(url)
+    with span("http.marketwatch", net=True):
+        response = http_client.get(url)
     soup = BeautifulSoup(response.content, 'html.parser')
     articles = []
     for item in soup.find_all('h3'):
@@ -39,6 +47,7 @@ def scrape_marketwatch():
     return articles
 
 def analyze_sentiment(articles):
+    from textblob import TextBlob  # loaded only when AI sentiment is enabled
     sentiments = []
     for article in articles:
         text = article['title']
@@ -52,8 +61,16 @@ def analyze_sentiment(articles):
         sentiments.append({'title': article['title'], 'sentiment': sentiment, 'polarity': polarity})
     return sentiments
 
-def get_market_sentiment():
-    articles = scrape_yahoo_finance() + scrape_cnbc() + scrape_marketwatch()
+def fetch_market_articles():
+    return scrape_yahoo_finance() + scrape_cnbc() + scrape_marketwatch()
+
+def get_market_articles(max_age=NEWS_MAX_AGE):
+    """(articles, fetched_at), preferring the prefetched copy when fresh."""
+    return market_cache.get_or_fetch_entry(("market_articles",), fetch_market_articles, max_age)
+
+def get_market_sentiment(articles=None):
+    if articles is None:
+        articles, _ = get_market_articles()
     sentiments = analyze_sentiment(articles)
 
     bullish_count = sum(1 for s in sentiments if s['sentiment'] == 'Bullish')
@@ -96,7 +113,7 @@ def classify_stock_risk_tiers(df):
         else:
             return "High Risk"
     df["Risk Tier"] = df.apply(
-        lambda row: classify_row(row["Volatility (%)"], row["AI Recommendation (0–10)"]),
+        lambda row: classify_row(row["Volatility (%)"], row[AI_SCORE]),
         axis=1
     )
     return df
@@ -126,7 +143,9 @@ def show_risk_allocation():
         st.markdown("---")
         st.markdown("### 🤖 AI Market Sentiment")
 
-        sentiment_score, trend_label, sentiments, key_drivers = get_market_sentiment()
+        articles, _ = get_market_articles()
+        sentiment_score, trend_label, sentiments, key_drivers = get_market_sentiment(articles)
+        st.caption(f"🕒 Data age: {market_cache.format_age(market_cache.age(('market_articles',)))}")
         st.info(f"Sentiment Score: {sentiment_score}")
         st.info(f"Trend Label: {trend_label}")
 
@@ -154,58 +173,20 @@ def show_risk_allocation():
 
     df = st.session_state.get("top10", pd.DataFrame())
 
-    # ✅ Strip and normalize column names
-    df.columns = (
-        df.columns.str.encode("ascii", "ignore").str.decode("ascii")
-        .str.strip()
-        .str.replace("\u00a0", " ")
-        .str.replace("–", "-")
-        .str.replace("—", "-")
-        .str.replace(r"[^a-zA-Z0-9 ()%-]", "", regex=True)
-    )
-
-    # Attempt to rename damaged columns
-    for col in df.columns:
-        if "AI Recommendation" in col and "10" in col:
-            df.rename(columns={col: "AI Recommendation (0-10)"}, inplace=True)
-        if "Last Close" in col:
-            df.rename(columns={col: "Last Close ($)"}, inplace=True)
-
-    # Check required columns
-    if not all(col in df.columns for col in ["Volatility (%)", "AI Recommendation (0-10)"]):
-        st.error("❌ One or both required columns are missing from the DataFrame.")
+    if not is_scan_frame(df):
+        st.warning("⚠️ Scan results are from an older version. Please run the Market Scan again.")
         return
 
     if df.empty:
         st.warning("⚠️ No market scan results found. Please run the Market Scan first.")
         return
 
-    required_columns = ["Volatility (%)", "AI Recommendation (0-10)"]
-    for col in required_columns:
-        if col not in df.columns:
-            st.error(f"❌ Required column missing: {col}")
-            return
-        if df[col].isnull().all():
-            st.error(f"❌ Column {col} contains only null values.")
-            return
-
     st.markdown("---")
     st.markdown("### 📊 Risk Classification of Candidates")
 
+    # Tiers go on a shallow copy so 'top10' itself is never mutated
     def classify_stock_risk_tiers(df):
-        def classify_row(volatility, ai_score):
-            if volatility < 2.0 and ai_score >= 7:
-                return "Low"
-            elif 2.0 <= volatility < 3.5 and 5 <= ai_score < 7:
-                return "Medium"
-            else:
-                return "High"
-
-        df["Risk Tier"] = df.apply(
-            lambda row: classify_row(row["Volatility (%)"], row["AI Recommendation (0-10)"]),
-            axis=1
-        )
-        return df
+        return with_risk_tiers(df, classify_risk_tier(df["Volatility (%)"], df[AI_SCORE]))
 
     classified = classify_stock_risk_tiers(df)
     st.session_state['allocated_stocks'] = classified
@@ -216,13 +197,13 @@ def show_risk_allocation():
         "High": "#F8D7DA"       # Light red
     }
 
-    for tier in ['Low', 'Medium', 'High']:
+    for tier in RISK_TIERS:
         group = classified[classified['Risk Tier'] == tier]
         st.markdown(f"#### {tier} Risk Stocks ({len(group)})")
         if group.empty:
             st.write("- None")
         else:
-            styled = group[['Ticker', 'Company Name', 'AI Recommendation (0-10)', 'Volatility (%)', 'Score']].style.apply(
+            styled = group[['Ticker', 'Company Name', AI_SCORE, 'Volatility (%)', 'Score']].style.apply(
                 lambda _: [f"background-color: {COLOR_MAP[tier]}"] * 5,
                 axis=1
             )
@@ -0,0 +1,199 @@
+# modules/risk_engine.py
+#
+# Cross-sectional risk for scan candidates and profit plans: one covariance
+# matrix of hourly log returns for every ticker at once, shrunk toward a scaled
+# identity (Ledoit-Wolf) because windows are short relative to the number of
+# names, plus marginal risk contributions and sector concentration.
+#
+# Models are cached per ticker set in market_cache. When newer bars arrive the
+# cached model is rolled forward with an EWMA update over only the new rows
+# instead of being rebuilt. Closes are fetched on a thread pool (yahoo_guard
+# caps how many reach Yahoo at once).
+
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from utils import data_context
+from utils.perf import span, bind
+from utils import market_cache
+
+RETURNS_PERIOD = "30d"
+RETURNS_INTERVAL = "1h"
+BARS_PER_YEAR = 7 * 252
+EWMA_DECAY = 0.97            # per new hourly bar in incremental updates
+CORR_THRESHOLD = 0.7         # "correlated" for exposure caps
+MIN_OBS = 20
+FETCH_WORKERS = 16
+
+
+def returns_matrix(closes):
+    """(T x N) hourly log returns from {ticker: close Series}, aligned on timestamps."""
+    wide = pd.DataFrame(closes).sort_index()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rets = np.log(wide).diff().iloc[1:]
+    return rets
+
+
+def ledoit_wolf(x):
+    """Shrunk covariance of demeaned (T x N) returns and the shrinkage intensity."""
+    t, n = x.shape
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    delta = ((sample - mu * np.eye(n)) ** 2).sum() / n
+    x2 = x ** 2
+    beta = ((x2.T @ x2) / t - sample ** 2).sum() / (n * t)
+    shrinkage = 0.0 if delta == 0 else min(1.0, max(0.0, beta / delta))
+    return shrinkage * mu * np.eye(n) + (1 - shrinkage) * sample, shrinkage
+
+
+class RiskModel:
+    def __init__(self, tickers, cov, mean, last_ts, n_obs, shrinkage):
+        self.tickers = list(tickers)
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+        self.cov = cov
+        self.mean = mean
+        self.last_ts = last_ts
+        self.n_obs = n_obs
+        self.shrinkage = shrinkage
+        self._corr = None
+
+    @classmethod
+    def from_returns(cls, rets):
+        # Names with too little history get the cross-sectional median variance
+        # and zero correlation instead of dropping out of the matrix
+        values = rets.to_numpy(dtype=np.float64)
+        observed = ~np.isnan(values)
+        counts = observed.sum(axis=0)
+        mean = np.where(counts > 0, np.nansum(values, axis=0) / np.maximum(counts, 1), 0.0)
+        x = np.where(observed, values - mean, 0.0)
+        cov, shrinkage = ledoit_wolf(x)
+        thin = counts < MIN_OBS
+        if thin.any():
+            fill = np.median(np.diag(cov)[~thin]) if (~thin).any() else 1e-4
+            cov[thin, :] = 0.0
+            cov[:, thin] = 0.0
+            cov[thin, thin] = fill
+        return cls(rets.columns, cov, mean, rets.index[-1], len(rets), shrinkage)
+
+    def update(self, rets):
+        """A model rolled forward over the rows of `rets` newer than last_ts.
+
+        Applies cov <- d * cov + (1 - d) * r r' per new row (d = EWMA_DECAY) in
+        one matrix product. Returns a new model; cached ones are never mutated.
+        """
+        new = rets[rets.index > self.last_ts].reindex(columns=self.tickers)
+        if new.empty:
+            return self
+        x = np.nan_to_num(new.to_numpy(dtype=np.float64) - self.mean)
+        k = len(x)
+        weights = (1 - EWMA_DECAY) * EWMA_DECAY ** np.arange(k - 1, -1, -1)
+        cov = EWMA_DECAY ** k * self.cov + (x * weights[:, None]).T @ x
+        return RiskModel(self.tickers, cov, self.mean, new.index[-1], self.n_obs + k, self.shrinkage)
+
+    @property
+    def volatility(self):
+        return np.sqrt(np.diag(self.cov))
+
+    @property
+    def corr(self):
+        if self._corr is None:
+            vol = self.volatility
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self._corr = np.nan_to_num(self.cov / np.outer(vol, vol))
+        return self._corr
+
+    def corr_frame(self):
+        return pd.DataFrame(self.corr, index=self.tickers, columns=self.tickers)
+
+    def weights(self, exposures):
+        """Weight vector over the model's tickers from {ticker: dollars} (others 0)."""
+        w = np.zeros(len(self.tickers))
+        for ticker, dollars in exposures.items():
+            if ticker in self.index:
+                w[self.index[ticker]] += dollars
+        total = np.abs(w).sum()
+        return w / total if total else w
+
+
+def fetch_closes(tickers, period=RETURNS_PERIOD, interval=RETURNS_INTERVAL, workers=FETCH_WORKERS):
+    """{ticker: close Series} for the tickers with bars; fetched concurrently."""
+    data = data_context.current()
+
+    def close(ticker):
+        try:
+            return data.history(ticker, period, interval)["Close"]
+        except Exception:
+            return None
+
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    with span("risk.fetch", tickers=len(tickers)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(tickers))) as executor:
+        closes = dict(zip(tickers, executor.map(bind(close), tickers)))
+    return {t: c for t, c in closes.items() if c is not None}
+
+
+def build_model(tickers, period=RETURNS_PERIOD, interval=RETURNS_INTERVAL):
+    closes = fetch_closes(tickers, period, interval)
+    if not closes:
+        return None
+    return RiskModel.from_returns(returns_matrix(closes))
+
+
+def get_risk_model(tickers, period=RETURNS_PERIOD, interval=RETURNS_INTERVAL):
+    """Cached model for this ticker set, rolled forward when newer bars are cached."""
+    key = ("risk_model", tuple(sorted(tickers)), period, interval)
+    with span("risk.model", tickers=len(tickers)):
+        model = market_cache.get(key)
+        if model is None:
+            model = build_model(tickers, period, interval)
+        else:
+            closes = fetch_closes(model.tickers, period, interval)
+            if closes:
+                model = model.update(returns_matrix(closes))
+        if model is not None:
+            market_cache.put(key, model)
+    return model
+
+
+def risk_contributions(model, exposures=None):
+    """Per-ticker volatility, average correlation and contribution to portfolio risk.
+
+    `exposures` maps ticker -> dollars; default is an equal-weight book of every
+    ticker in the model, which ranks candidates by how much risk they add.
+    """
+    w = model.weights(exposures or {t: 1.0 for t in model.tickers})
+    sigma_w = model.cov @ w
+    port_var = float(w @ sigma_w)
+    port_vol = np.sqrt(port_var) if port_var > 0 else np.nan
+    corr = model.corr
+    n = len(model.tickers)
+    avg_corr = (corr.sum(axis=1) - 1) / max(n - 1, 1)
+    annual = np.sqrt(BARS_PER_YEAR) * 100
+    return pd.DataFrame({
+        "Ticker": model.tickers,
+        "Weight (%)": w * 100,
+        "Volatility (%/yr)": model.volatility * annual,
+        "Avg Correlation": avg_corr,
+        "Marginal Risk (%/yr)": sigma_w / port_vol * annual,
+        "Risk Contribution (%)": w * sigma_w / port_var * 100 if port_var > 0 else np.nan,
+    })
+
+
+def sector_concentration(contributions, sectors):
+    """Weight and risk share by sector, plus the Herfindahl index of the weights."""
+    frame = contributions.assign(Sector=contributions["Ticker"].map(sectors).fillna("N/A"))
+    table = frame.groupby("Sector", observed=True)[["Weight (%)", "Risk Contribution (%)"]].sum()
+    table = table.sort_values("Risk Contribution (%)", ascending=False)
+    hhi = float(((table["Weight (%)"] / 100) ** 2).sum())
+    return table, hhi
+
+
+def correlated_exposure(model, ticker, held, threshold=CORR_THRESHOLD):
+    """Dollars already held in names whose correlation with `ticker` is >= threshold."""
+    if model is None or ticker not in model.index:
+        return 0.0
+    row = model.corr[model.index[ticker]]
+    return sum(dollars for t, dollars in held.items()
+               if t in model.index and row[model.index[t]] >= threshold)
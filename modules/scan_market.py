@@ -2,35 +2,189 @@
 
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import matplotlib.pyplot as plt
 import concurrent.futures
+import time
 from io import StringIO
 import plotly.graph_objects as go
-from modules.scan_utils import fetch_movers, analyze_stock
+from modules.scan_utils import (
+    get_movers, passes_filters,
+    RELAX_BELOW, RELAXED_VOLUME, RELAXED_VOLATILITY
+)
+from modules.scan_schema import to_scan_frame, AI_SCORE
+from modules.scoring import score_frame, top_k_indices
+from modules.scan_pipeline import run_scan_pipeline, prefetch
+from modules import snapshot_store, sector_rollup
+from modules.universe_scan import universe_candidates, SYMBOL_FILE
+from modules.ai_cascade import run_cascade, CASCADE, CHEAP_MODEL, STRONG_MODEL, CANDIDATES as CASCADE_CANDIDATES
+from modules.sharded_scan import analyze_tickers_sharded, SCAN_WORKERS, MIN_SHARDED
 from utils.openai_helper import analyze_stock_summary_and_details
+from utils.perf import span, bind, current_run, latency_percentiles
+from utils.latency_budget import LatencyBudget
+from utils import market_cache, data_context
+from utils.upstream_guard import yahoo_guard
+from collections import Counter
 import os
 
 AVAILABLE_MODELS = ["gpt-3.5-turbo", "gpt-4", "gpt-4o"]
 DEFAULT_MODEL = "gpt-3.5-turbo"
 
 
+UNIVERSES = ["Yahoo movers", "Full US universe (symbol file)"]
+
 USE_OPENAI = os.getenv("USE_OPENAI", "false").lower() == "true"
 AI_STOCK_LIMIT = 15  # ✅ Limit AI calls to top N stocks
+AI_MAX_AGE = 1800    # seconds an AI analysis is reused across sessions
+AI_RETRIES = 1       # extra attempts for entries whose reply failed validation
+AI_WORKERS = 10
+AI_CALL_SECONDS = float(os.getenv("AI_CALL_SECONDS", "6"))  # budget planning: one wave of AI_WORKERS calls
+SCAN_BUDGET = float(os.getenv("SCAN_BUDGET", "0"))          # default page time budget in seconds (0 = off)
+SKIPPED_AI = {"summary": "⏳ Not analyzed (time budget)", "ai_notes": "⏳ Not analyzed within the page's time budget.",
+              "score": 0, "score_label": "", "skipped": True}
+
+# AI results are shared process-wide, keyed by model and the inputs the prompt
+# sees, so concurrent sessions scanning the same movers make one call per stock.
+def ai_cache_key(row, model):
+    return ("ai", model, row['Ticker'], row['Company Name'], row['Sector'],
+            int(row['Volume']), float(row['Change (%)']), float(row['Volatility (%)']))
+
+def cached_ai_analysis(row, model):
+    key = ai_cache_key(row, model)
+    attempt = {}
+
+    def fetch():
+        attempt.update(analyze_stock_summary_and_details(row, model))
+        return None if attempt["summary"].startswith("⚠️") else dict(attempt)  # don't cache failures
+
+    result = market_cache.get_or_fetch(key, fetch, AI_MAX_AGE)
+    return result if result is not None else (attempt or analyze_stock_summary_and_details(row, model))
+
+def ai_failed(result):
+    return result["summary"].startswith("⚠️")
+
+def cached_or_skipped(row, model):
+    """The cached analysis for `row`, without calling OpenAI."""
+    return market_cache.get(ai_cache_key(row, model), AI_MAX_AGE) or SKIPPED_AI
+
+def run_ai_batch(df, model=None, deadline=None):
+    """One analysis per row. Calls still running at `deadline` (time.monotonic())
+    are abandoned: those rows get a cached analysis if one exists, else SKIPPED_AI.
+    Abandoned calls finish in the background and land in the cache."""
+    model = model or st.session_state.get("gpt_model", "gpt-3.5-turbo")
+    rows = [row for _, row in df.iterrows()]
+    analyze = bind(lambda row: cached_ai_analysis(row, model))
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=AI_WORKERS)
+
+    def run(indices):
+        futures = {executor.submit(analyze, rows[i]): i for i in indices}
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, _ = concurrent.futures.wait(futures, timeout=timeout)
+        return {futures[f]: f.result() if f in done else cached_or_skipped(rows[futures[f]], model) for f in futures}
+
+    try:
+        with span("scan.ai_batch", rows=len(df)):
+            results = run(range(len(rows)))
+            # Only entries whose reply failed validation are asked again
+            for _ in range(AI_RETRIES):
+                failed = [i for i, result in results.items() if ai_failed(result)]
+                if not failed or not USE_OPENAI or (deadline is not None and time.monotonic() >= deadline):
+                    break
+                with span("scan.ai_retry", rows=len(failed)):
+                    results.update(run(failed))
+    finally:
+        executor.shutdown(wait=False)
+    return [results[i] for i in range(len(rows))]
+
+def ai_budget_limit(limit, budget):
+    """How many rows AI can analyze in the time left for the "ai" stage."""
+    if not budget.enabled:
+        return limit
+    waves = int(budget.remaining("ai") // AI_CALL_SECONDS)
+    return min(limit, waves * AI_WORKERS)
+
+def show_fetch_report(total, statuses, filtered):
+    skipped = statuses["rate_limited"] + statuses["circuit_open"] + statuses["error"]
+    guard = yahoo_guard.snapshot()
+    report = (
+        f"📡 {total} tickers · {statuses['ok']} analyzed · {filtered} filtered out · "
+        f"{statuses['no_data']} without data · {skipped} skipped "
+        f"(rate-limited {statuses['rate_limited']}, circuit open {statuses['circuit_open']}, "
+        f"errors {statuses['error']}) · Yahoo concurrency {guard['limit']}, breaker {guard['state']}"
+    )
+    if skipped:
+        st.warning(f"⚠️ {skipped} tickers were skipped because Yahoo is throttling requests; results are partial.  \n{report}")
+    else:
+        st.caption(report)
+
+def show_progress(placeholder, rows, total, price_range, min_volume, min_volatility):
+    # Provisional ranking of what has arrived so far (strict filters only)
+    matched = [r for r, _ in rows if r and passes_filters(
+        r["Last Close ($)"], r["Volume"], r["Volatility (%)"], price_range, min_volume, min_volatility
+    )]
+    with placeholder.container():
+        st.caption(f"⏳ Scanning… {len(rows)}/{total} tickers analyzed · {len(matched)} matching so far")
+        if matched:
+            partial = pd.DataFrame(matched)
+            partial['Score'] = score_frame(partial)
+            partial = partial.iloc[top_k_indices(partial['Score'].to_numpy(), 30)]
+            st.dataframe(partial[['Ticker', 'Company Name', 'Last Close ($)', 'Change (%)', 'Volume',
+                                  'Volatility (%)', 'Score']], use_container_width=True, hide_index=True)
+
+def show_budget(placeholder, budget):
+    run = current_run()
+    latency = latency_percentiles(run.label) if run else {"runs": 0}
+    pages = (f" · page p50 {latency['p50'] / 1000:.1f} s, p95 {latency['p95'] / 1000:.1f} s "
+             f"over {latency['runs']} runs" if latency["runs"] else "")
+    if budget.skipped:
+        placeholder.warning(budget.summary() + pages)
+    elif budget.enabled or pages:
+        placeholder.caption((budget.summary() if budget.enabled else "⏱️ No time budget") + pages)
+
+def show_cascade_decisions(decisions):
+    escalated = int(decisions["Escalated"].sum())
+    with st.expander(f"🧭 AI routing: {escalated} of {len(decisions)} escalated to `{STRONG_MODEL}`"):
+        st.caption(f"~{int(decisions['Tokens'].sum()):,} tokens · reasons: "
+                   f"{decisions['Reason'].value_counts().to_dict() or 'none'}")
+        st.dataframe(decisions, use_container_width=True, hide_index=True)
+
+def show_snapshot_history(top30):
+    with st.expander("🗂️ Scan History"):
+        new = snapshot_store.new_since_previous()
+        st.markdown("**New since the previous scan**")
+        if new.empty:
+            st.write("- None")
+        else:
+            st.dataframe(new[['Ticker', 'Company Name', 'Rank', 'Score', 'Change (%)', AI_SCORE]],
+                         use_container_width=True, hide_index=True)
+
+        ticker = st.selectbox("Score trend today", top30['Ticker'].astype(str).tolist(), key="snapshot_ticker")
+        trend = snapshot_store.score_trend(ticker) if ticker else None
+        if trend is not None and not trend.empty:
+            st.line_chart(trend.set_index('Scanned At')[['Score']])
 
-def run_ai_batch(df):
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        return list(executor.map(analyze_stock_summary_and_details, [row for _, row in df.iterrows()]))
+        previous = snapshot_store.top_n()
+        st.markdown("**Previous trading day's top 30**")
+        if previous.empty:
+            st.write("- No earlier snapshots")
+        else:
+            st.dataframe(previous[['Rank', 'Ticker', 'Company Name', 'Score', 'Change (%)', AI_SCORE]],
+                         use_container_width=True, hide_index=True)
 
 def scan_market():
     st.markdown("## 🔍 Market Scan Results")
 
     model_used = st.session_state.get("gpt_model", "gpt-3.5-turbo")
-    st.caption(f"🤖 Model in use: `{model_used}`")
+    if model_used == CASCADE:
+        st.caption(f"🤖 Model in use: `{CHEAP_MODEL}` for all candidates, escalating to `{STRONG_MODEL}`")
+    else:
+        st.caption(f"🤖 Model in use: `{model_used}`")
     
     price_range = st.sidebar.slider("Price Range ($)", 1.0, 50.0, (5.0, 10.0), step=0.5, key="price_range")
     min_volume = st.sidebar.slider("Minimum Volume", 100_000, 5_000_000, 500_000, step=100_000, key="min_volume")
     min_volatility = st.sidebar.slider("Minimum Volatility (%)", 0.5, 10.0, 2.0, step=0.1, key="min_volatility")
+    universe = st.sidebar.radio("Universe", UNIVERSES, key="scan_universe")
+    budget_seconds = st.sidebar.number_input("⏱️ Time budget (s, 0 = none)", 0, 600, int(SCAN_BUDGET), step=5,
+                                             key="scan_budget")
+    budget = LatencyBudget.from_env("SCAN", seconds=budget_seconds)
 
     st.sidebar.markdown(f"""
     **Current Settings**
@@ -39,89 +193,168 @@ def scan_market():
     - Volatility ≥ {min_volatility:.1f}%
     """)
 
-    tickers = fetch_movers()
+    if universe == UNIVERSES[0]:
+        tickers = get_movers()
+    else:
+        try:
+            tickers, info = universe_candidates(price_range, min_volume, min_volatility)
+        except FileNotFoundError as e:
+            st.warning(f"⚠️ {e}")
+            return
+        st.caption(
+            f"🌐 {info['symbols']:,} symbols in `{SYMBOL_FILE}` · {info['with_bars']:,} with daily bars · "
+            f"{info['survivors']:,} passed the daily pre-filter"
+            + (f" · {info['failed_batches']} batch(es) failed" if info['failed_batches'] else "")
+            + f" · daily data age {market_cache.format_age(info['age'])}"
+        )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(analyze_stock, tickers))
+    # yahoo_guard caps how many fetches actually hit Yahoo at once
+    if len(tickers) >= MIN_SHARDED:
+        analyzed = analyze_tickers_sharded(tickers, SCAN_WORKERS, deadline=budget.deadline("fetch"))
+    else:
+        progress = st.empty()
+        analyzed = run_scan_pipeline(
+            tickers, lambda rows, total: show_progress(progress, rows, total, price_range, min_volume, min_volatility),
+            deadline=budget.deadline("fetch")
+        )
+        progress.empty()
+    statuses = Counter(status for _, status in analyzed)
+    analyzed = [r for r, _ in analyzed if r]
+    if statuses["deadline"]:
+        budget.skip("fetch", f"{statuses['deadline']} of {len(tickers)} tickers not fetched")
 
-    results = [r for r in results if r and
-               price_range[0] <= r["Last Close ($)"] <= price_range[1] and
-               r["Volume"] >= min_volume and
-               r["Volatility (%)"] >= min_volatility]
+    results = [r for r in analyzed if passes_filters(
+        r["Last Close ($)"], r["Volume"], r["Volatility (%)"],
+        price_range, min_volume, min_volatility
+    )]
 
-    if len(results) < 20:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            relaxed = list(executor.map(analyze_stock, tickers))
-        results = [r for r in relaxed if r and
-                   price_range[0] <= r["Last Close ($)"] <= price_range[1] and
-                   r["Volume"] >= (min_volume * 0.6) and
-                   r["Volatility (%)"] >= (min_volatility * 0.8)]
+    # The relaxed pass re-filters the rows we already have instead of re-fetching
+    if len(results) < RELAX_BELOW and budget.expired("fetch"):
+        budget.skip("fetch", "relaxed second pass")
+    elif len(results) < RELAX_BELOW:
+        with span("scan.relaxed_pass", tickers=len(analyzed)):
+            results = [r for r in analyzed if passes_filters(
+                r["Last Close ($)"], r["Volume"], r["Volatility (%)"],
+                price_range, min_volume * RELAXED_VOLUME, min_volatility * RELAXED_VOLATILITY
+            )]
+
+    show_fetch_report(len(tickers), statuses, len(analyzed) - len(results))
+    budget_note = st.empty()
 
     if not results:
         st.warning("⚠️ No stocks matched your criteria.")
+        show_budget(budget_note, budget)
         return
 
     df = pd.DataFrame(results)
-    df['Score'] = (
-        df["Change (%)"].abs() * 0.4 +
-        df["Volatility (%)"] * 0.4 +
-        (df["Volume"] / 1_000_000) * 0.2
-    )
+    df['Score'] = score_frame(df)
+    # One partial selection serves the AI candidates and the top 30
+    ranked = df.index[top_k_indices(df['Score'].to_numpy(), max(30, AI_STOCK_LIMIT, CASCADE_CANDIDATES))]
 
-    df['AI Recommendation (0–10)'] = 0
+    df[AI_SCORE] = 0
     df['AI Notes'] = "⚠️ Not analyzed"
     df['AI Summary'] = "⚠️ Not analyzed"
     df['AI Score Label'] = ""
 
     if USE_OPENAI and st.session_state.get("use_ai", True):
-        top_ai_df = df.sort_values(by="Score", ascending=False).head(AI_STOCK_LIMIT)
-        ai_results = run_ai_batch(top_ai_df)
+        # Out of time: shrink the AI list to what fits; with no time at all, show cached analyses only
+        wanted = CASCADE_CANDIDATES if model_used == CASCADE else AI_STOCK_LIMIT
+        limit = ai_budget_limit(wanted, budget)
+        analyze_batch = lambda frame, model=None: run_ai_batch(frame, model, deadline=budget.deadline("ai"))
+        if limit == 0:
+            budget.skip("ai", "new AI analyses (cached results shown)")
+            top_ai_df = df.loc[ranked[:wanted]]
+            ai_model = CHEAP_MODEL if model_used == CASCADE else model_used
+            ai_results = [cached_or_skipped(row, ai_model) for _, row in top_ai_df.iterrows()]
+        else:
+            if limit < wanted:
+                budget.skip("ai", f"AI limited to the top {limit} of {wanted}")
+            top_ai_df = df.loc[ranked[:limit]]
+            if model_used == CASCADE:
+                ai_results, decisions = run_cascade(top_ai_df, analyze_batch, deadline=budget.deadline("ai"))
+                st.session_state['ai_cascade_log'] = decisions
+            else:
+                ai_results = analyze_batch(top_ai_df)
+            unfinished = sum(bool(result.get("skipped")) for result in ai_results)
+            if unfinished:
+                budget.skip("ai", f"{unfinished} AI analyses past the deadline")
 
         for i, (idx, result) in enumerate(zip(top_ai_df.index, ai_results)):
             score = result["score"]
             df.at[idx, 'AI Summary'] = result["summary"]
-            df.at[idx, 'AI Notes'] = result["ai_notes"]
-            df.at[idx, 'AI Recommendation (0–10)'] = score
+            df.at[idx, 'AI Notes'] = result["ai_notes"] + (f"\n\n🤖 Model: {result['model']}" if "model" in result else "")
+            df.at[idx, AI_SCORE] = score
             df.at[idx, 'AI Score Label'] = result.get("score_label", "")
 
-    top30 = df.sort_values(by="Score", ascending=False).head(30)
+    # One typed, validated copy per session; other pages read it without copying
+    top30 = to_scan_frame(df.loc[ranked[:30]])
     st.session_state['top10'] = top30
     st.success("✅ Top 30 Stocks Identified")
+    if model_used == CASCADE and 'ai_cascade_log' in st.session_state:
+        show_cascade_decisions(st.session_state['ai_cascade_log'])
+    data = data_context.current()
+    bar_ages = [a for a in (data.age(t, "1h") for t in top30['Ticker']) if a is not None]
+    st.caption(
+        f"🕒 Data age: movers {market_cache.format_age(market_cache.age(('movers',)))} · "
+        f"bars up to {market_cache.format_age(max(bar_ages) if bar_ages else None)}"
+    )
 
     st.dataframe(
         top30[[
             'Ticker', 'Company Name', 'Previous Close ($)', 'Last Close ($)', 'Change (%)',
             'Volume', 'Volatility (%)', 'Sector', 'Score',
-            'AI Recommendation (0–10)', 'AI Summary'
+            AI_SCORE, 'AI Summary'
         ]],
         use_container_width=True
     )
 
+    try:
+        # Reruns from widget changes or downloads rescan the same cached data; save only new scans
+        with span("scan.snapshot"):
+            scan_id = snapshot_store.save_snapshot(df, skip_unchanged=True)
+        if scan_id:
+            with span("scan.sector_rollup"):
+                sector_rollup.cache_rollup(scan_id, df)
+    except Exception as e:
+        st.caption(f"⚠️ Scan snapshot not saved: {e}")
+
     buffer = StringIO()
-    top30[[
-        'Ticker', 'Company Name', 'Previous Close ($)', 'Last Close ($)', 'Change (%)',
-        'Volume', 'Volatility (%)', 'Sector', 'Score',
-        'AI Recommendation (0–10)', 'AI Score Label', 'AI Summary', 'AI Notes'
-    ]].to_string(buf=buffer, index=False)
-    st.download_button("📥 Download Top 30", buffer.getvalue(), file_name="top30_stock_analysis.txt", mime="text/plain")
-
-    for i, row in top30.reset_index().iterrows():
+    top30.to_string(buf=buffer, index=False)
+    col_txt, col_csv, col_parquet = st.columns(3)
+    col_txt.download_button("📥 Download Top 30 (text)", buffer.getvalue(), file_name="top30_stock_analysis.txt", mime="text/plain")
+    col_csv.download_button("📥 Download CSV", top30.to_csv(index=False), file_name="top30_stock_analysis.csv", mime="text/csv")
+    col_parquet.download_button("📥 Download Parquet", snapshot_store.to_parquet_bytes(top30),
+                                file_name="top30_stock_analysis.parquet", mime="application/octet-stream")
+
+    show_snapshot_history(top30)
+
+    # Chart bars for every row are fetched concurrently; rows render in rank order as they arrive
+    chart_bars = prefetch(lambda t: data.history(t, "90d", "1d"), top30['Ticker'].astype(str).tolist(),
+                          deadline=budget.deadline("render"))
+    deferred = []
+    for (i, row), (_, hist) in zip(top30.reset_index().iterrows(), chart_bars):
+        if isinstance(hist, TimeoutError):
+            deferred.append(row['Ticker'])
+            hist = pd.DataFrame()
         col1, col2 = st.columns([2, 1])
         with col1:
             st.subheader(f"{i+1}. {row['Ticker']} - {row['Company Name']}")
-            st.markdown(f"**Sector**: {row['Sector']}  \n**Volume**: {row['Volume']:,}  \n**Change**: {row['Change (%)']}%  \n**Volatility**: {row['Volatility (%)']}%  \n**AI Score**: {row['AI Recommendation (0–10)']}")
+            st.markdown(f"**Sector**: {row['Sector']}  \n**Volume**: {row['Volume']:,}  \n**Change**: {row['Change (%)']}%  \n**Volatility**: {row['Volatility (%)']}%  \n**AI Score**: {row[AI_SCORE]}")
             with st.expander("📘 AI Notes"):
                 st.markdown(row["AI Notes"])
         with col2:
             try:
-                hist = yf.Ticker(row['Ticker']).history(period="90d", interval="1d")  # 📅 90-day daily data
+                if isinstance(hist, Exception):  # 📅 90-day daily data (shared cache)
+                    raise hist
 
-                if hist.empty or len(hist) < 2:
+                if deferred and deferred[-1] == row['Ticker']:
+                    st.caption("⏳ Chart deferred (time budget); rerun to load it.")
+                elif hist.empty or len(hist) < 2:
                     st.warning("⚠️ No recent price data available.")
                 else:
-                    # Compute EMAs using pandas
-                    hist['EMA5'] = hist['Close'].ewm(span=5, adjust=False).mean()
-                    hist['EMA20'] = hist['Close'].ewm(span=20, adjust=False).mean()
+                    # Compute EMAs using pandas (the cached frame is shared, so don't add columns)
+                    ema5 = hist['Close'].ewm(span=5, adjust=False).mean()
+                    ema20 = hist['Close'].ewm(span=20, adjust=False).mean()
 
                     fig = go.Figure()
 
@@ -139,7 +372,7 @@ def scan_market():
 
                     fig.add_trace(go.Scatter(
                         x=hist.index,
-                        y=hist['EMA5'],
+                        y=ema5,
                         mode='lines',
                         line=dict(color='blue', width=1),
                         name='EMA 5',
@@ -148,7 +381,7 @@ def scan_market():
 
                     fig.add_trace(go.Scatter(
                         x=hist.index,
-                        y=hist['EMA20'],
+                        y=ema20,
                         mode='lines',
                         line=dict(color='orange', width=1),
                         name='EMA 20',
@@ -167,3 +400,6 @@ def scan_market():
             except Exception as e:
                 st.warning(f"⚠️ Failed to load chart for {row['Ticker']}. Error: {str(e)}")
 
+    if deferred:
+        budget.skip("render", f"{len(deferred)} charts deferred")
+    show_budget(budget_note, budget)
@@ -0,0 +1,98 @@
+# modules/scan_pipeline.py
+#
+# The scan as a staged asyncio pipeline run on the Streamlit script thread:
+#
+#   tickers -> [fetch x N] -> bars queue -> [features] -> results -> on_progress
+#
+# Fetch stages run the blocking bar/info reads in a thread pool (yahoo_guard
+# still caps the upstream concurrency). The queue between stages is bounded,
+# so if feature building falls behind, fetchers wait instead of piling bars up
+# in memory. on_progress is called from the loop, i.e. the script thread, so
+# it may write to Streamlit placeholders; it fires at most every
+# PROGRESS_INTERVAL seconds plus once at the end.
+#
+# Chart bars for the render stage are prefetched the same way: every fetch is
+# started at once and charts are drawn in rank order as their bars arrive.
+#
+# Both take an optional deadline (a time.monotonic() value, see
+# utils.latency_budget): tickers not yet fetched by then come back with status
+# "deadline", and prefetch yields a TimeoutError for results still pending.
+
+import asyncio
+import concurrent.futures
+import time
+from modules.scan_utils import fetch_ticker_data, build_row
+from utils.perf import span, bind
+from utils.upstream_guard import yahoo_guard
+
+QUEUE_SIZE = 64
+PROGRESS_INTERVAL = 0.5   # seconds between progressive UI updates
+_DONE = object()
+
+
+async def _pipeline(tickers, on_progress, workers, queue_size, deadline):
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue()
+    for ticker in tickers:
+        pending.put_nowait(ticker)
+    bars = asyncio.Queue(maxsize=queue_size)
+    results = []
+    fetch = bind(fetch_ticker_data)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        async def fetcher():
+            while not pending.empty():
+                ticker = pending.get_nowait()
+                if deadline is not None and time.monotonic() >= deadline:
+                    await bars.put((ticker, None, None, "deadline"))
+                    continue
+                hist, info, status = await loop.run_in_executor(executor, fetch, ticker)
+                await bars.put((ticker, hist, info, status))   # blocks while the queue is full
+
+        async def builder():
+            last_report = time.monotonic()
+            finished = 0
+            while finished < workers:
+                item = await bars.get()
+                if item is _DONE:
+                    finished += 1
+                    continue
+                ticker, hist, info, status = item
+                row = build_row(ticker, hist, info) if status == "ok" else None
+                results.append((row, status if row or status != "ok" else "no_data"))
+                if on_progress and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    on_progress(results, len(tickers))
+                    last_report = time.monotonic()
+
+        async def fetch_then_finish():
+            try:
+                await fetcher()
+            finally:
+                await bars.put(_DONE)
+
+        await asyncio.gather(builder(), *(fetch_then_finish() for _ in range(workers)))
+    if on_progress:
+        on_progress(results, len(tickers))
+    return results
+
+
+def run_scan_pipeline(tickers, on_progress=None, workers=None, queue_size=QUEUE_SIZE, deadline=None):
+    """(row, status) per ticker, in completion order (like analyze_ticker's)."""
+    workers = max(1, min(workers or yahoo_guard.max_limit, len(tickers) or 1))
+    with span("scan.pipeline", tickers=len(tickers), workers=workers):
+        return asyncio.run(_pipeline(list(tickers), on_progress, workers, queue_size, deadline))
+
+
+def prefetch(fn, items, workers=8, deadline=None):
+    """Start fn(item) for every item at once; yield (item, result or exception) in order."""
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [(item, executor.submit(bind(fn), item)) for item in items]
+        for item, future in futures:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                yield item, future.result(timeout=timeout)
+            except Exception as e:   # includes TimeoutError past the deadline
+                yield item, e
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,51 @@
+# modules/scan_schema.py
+#
+# Canonical schema for scan results kept in session state ('top10') and shared
+# by Risk Allocation and the Profit Plan. Column names are plain ASCII so no
+# page has to re-normalize them, and dtypes are compact.
+
+import numpy as np
+import pandas as pd
+
+AI_SCORE = "AI Recommendation (0-10)"
+RISK_TIERS = ["Low", "Medium", "High"]
+
+SCAN_COLUMNS = {
+    "Ticker": "category",
+    "Company Name": "object",
+    "Previous Close ($)": "float32",
+    "Last Close ($)": "float32",
+    "Change (%)": "float32",
+    "Volume": "int64",
+    "Volatility (%)": "float32",
+    "Sector": "category",
+    "Score": "float32",
+    AI_SCORE: "int8",
+    "AI Score Label": "category",
+    "AI Summary": "object",
+    "AI Notes": "object",
+}
+
+
+def to_scan_frame(df):
+    """Select, order and cast scan columns; raises ValueError if any are missing."""
+    missing = [c for c in SCAN_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Scan results are missing columns: {', '.join(missing)}")
+    frame = df[list(SCAN_COLUMNS)].astype(SCAN_COLUMNS)
+    frame.attrs["scan_schema"] = True
+    return frame
+
+
+def is_scan_frame(df):
+    """Cheap check that `df` went through to_scan_frame (pages trust it afterwards)."""
+    return isinstance(df, pd.DataFrame) and df.attrs.get("scan_schema", False) and \
+        all(c in df.columns for c in SCAN_COLUMNS)
+
+
+def with_risk_tiers(df, tiers):
+    """`df` plus a categorical 'Risk Tier' column, sharing df's column data."""
+    tier = pd.Series(pd.Categorical(np.asarray(tiers), categories=RISK_TIERS), index=df.index, name="Risk Tier")
+    frame = df.copy(deep=False)  # new column index, same column arrays
+    frame["Risk Tier"] = tier
+    return frame
@@ -1,50 +1,99 @@
 # modules/scan_utils.py
 
-import pandas as pd
-import yfinance as yf
+import numpy as np
 import re
-import requests
-from io import StringIO
+from utils.perf import span
+from utils import market_cache, data_context
+from utils.market_data import get_provider
+from utils.upstream_guard import is_overload, is_rate_limit, CircuitOpenError
+
+SCORE_WEIGHTS = (0.4, 0.4, 0.2)  # |change|, volatility, volume (millions)
+MOVERS_MAX_AGE = 300              # seconds a cached mover list / bar set is fresh enough
+BARS_MAX_AGE = 600
+INFO_MAX_AGE = 6 * 3600           # name and sector rarely change intraday
+
+RELAX_BELOW = 20                  # run the relaxed second pass below this many matches
+RELAXED_VOLUME = 0.6              # second-pass multipliers
+RELAXED_VOLATILITY = 0.8
+
+# Shared by the live scan and the backtester; works on scalars, Series or arrays
+def compute_score(change, volatility, volume, weights=SCORE_WEIGHTS):
+    w_change, w_volatility, w_volume = weights
+    return (
+        np.abs(change) * w_change +
+        volatility * w_volatility +
+        (volume / 1_000_000) * w_volume
+    )
+
+def passes_filters(price, volume, volatility, price_range, min_volume, min_volatility):
+    return (
+        (price_range[0] <= price) & (price <= price_range[1]) &
+        (volume >= min_volume) &
+        (volatility >= min_volatility)
+    )
+
+def classify_risk_tier(volatility, ai_score):
+    volatility = np.asarray(volatility, dtype=float)
+    ai_score = np.asarray(ai_score, dtype=float)
+    return np.select(
+        [
+            (volatility < 2.0) & (ai_score >= 7),
+            (2.0 <= volatility) & (volatility < 3.5) & (5 <= ai_score) & (ai_score < 7),
+        ],
+        ["Low", "Medium"],
+        default="High"
+    )
 
 def fetch_movers():
-    def get_yahoo_table(url, slices=2):
-        try:
-            r = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-            r.raise_for_status()
-            tables = pd.read_html(StringIO(r.text))
-            df = pd.concat(tables[:slices]) if slices <= len(tables) else tables[0]
-            return df
-        except:
-            return pd.DataFrame()
-
-    all_sources = [
-        "https://finance.yahoo.com/gainers",
-        "https://finance.yahoo.com/losers",
-        "https://finance.yahoo.com/most-active",
-        "https://finance.yahoo.com/screener/pre-market",
-        "https://finance.yahoo.com/screener/new-highs"
-    ]
-
-    all_symbols = []
-    for url in all_sources:
-        table = get_yahoo_table(url, slices=3)
-        if not table.empty and "Symbol" in table.columns:
-            all_symbols.extend(table["Symbol"].tolist())
-
-    tickers = list(set(s for s in all_symbols if isinstance(s, str) and s.isupper() and 1 <= len(s) <= 6))
-    return tickers
+    with span("fetch_movers"):
+        return get_provider().movers()
 
-def analyze_stock(ticker):
+# Cached readers: serve whatever the prefetch scheduler (or an earlier rerun)
+# stored if it is fresh enough, otherwise fetch and store it.
+def get_movers(max_age=MOVERS_MAX_AGE):
+    return market_cache.get_or_fetch(("movers",), lambda: fetch_movers() or None, max_age) or []
+
+# Raw fetches go to the configured provider (utils.market_data); the yfinance
+# provider routes every call through yahoo_guard (adaptive concurrency + breaker)
+def fetch_history(ticker, period="5d", interval="1h"):
+    return get_provider().history(ticker, period, interval)
+
+def get_history(ticker, period="5d", interval="1h", max_age=BARS_MAX_AGE):
+    return market_cache.get_or_fetch(
+        ("history", ticker, period, interval),
+        lambda: fetch_history(ticker, period, interval),
+        max_age
+    )
+
+def fetch_info(ticker):
+    return get_provider().info(ticker)
+
+def get_info(ticker, max_age=INFO_MAX_AGE):
+    return market_cache.get_or_fetch(("info", ticker), lambda: fetch_info(ticker), max_age)
+
+def fetch_ticker_data(ticker):
+    """(hist, info, status): status is "ok", "no_data" or, when the ticker was
+    skipped because of upstream trouble, "rate_limited" / "circuit_open" / "error"."""
+    data = data_context.current()
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d", interval="1h")
+        hist = data.history(ticker, "5d", "1h")
         if len(hist) < 2:
-            return None
+            return None, None, "no_data"
+        return hist, data.info(ticker), "ok"
+    except CircuitOpenError:
+        return None, None, "circuit_open"
+    except Exception as e:
+        if is_overload(e):
+            return None, None, "rate_limited" if is_rate_limit(e) else "error"
+        return None, None, "no_data"
+
+def build_row(ticker, hist, info):
+    """Scan row from 5d/1h bars and metadata; None if the bars are unusable."""
+    try:
         last_close = hist['Close'].iloc[-1]
         prev_close = hist['Close'].iloc[-2]
         volume = hist['Volume'].iloc[-1]
         volatility = ((hist['High'] - hist['Low']) / hist['Close']).mean() * 100
-        info = stock.info
         return {
             "Ticker": ticker,
             "Company Name": re.sub(r'<.*?>', '', info.get('shortName', 'N/A')),
@@ -55,5 +104,16 @@ def analyze_stock(ticker):
             "Volatility (%)": round(volatility, 2),
             "Sector": info.get('sector', 'N/A')
         }
-    except:
+    except Exception:
         return None
+
+def analyze_ticker(ticker):
+    """(row, status) with the statuses of fetch_ticker_data."""
+    hist, info, status = fetch_ticker_data(ticker)
+    if status != "ok":
+        return None, status
+    row = build_row(ticker, hist, info)
+    return (row, "ok") if row else (None, "no_data")
+
+def analyze_stock(ticker):
+    return analyze_ticker(ticker)[0]
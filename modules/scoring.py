@@ -0,0 +1,96 @@
+# modules/scoring.py
+#
+# Cross-sectional Score for the live scan. Each feature (|change|, volatility,
+# log volume) is normalized across the scanned universe before weighting, so no
+# single mega-volume ticker dominates and every Score lands on the same 0-10
+# scale from one run to the next:
+#
+#   zscore - robust z-score (median / MAD), clipped to +-3 and mapped to 0-1
+#            (default; O(n), NumPy finds medians by partition)
+#   rank   - percentile rank of each feature (sorts: O(n log n))
+#   raw    - scan_utils.compute_score on the raw values
+#
+# SCORE_METHOD and SCORE_WEIGHTS="change,volatility,volume" configure it. The
+# backtester and parameter sweep score each replayed day's candidates with the
+# same method (normalize along axis=0 of a tickers x days array).
+#
+# The scale is relative: a Score says where a ticker stands in that run's
+# universe (the leader of every run sits near 10), not how strong its setup is
+# in absolute terms. Compare Scores across runs as ranks, not levels.
+#
+# With the default, scoring is O(n) and top_k_indices selects the best k with
+# argpartition: O(n) plus a sort of k.
+
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from modules.scan_utils import compute_score, SCORE_WEIGHTS
+
+METHODS = ("zscore", "rank", "raw")
+Z_CLIP = 3.0
+
+
+def default_method():
+    method = os.getenv("SCORE_METHOD", "zscore").lower()
+    if method not in METHODS:
+        raise ValueError(f"Unknown SCORE_METHOD '{method}' (choose from {', '.join(METHODS)})")
+    return method
+
+
+def default_weights():
+    override = os.getenv("SCORE_WEIGHTS")
+    return tuple(float(w) for w in override.split(",")) if override else SCORE_WEIGHTS
+
+
+def normalize(values, method="rank", axis=None):
+    """Map one feature to [0, 1] across the universe (NaN stays NaN).
+
+    With `axis`, every slice along it is its own universe, e.g. axis=0 on a
+    (tickers x days) array normalizes each day's cross-section.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if method == "rank":
+        if axis is None:
+            return pd.Series(values.ravel()).rank(pct=True).to_numpy().reshape(values.shape)
+        return pd.DataFrame(values).rank(pct=True, axis=axis).to_numpy()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)   # all-NaN slices
+        median = np.nanmedian(values, axis=axis, keepdims=True)
+        mad = np.nanmedian(np.abs(values - median), axis=axis, keepdims=True) * 1.4826
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(mad > 0, (values - median) / mad, 0.0)
+    return (np.clip(z, -Z_CLIP, Z_CLIP) + Z_CLIP) / (2 * Z_CLIP)
+
+
+def normalized_score(change, volatility, volume, weights=None, method=None, axis=None):
+    """Weighted 0-10 Score per ticker; 'raw' falls back to compute_score."""
+    weights = weights or default_weights()
+    method = method or default_method()
+    if method == "raw":
+        return compute_score(*(np.asarray(x, dtype=np.float64) for x in (change, volatility, volume)), weights)
+    features = (
+        np.abs(np.asarray(change, dtype=np.float64)),
+        np.asarray(volatility, dtype=np.float64),
+        np.log1p(np.maximum(np.asarray(volume, dtype=np.float64), 0)),
+    )
+    total = sum(weights) or 1.0
+    return 10 * sum(w * normalize(f, method, axis) for w, f in zip(weights, features)) / total
+
+
+def score_frame(df, weights=None, method=None):
+    return normalized_score(df["Change (%)"], df["Volatility (%)"], df["Volume"], weights, method)
+
+
+def top_k_indices(scores, k):
+    """Positions of the k highest scores, best first (NaN last)."""
+    scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=int)
+    part = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def top_k(df, k, column="Score"):
+    return df.iloc[top_k_indices(df[column].to_numpy(), k)]
@@ -0,0 +1,118 @@
+# modules/sector_rollup.py
+#
+# Sector rotation from data the scan already has: per sector, the
+# volume-weighted change, breadth (advancers minus decliners over names) and
+# average volatility, computed with one groupby over the scan feature frame.
+#
+# Each scan's rollup is cached in market_cache under its Scan ID. scan_market
+# stores it right after saving the snapshot; the intraday view rolls up only
+# the snapshots not cached yet, all of them in one read and one groupby.
+# Snapshots never change, so cached rollups never expire.
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from modules import snapshot_store
+from utils.perf import span
+from utils import market_cache
+
+INPUT_COLUMNS = ["Scan ID", "Sector", "Change (%)", "Volume", "Volatility (%)"]
+ROLLUP_COLUMNS = ["Sector", "Tickers", "VW Change (%)", "Breadth", "Advancers", "Decliners",
+                  "Volatility (%)", "Volume"]
+
+
+def sector_rollup(df, keys=()):
+    """One row per sector (per `keys` + sector, e.g. keys=["Scan ID"]) with the rollup columns."""
+    keys = list(keys)
+    change = df["Change (%)"].to_numpy(dtype=np.float64)
+    volume = df["Volume"].to_numpy(dtype=np.float64)
+    frame = pd.DataFrame({
+        **{key: df[key].to_numpy() for key in keys},
+        "Sector": df["Sector"].astype(object).fillna("N/A").to_numpy(),
+        "Tickers": 1,
+        "Weighted": change * volume,
+        "Volume": volume,
+        "Advancers": change > 0,
+        "Decliners": change < 0,
+        "Volatility (%)": df["Volatility (%)"].to_numpy(dtype=np.float64),
+    })
+    rollup = frame.groupby(keys + ["Sector"], sort=False).agg(
+        Tickers=("Tickers", "sum"), Weighted=("Weighted", "sum"), Volume=("Volume", "sum"),
+        Advancers=("Advancers", "sum"), Decliners=("Decliners", "sum"),
+        **{"Volatility (%)": ("Volatility (%)", "mean")},
+    ).reset_index()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rollup["VW Change (%)"] = rollup["Weighted"] / rollup["Volume"]
+    rollup["Breadth"] = (rollup["Advancers"] - rollup["Decliners"]) / rollup["Tickers"]
+    return rollup[keys + ROLLUP_COLUMNS].sort_values(keys + ["VW Change (%)"], ascending=False, ignore_index=True)
+
+
+def cache_rollup(scan_id, df):
+    """Roll up a scan that was just saved, so the heatmap never re-reads it."""
+    rollup = sector_rollup(df)
+    market_cache.put(("sector_rollup", scan_id), rollup)
+    return rollup
+
+
+def intraday_rollups(date, root=None):
+    """Rollups of every scan on `date`, long format with Scan ID and Scanned At."""
+    scans = snapshot_store.list_scans(date, root)
+    if scans.empty:
+        return pd.DataFrame(columns=["Scan ID", "Scanned At"] + ROLLUP_COLUMNS)
+    cached = {scan_id: market_cache.get(("sector_rollup", scan_id)) for scan_id in scans["Scan ID"]}
+    missing = [scan_id for scan_id, rollup in cached.items() if rollup is None]
+    if missing:
+        with span("sector.rollup", scans=len(missing)):
+            rows = snapshot_store.load_columns(INPUT_COLUMNS, missing, date, root)
+            for scan_id, rollup in sector_rollup(rows, keys=["Scan ID"]).groupby("Scan ID", sort=False):
+                cached[scan_id] = rollup.drop(columns="Scan ID").reset_index(drop=True)
+                market_cache.put(("sector_rollup", scan_id), cached[scan_id])
+    scanned_at = dict(zip(scans["Scan ID"], scans["Scanned At"]))
+    parts = [rollup.assign(**{"Scan ID": scan_id, "Scanned At": scanned_at[scan_id]})
+             for scan_id, rollup in cached.items() if rollup is not None]
+    return pd.concat(parts, ignore_index=True)[["Scan ID", "Scanned At"] + ROLLUP_COLUMNS]
+
+
+def _eastern(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts).tz_convert(snapshot_store.EASTERN)
+
+
+def heatmap(rollups, value="VW Change (%)"):
+    grid = rollups.pivot_table(index="Sector", columns="Scanned At", values=value, observed=True)
+    grid = grid.loc[grid.iloc[:, -1].sort_values(ascending=False).index]
+    times = [_eastern(t).strftime("%H:%M") for t in grid.columns]
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(), x=times, y=grid.index.tolist(), colorscale="RdYlGn", zmid=0,
+        colorbar=dict(title=value), hovertemplate="%{y} @ %{x}: %{z:.2f}<extra></extra>",
+    ))
+    fig.update_layout(margin=dict(l=0, r=0, t=10, b=0), height=max(300, 28 * len(grid)),
+                      template="plotly_white", xaxis_title="Scan time (ET)")
+    return fig
+
+
+def show_sector_heatmap():
+    st.title("🧭 Sector Rotation")
+
+    dates = snapshot_store.trading_dates()
+    if not dates:
+        st.warning("⚠️ No scan snapshots yet. Run Scan Market first.")
+        return
+    date = st.selectbox("Trading date", dates[::-1], key="sector_date")
+    value = st.radio("Color by", ["VW Change (%)", "Breadth", "Volatility (%)"], horizontal=True, key="sector_value")
+
+    rollups = intraday_rollups(date)
+    if rollups.empty:
+        st.warning("⚠️ No scans on this date.")
+        return
+
+    scans = rollups["Scan ID"].nunique()
+    st.caption(f"{scans} scans · {rollups['Sector'].nunique()} sectors · from saved scan results, no extra fetching")
+    st.plotly_chart(heatmap(rollups, value), use_container_width=True)
+
+    latest = rollups[rollups["Scan ID"] == rollups["Scan ID"].iloc[-1]].drop(columns=["Scan ID", "Scanned At"])
+    st.subheader("Latest scan by sector")
+    st.dataframe(latest.style.format({"VW Change (%)": "{:.2f}", "Breadth": "{:+.2f}",
+                                      "Volatility (%)": "{:.2f}", "Volume": "{:,.0f}"}),
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,134 @@
+# modules/sharded_scan.py
+#
+# Sharded execution mode for large scans. Threads do the network I/O (hourly
+# bars and name/sector info through the shared cache); the bars are packed into
+# one (fields x tickers x bars) array in shared memory, and a process pool
+# computes analyze_ticker's features on ticker shards, so the
+# math runs outside the Streamlit process's GIL and nothing large is pickled.
+#
+# Scans of MIN_SHARDED+ tickers use this path. SCAN_WORKERS sets the number of
+# processes; with 1 the vectorized features run in-process, which is already
+# far cheaper than per-ticker pandas (see benchmarks/sharded_scan.py), so the
+# pool only pays off once shards are large or the host has idle cores.
+
+import concurrent.futures
+import os
+import re
+import time
+import warnings
+import numpy as np
+from multiprocessing import shared_memory
+from modules.scan_utils import fetch_ticker_data
+from utils.perf import span, bind
+from utils.upstream_guard import yahoo_guard
+
+BAR_FIELDS = ("High", "Low", "Close", "Volume")
+MAX_BARS = 40           # 5 sessions of hourly bars plus extended-hours slack
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "1"))
+MIN_SHARDED = 200       # smaller scans keep the per-ticker threaded path
+
+
+def pack_bars(frames, max_bars=MAX_BARS):
+    """Right-aligned (fields x tickers x bars) float64 array; missing bars are NaN."""
+    bars = np.full((len(BAR_FIELDS), len(frames), max_bars), np.nan)
+    for i, hist in enumerate(frames):
+        if hist is None or len(hist) == 0:
+            continue
+        n = min(len(hist), max_bars)
+        for k, field in enumerate(BAR_FIELDS):
+            bars[k, i, max_bars - n:] = hist[field].to_numpy()[-n:]
+    return bars
+
+
+def compute_features(bars):
+    """analyze_ticker's numbers for every ticker at once (NaN where < 2 bars)."""
+    high, low, close, volume = bars
+    last_close = close[:, -1]
+    prev_close = close[:, -2]
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # tickers without bars
+        volatility = np.nanmean((high - low) / close, axis=1) * 100
+        features = {
+            "Previous Close ($)": np.round(prev_close, 2),
+            "Last Close ($)": np.round(last_close, 2),
+            "Change (%)": np.round((last_close - prev_close) / prev_close * 100, 2),
+            "Volume": volume[:, -1],
+            "Volatility (%)": np.round(volatility, 2),
+        }
+    features["valid"] = np.isfinite(features["Change (%)"]) & np.isfinite(features["Volume"])
+    return features
+
+
+# --- Shared-memory bars and pool workers ---
+
+def share_bars(bars):
+    shm = shared_memory.SharedMemory(create=True, size=max(bars.nbytes, 1))
+    np.ndarray(bars.shape, dtype=bars.dtype, buffer=shm.buf)[:] = bars
+    return shm, (shm.name, bars.shape, bars.dtype.str)
+
+
+_worker = {}
+
+
+def _init_worker(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    _worker.update(shm=shm, bars=np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf))
+
+
+def _shard_features(bounds):
+    start, stop = bounds
+    return start, compute_features(_worker["bars"][:, start:stop])
+
+
+def sharded_features(bars, workers=SCAN_WORKERS, shards=None):
+    """compute_features over ticker shards in a process pool (in-process when workers <= 1)."""
+    n = bars.shape[1]
+    if workers <= 1 or n == 0:
+        return compute_features(bars)
+    shards = shards or workers * 4
+    edges = np.linspace(0, n, min(shards, n) + 1).astype(int)
+    shm, spec = share_bars(bars)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(spec,)
+        ) as executor:
+            parts = sorted(executor.map(_shard_features, zip(edges[:-1], edges[1:])), key=lambda p: p[0])
+    finally:
+        shm.close()
+        shm.unlink()
+    return {key: np.concatenate([part[key] for _, part in parts]) for key in parts[0][1]}
+
+
+def _fetch_before(deadline):
+    def fetch(ticker):
+        if deadline is not None and time.monotonic() >= deadline:
+            return None, None, "deadline"
+        return fetch_ticker_data(ticker)
+    return fetch
+
+
+def analyze_tickers_sharded(tickers, workers=SCAN_WORKERS, deadline=None):
+    """Same (row, status) pairs as mapping analyze_ticker over `tickers`; tickers
+    not fetched by `deadline` (time.monotonic()) get status "deadline"."""
+    with span("scan.fetch", tickers=len(tickers)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=yahoo_guard.max_limit) as executor:
+        fetched = list(executor.map(bind(_fetch_before(deadline)), tickers))
+
+    with span("scan.pack", tickers=len(tickers)):
+        bars = pack_bars([hist for hist, _, _ in fetched])
+    with span("scan.features", tickers=len(tickers), workers=workers):
+        features = sharded_features(bars, workers)
+
+    columns = [c for c in features if c != "valid"]
+    results = []
+    for i, (ticker, (_, info, status)) in enumerate(zip(tickers, fetched)):
+        if status != "ok" or not features["valid"][i]:
+            results.append((None, status if status != "ok" else "no_data"))
+            continue
+        row = {"Ticker": ticker, "Company Name": re.sub(r'<.*?>', '', info.get('shortName', 'N/A'))}
+        row.update({c: features[c][i].item() for c in columns})
+        row["Volume"] = int(row["Volume"])
+        row["Sector"] = info.get('sector', 'N/A')
+        results.append((row, "ok"))
+    return results
@@ -0,0 +1,170 @@
+# modules/snapshot_store.py
+#
+# Append-only Parquet history of scan results, partitioned by trading date:
+#
+#   <SNAPSHOT_DIR>/date=2026-10-19/scan-143105-123456.parquet
+#
+# Each file is one scan (every candidate that passed the filters, with its
+# features, Score, rank and AI fields). Queries read only the partitions and
+# columns they need through pyarrow.dataset.
+#
+# The scan page reruns on every widget change over the same cached data, so
+# save_snapshot(skip_unchanged=True) drops a scan whose rows match the last one
+# this process wrote; a new snapshot means the data or the filters changed.
+
+import datetime
+import hashlib
+import os
+import io
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytz
+from modules.scan_schema import to_scan_frame
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+EASTERN = pytz.timezone("US/Eastern")
+FINGERPRINT_COLUMNS = ["Ticker", "Last Close ($)", "Volume", "Change (%)", "Volatility (%)", "Score",
+                       "AI Recommendation (0-10)"]
+
+_last_saved = {}   # root -> fingerprint of the last scan written by this process
+_save_lock = threading.Lock()
+
+
+def fingerprint(df):
+    """Content hash of a scan's rows, independent of row order."""
+    columns = [c for c in FINGERPRINT_COLUMNS if c in df.columns]
+    rows = df[columns].sort_values("Ticker", kind="stable")
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def save_snapshot(df, scanned_at=None, root=None, skip_unchanged=False):
+    """Write one scan (already scored, any order) and return its scan_id.
+
+    With skip_unchanged, a scan identical to the last one saved is not written
+    and None is returned.
+    """
+    root = root or SNAPSHOT_DIR
+    if not skip_unchanged:
+        return _write(df, scanned_at, root)
+    digest = fingerprint(df)
+    with _save_lock:
+        if _last_saved.get(root) == digest:
+            return None
+        scan_id = _write(df, scanned_at, root)
+        _last_saved[root] = digest
+    return scan_id
+
+
+def _write(df, scanned_at, root):
+    scanned_at = (scanned_at or datetime.datetime.now(pytz.utc)).astimezone(pytz.utc)
+    local = scanned_at.astimezone(EASTERN)
+    scan_id = local.strftime("%Y%m%d-%H%M%S-%f")
+
+    frame = to_scan_frame(df).sort_values("Score", ascending=False).reset_index(drop=True)
+    frame.insert(0, "Rank", pd.Series(range(1, len(frame) + 1), dtype="int16"))
+    frame.insert(0, "Scanned At", pd.Timestamp(scanned_at))
+    frame.insert(0, "Scan ID", scan_id)
+
+    partition = os.path.join(root, f"date={local.date().isoformat()}")
+    os.makedirs(partition, exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_table(table, os.path.join(partition, f"scan-{local.strftime('%H%M%S-%f')}.parquet"))
+    return scan_id
+
+
+def _dataset(root=None):
+    root = root or SNAPSHOT_DIR
+    if not os.path.isdir(root):
+        return None
+    return ds.dataset(root, format="parquet", partitioning="hive")
+
+
+def _read(columns=None, date=None, ticker=None, root=None, scan_ids=None):
+    dataset = _dataset(root)
+    if dataset is None:
+        return pd.DataFrame(columns=columns)
+    expr = None
+    if date is not None:
+        expr = ds.field("date") == str(date)
+    if ticker is not None:
+        match = ds.field("Ticker") == ticker
+        expr = match if expr is None else expr & match
+    if scan_ids is not None:
+        match = ds.field("Scan ID").isin(list(scan_ids))
+        expr = match if expr is None else expr & match
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+
+def load_columns(columns, scan_ids, date=None, root=None):
+    """`columns` of the given scans in one read (optionally within one date partition)."""
+    return _read(columns, date=date, root=root, scan_ids=scan_ids)
+
+
+def trading_dates(root=None):
+    root = root or SNAPSHOT_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(name.split("=", 1)[1] for name in os.listdir(root) if name.startswith("date="))
+
+
+def list_scans(date=None, root=None):
+    """One row per scan: Scan ID, Scanned At, candidate count (oldest first)."""
+    scans = _read(["Scan ID", "Scanned At"], date=date, root=root)
+    if scans.empty:
+        return pd.DataFrame(columns=["Scan ID", "Scanned At", "Candidates"])
+    return (scans.groupby(["Scan ID", "Scanned At"], observed=True).size()
+            .rename("Candidates").reset_index().sort_values("Scanned At", ignore_index=True))
+
+
+def load_scan(scan_id, root=None):
+    date = datetime.datetime.strptime(scan_id[:8], "%Y%m%d").date().isoformat()
+    dataset = _dataset(root)
+    if dataset is None:
+        return pd.DataFrame()
+    expr = (ds.field("date") == date) & (ds.field("Scan ID") == scan_id)
+    return dataset.to_table(filter=expr).to_pandas().sort_values("Rank", ignore_index=True)
+
+
+def new_since_previous(root=None):
+    """Tickers in the latest scan that were not in the scan before it."""
+    dates = trading_dates(root)
+    scans = pd.concat([list_scans(d, root) for d in dates[-2:]], ignore_index=True) if dates else pd.DataFrame()
+    if len(scans) < 2:
+        return pd.DataFrame()
+    latest, previous = load_scan(scans["Scan ID"].iloc[-1], root), load_scan(scans["Scan ID"].iloc[-2], root)
+    fresh = ~latest["Ticker"].astype(str).isin(set(previous["Ticker"].astype(str)))
+    return latest[fresh].reset_index(drop=True)
+
+
+def score_trend(ticker, date=None, root=None):
+    """Score, rank and AI score of `ticker` across the scans of one trading date (default: latest).
+
+    Scores are normalized within each scan (modules.scoring), so the trend shows
+    the ticker's standing among that scan's candidates, not an absolute level.
+    """
+    dates = trading_dates(root)
+    date = date or (dates[-1] if dates else None)
+    if date is None:
+        return pd.DataFrame()
+    columns = ["Scanned At", "Rank", "Score", "Last Close ($)", "Change (%)", "AI Recommendation (0-10)"]
+    return _read(columns, date=date, ticker=ticker, root=root).sort_values("Scanned At", ignore_index=True)
+
+
+def top_n(date=None, n=30, root=None):
+    """Top `n` of the last scan on `date` (default: the trading date before the latest)."""
+    dates = trading_dates(root)
+    if date is None:
+        date = dates[-2] if len(dates) >= 2 else None
+    scans = list_scans(date, root) if date else pd.DataFrame()
+    if scans.empty:
+        return pd.DataFrame()
+    return load_scan(scans["Scan ID"].iloc[-1], root).head(n)
+
+
+def to_parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
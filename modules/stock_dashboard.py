@@ -1,21 +1,24 @@
 # modules/stock_dashboard.py
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
-import requests
+from utils import http_client
+import concurrent.futures
+import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime
+from utils.perf import span, bind
+from modules.scan_utils import get_info
+from utils import data_context
 from utils.openai_helper import get_stock_summary, get_risk_assessment, get_momentum_analysis, get_sentiment_analysis
 import os
-from textblob import TextBlob  # Ensure TextBlob is imported for sentiment analysis
 
 USE_OPENAI = os.getenv("USE_OPENAI", "false").lower() == "true"
 
 # Ensure the get_analyst_ratings function is defined here
-def get_analyst_ratings(ticker):
-    stock = yf.Ticker(ticker)
+def get_analyst_ratings(ticker, info=None):
     try:
-        info = stock.info
+        if info is None:
+            info = get_info(ticker)
         recommendation = info.get('recommendationKey', 'N/A').capitalize()
         number_of_analyst_opinions = info.get('numberOfAnalystOpinions', 'N/A')
         target_mean_price = info.get('targetMeanPrice', 'N/A')
@@ -38,14 +41,13 @@ def get_analyst_ratings(ticker):
             'High Target Price': 'N/A'
         }
 
-# Web scraping function for stock-specific news
-def scrape_stock_news(ticker):
+# Web scraping functions for stock-specific news
+def fetch_yahoo_news(ticker):
     articles = []
-    
-    # Fetch from Yahoo Finance
     try:
         url = f'https://finance.yahoo.com/quote/{ticker}/news?p={ticker}'
-        response = requests.get(url)
+        with span("http.yahoo_news", net=True, ticker=ticker):
+            response = http_client.get(url)
         soup = BeautifulSoup(response.content, 'html.parser')
 
         for item in soup.find_all('h3'):
@@ -54,12 +56,15 @@ def scrape_stock_news(ticker):
             articles.append({'title': title, 'link': f'https://finance.yahoo.com{link}'})
     except Exception as e:
         print(f"Error fetching Yahoo Finance news: {e}")
-    
-    # Fetch from Google News
+    return articles
+
+def fetch_google_news(ticker):
+    articles = []
     try:
         query = f"{ticker} stock"
         url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}+when:7d&hl=en-US&gl=US&ceid=US:en"
-        response = requests.get(url)
+        with span("http.google_news", net=True, ticker=ticker):
+            response = http_client.get(url)
         soup = BeautifulSoup(response.content, features="xml")
         items = soup.find_all("item")
         for item in items[:3]:  # Limit to 3 articles
@@ -68,11 +73,14 @@ def scrape_stock_news(ticker):
             articles.append({'title': title, 'link': link})
     except Exception as e:
         print(f"Error fetching Google News: {e}")
-    
-    # Fetch from Bloomberg
+    return articles
+
+def fetch_bloomberg_news(ticker):
+    articles = []
     try:
         url = f"https://www.bloomberg.com/search?query={ticker}"
-        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+        with span("http.bloomberg_news", net=True, ticker=ticker):
+            res = http_client.get(url)
         soup = BeautifulSoup(res.text, "html.parser")
         articles_bloomberg = soup.select("article a")[:3]  # Limit to 3 articles
         for art in articles_bloomberg:
@@ -81,11 +89,18 @@ def scrape_stock_news(ticker):
             articles.append({'title': title, 'link': link})
     except Exception as e:
         print(f"Error fetching Bloomberg news: {e}")
-    
     return articles
 
+NEWS_SOURCES = [fetch_yahoo_news, fetch_google_news, fetch_bloomberg_news]
+
+def scrape_stock_news(ticker):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(NEWS_SOURCES)) as executor:
+        results = list(executor.map(bind(lambda source: source(ticker)), NEWS_SOURCES))
+    return [article for articles in results for article in articles]
+
 # Sentiment analysis function
 def analyze_sentiment(articles):
+    from textblob import TextBlob  # Imported on first use to keep page imports light
     sentiments = []
     for article in articles:
         text = article['title']
@@ -100,8 +115,9 @@ def analyze_sentiment(articles):
     return sentiments
 
 # Function to get market sentiment for a specific stock
-def get_stock_sentiment(ticker):
-    articles = scrape_stock_news(ticker)
+def get_stock_sentiment(ticker, articles=None):
+    if articles is None:
+        articles = scrape_stock_news(ticker)
     sentiments = analyze_sentiment(articles)
 
     bullish_count = sum(1 for sentiment in sentiments if sentiment['sentiment'] == 'Bullish')
@@ -127,15 +143,57 @@ def get_stock_sentiment(ticker):
 
     return sentiment_score, trend_label, sentiments, key_drivers
 
-def display_stock_dashboard(ticker):  # Ensure ticker is passed as a parameter
+def _fetch_history(ticker):
+    try:
+        return data_context.current().history(ticker, "30d", "1h")
+    except Exception as e:
+        print(f"Error fetching history for {ticker}: {e}")
+        return pd.DataFrame()
+
+def _fetch_info(ticker):
+    try:
+        return data_context.current().info(ticker)
+    except Exception as e:
+        print(f"Error fetching info for {ticker}: {e}")
+        return {}
+
+# Fetch every dashboard input for all tickers concurrently: one history, one
+# .info and each news source per ticker, so a page costs its slowest request.
+def fetch_dashboard_bundle(tickers, max_workers=None):
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    jobs = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or min(64, len(tickers) * (2 + len(NEWS_SOURCES)))) as executor:
+        for ticker in tickers:
+            jobs[ticker] = {
+                "hist": executor.submit(bind(_fetch_history), ticker),
+                "info": executor.submit(bind(_fetch_info), ticker),
+                "news": [executor.submit(bind(source), ticker) for source in NEWS_SOURCES],
+            }
+
+    return {
+        ticker: {
+            "hist": job["hist"].result(),
+            "info": job["info"].result(),
+            "articles": [article for future in job["news"] for article in future.result()],
+        }
+        for ticker, job in jobs.items()
+    }
+
+def display_stock_dashboard(ticker, data=None):  # Ensure ticker is passed as a parameter
     st.markdown(f"## 📊 {ticker.upper()} Stock Dashboard (NYSE: {ticker.upper()})")
 
-    stock = yf.Ticker(ticker)
-    hist = stock.history(period="30d", interval="1h")
-    info = stock.info
+    if data is None:
+        data = fetch_dashboard_bundle([ticker])[ticker]
+    hist = data["hist"]
+    info = data["info"]
+    if hist.empty and not info:
+        st.warning(f"⚠️ No market data available for {ticker}.")
+        return
 
     # Stock Overview
-    price = info.get('currentPrice') or hist['Close'].iloc[-1]
+    price = info.get('currentPrice') or (hist['Close'].iloc[-1] if not hist.empty else 'N/A')
     change = info.get('regularMarketChange', 0)
     pct_change = info.get('regularMarketChangePercent', 0)
     after_hours = info.get('postMarketPrice', 'N/A')
@@ -155,24 +213,27 @@ def display_stock_dashboard(ticker):  # Ensure ticker is passed as a parameter
     **Last Updated**: {updated}
     """)
 
-    # Chart
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=hist.index, y=hist['Close'], mode='lines', name='Close Price'))
-    fig.update_layout(
-        title=f"{ticker.upper()} Price Trend",
-        xaxis_title="Date",
-        yaxis_title="Price ($)",
-        hovermode="x unified",
-        template="plotly_white",
-        height=400,
-        margin=dict(l=40, r=40, t=60, b=40),
-        xaxis_rangeslider_visible=True
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    # Chart (failed bar fetches come back as an empty frame)
+    if hist.empty:
+        st.info(f"No price history available for {ticker.upper()}.")
+    else:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=hist.index, y=hist['Close'], mode='lines', name='Close Price'))
+        fig.update_layout(
+            title=f"{ticker.upper()} Price Trend",
+            xaxis_title="Date",
+            yaxis_title="Price ($)",
+            hovermode="x unified",
+            template="plotly_white",
+            height=400,
+            margin=dict(l=40, r=40, t=60, b=40),
+            xaxis_rangeslider_visible=True
+        )
+        st.plotly_chart(fig, use_container_width=True)
 
     # Analyst Ratings
     st.markdown("### 🧠 Analyst Ratings")
-    ratings = get_analyst_ratings(ticker)
+    ratings = get_analyst_ratings(ticker, info)
     st.markdown(f"- **Consensus**: {ratings['Consensus']}")
     st.markdown(f"- **Number of Analyst Opinions**: {ratings['Number of Analyst Opinions']}")
     st.markdown(f"- **Average Target Price**: ${ratings['Average Target Price']}")
@@ -180,7 +241,7 @@ def display_stock_dashboard(ticker):  # Ensure ticker is passed as a parameter
 
     # Stock Sentiment
     st.markdown("### 🗝 Stock Sentiment Summary")
-    sentiment_score, trend_label, sentiments, key_drivers = get_stock_sentiment(ticker)
+    sentiment_score, trend_label, sentiments, key_drivers = get_stock_sentiment(ticker, data["articles"])
     st.write(f"**Sentiment Score**: {sentiment_score} ({trend_label})")  # Corrected line
     st.write(f"**Key drivers of sentiment**:")
     for driver in key_drivers:
@@ -2,7 +2,7 @@
 import streamlit as st
 import yfinance as yf
 import plotly.graph_objects as go
-import requests
+from utils import http_client
 from bs4 import BeautifulSoup
 from datetime import datetime
 from utils.openai_helper import get_stock_summary, get_risk_assessment, get_momentum_analysis, get_sentiment_analysis
@@ -37,7 +37,7 @@ def get_analyst_ratings(ticker):
 
 def get_sentiment_summary(ticker):
     try:
-        response = requests.get(f'https://api.swaggystocks.com/api/v1/sentiment/{ticker}')
+        response = http_client.get(f'https://api.swaggystocks.com/api/v1/sentiment/{ticker}')
         data = response.json()
         sentiment_score = data.get('sentiment_score', 'N/A')
         sentiment_trend = data.get('sentiment_trend', 'N/A')
@@ -59,7 +59,7 @@ def fetch_news_headlines(ticker):
         # Google News RSS
         query = ticker + " stock"
         url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}+when:7d&hl=en-US&gl=US&ceid=US:en"
-        response = requests.get(url)
+        response = http_client.get(url)
         soup = BeautifulSoup(response.content, features="xml")
         items = soup.find_all("item")
         headlines += [(item.title.text, item.link.text) for item in items[:3]]
@@ -69,7 +69,7 @@ def fetch_news_headlines(ticker):
     try:
         # Bloomberg Fallback
         url = f"https://www.bloomberg.com/search?query={ticker}"
-        res = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+        res = http_client.get(url)
         soup = BeautifulSoup(res.text, "html.parser")
         articles = soup.select("article a")[:3]
         for art in articles:
@@ -0,0 +1,242 @@
+# modules/universe_scan.py
+#
+# Two-stage scan over every listed US equity instead of the Yahoo mover pages.
+#
+#   Stage 1: batched download of ~1 month of daily bars for the whole symbol
+#            file, reduced to last close, average volume and ATR% per ticker and
+#            screened with the (relaxed) scan filters. Cheap: ~16 requests for 8k
+#            symbols, cached for DAILY_MAX_AGE so slider changes don't refetch.
+#   Stage 2: the caller runs analyze_ticker (hourly features) on the survivors.
+#
+# The symbol list is a local file so the scan works without the listing service.
+# It accepts NASDAQ Trader symbol-directory files (nasdaqlisted.txt /
+# otherlisted.txt, pipe-delimited, concatenated is fine) or one ticker per line.
+# Refresh it with: python -m modules.universe_scan --refresh [PATH]
+
+import argparse
+import concurrent.futures
+import os
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from modules.scan_utils import RELAXED_VOLUME, RELAXED_VOLATILITY
+from modules.scoring import normalized_score, top_k_indices
+from utils.perf import span, count, bind
+from utils import market_cache, http_client
+from utils.market_data import get_provider
+
+SYMBOL_FILE = os.getenv("SYMBOL_FILE", os.path.join("data", "symbols.txt"))
+SYMBOL_SOURCES = [
+    "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+    "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+]
+
+BATCH_SIZE = 500          # tickers per batched download
+BATCH_WORKERS = 2         # one downloads while the other is reduced (the provider runs one download at a time)
+DAILY_PERIOD = "1mo"
+DAILY_MAX_AGE = 900       # daily stats barely move intraday
+ATR_DAYS = 14
+PRICE_SLACK = 0.10        # daily close vs. latest hourly close
+MAX_SURVIVORS = int(os.getenv("UNIVERSE_MAX_SURVIVORS", "400"))
+
+
+# --- Symbol file ---
+
+def _normalize(symbol):
+    # Class shares use '-' on Yahoo (BRK.B -> BRK-B); '$' marks preferreds
+    symbol = symbol.strip().upper().replace(".", "-").replace("/", "-")
+    if not symbol or "$" in symbol or len(symbol) > 6 or not symbol.replace("-", "").isalnum():
+        return None
+    return symbol
+
+
+def parse_symbols(lines, include_etfs=False):
+    symbols, header = [], None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or line.startswith("File Creation Time"):
+            continue
+        if "|" not in line:
+            symbol = _normalize(line.replace(",", " ").split()[0])
+            if symbol:
+                symbols.append(symbol)
+            continue
+        fields = line.split("|")
+        if fields[0] in ("Symbol", "ACT Symbol"):
+            header = {name: i for i, name in enumerate(fields)}
+            continue
+        if header is None:
+            continue
+        if "Test Issue" in header and fields[header["Test Issue"]] == "Y":
+            continue
+        if not include_etfs and "ETF" in header and fields[header["ETF"]] == "Y":
+            continue
+        symbol = _normalize(fields[0])
+        if symbol:
+            symbols.append(symbol)
+    return list(dict.fromkeys(symbols))
+
+
+def load_symbols(path=None, include_etfs=False):
+    """Tickers from the local symbol file (cached until the file changes)."""
+    path = path or SYMBOL_FILE
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Symbol file not found: {path}. Create it with `python -m modules.universe_scan --refresh`."
+        )
+
+    def read():
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            return parse_symbols(f, include_etfs)
+
+    return market_cache.get_or_fetch(("symbols", path, os.path.getmtime(path), include_etfs), read)
+
+
+def refresh_symbol_file(path=None):
+    path = path or SYMBOL_FILE
+    text = []
+    for url in SYMBOL_SOURCES:
+        r = http_client.get(url, timeout=(5, 60))
+        r.raise_for_status()
+        text.append(r.text.strip())
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(text) + "\n")
+    with open(path, encoding="utf-8") as f:
+        return len(parse_symbols(f))
+
+
+# --- Stage 1: daily pre-filter ---
+
+def daily_stats(data, atr_days=ATR_DAYS):
+    """Last/previous close, average volume and ATR% per ticker from wide daily bars."""
+    close = data["Close"].to_numpy(dtype=np.float64)
+    high = data["High"].to_numpy(dtype=np.float64)
+    low = data["Low"].to_numpy(dtype=np.float64)
+    volume = data["Volume"].to_numpy(dtype=np.float64)
+    tickers = list(data["Close"].columns)
+
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns (no bars)
+        valid = ~np.isnan(close)
+        last_idx = close.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+        cols = np.arange(close.shape[1])
+        last = close[last_idx, cols]
+        prev = np.where(last_idx > 0, close[np.maximum(last_idx - 1, 0), cols], np.nan)
+        atr = np.nanmean(true_range[-atr_days:], axis=0)
+        stats = pd.DataFrame({
+            "Last Close ($)": last,
+            "Previous Close ($)": prev,
+            "Change (%)": (last - prev) / prev * 100,
+            "Avg Volume": np.nanmean(volume[-atr_days:], axis=0),
+            "ATR (%)": atr / last * 100,
+        }, index=pd.Index(tickers, name="Ticker"))
+    return stats[valid.any(axis=0)].dropna(subset=["Last Close ($)"])
+
+
+def _download(batch, period):
+    return get_provider().download(batch, period, "1d")
+
+
+def _batch_stats(batch, period):
+    try:
+        data = _download(batch, period)
+    except Exception:
+        count("universe.batch_failed")
+        return None
+    if data.empty:
+        return None
+    return daily_stats(data)
+
+
+def fetch_universe_stats(tickers, period=DAILY_PERIOD, batch_size=BATCH_SIZE, workers=BATCH_WORKERS):
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    with span("universe.stage1", tickers=len(tickers), batches=len(batches)), \
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        parts = [p for p in executor.map(bind(lambda b: _batch_stats(b, period)), batches) if p is not None]
+    if not parts:
+        return None
+    stats = pd.concat(parts)
+    stats.attrs["failed_batches"] = len(batches) - len(parts)
+    return stats[~stats.index.duplicated()]
+
+
+def _stats_key(path, tickers):
+    # Keyed on the list itself: a same-length edit of the symbol file is a new universe
+    return ("universe_stats", path or SYMBOL_FILE, len(tickers), hash(tuple(tickers)))
+
+
+def get_universe_stats(path=None, max_age=DAILY_MAX_AGE):
+    """(stats, fetched_at) for every ticker in the symbol file."""
+    tickers = load_symbols(path)
+    entry = market_cache.get_or_fetch_entry(
+        _stats_key(path, tickers),
+        lambda: fetch_universe_stats(tickers),
+        max_age
+    )
+    return entry if entry[0] is not None else (pd.DataFrame(), None)
+
+
+def cached_universe_stats(path=None):
+    """Stage-1 stats from any earlier run (whatever their age), or None; never fetches."""
+    return market_cache.get(_stats_key(path, load_symbols(path)))
+
+
+def prefilter(stats, price_range, min_volume, min_volatility, max_survivors=MAX_SURVIVORS):
+    """Stage-1 survivors, best first.
+
+    Thresholds are the relaxed second-pass ones plus some price slack, so the
+    pre-filter never drops a ticker the hourly filters would have kept for
+    being slightly different on daily bars. Daily ATR% and daily volume are at
+    least as large as their hourly counterparts for an active name.
+    """
+    if stats.empty:
+        return stats
+    price = stats["Last Close ($)"]
+    keep = (
+        (price >= price_range[0] * (1 - PRICE_SLACK)) & (price <= price_range[1] * (1 + PRICE_SLACK)) &
+        (stats["Avg Volume"] >= min_volume * RELAXED_VOLUME) &
+        (stats["ATR (%)"] >= min_volatility * RELAXED_VOLATILITY)
+    )
+    survivors = stats[keep]
+    rank = normalized_score(survivors["Change (%)"].fillna(0), survivors["ATR (%)"], survivors["Avg Volume"])
+    return survivors.iloc[top_k_indices(rank, max_survivors)]
+
+
+def universe_candidates(price_range, min_volume, min_volatility, path=None):
+    """(tickers, info) where info has universe/stage-1 counts for the fetch report."""
+    stats, fetched_at = get_universe_stats(path)
+    survivors = prefilter(stats, price_range, min_volume, min_volatility)
+    return list(survivors.index), {
+        "symbols": len(load_symbols(path)),
+        "with_bars": len(stats),
+        "survivors": len(survivors),
+        "failed_batches": stats.attrs.get("failed_batches", 0),
+        "age": time.time() - fetched_at if fetched_at else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-universe stage-1 pre-filter on daily bars.")
+    parser.add_argument("path", nargs="?", default=None, help=f"symbol file (default {SYMBOL_FILE})")
+    parser.add_argument("--refresh", action="store_true", help="download the NASDAQ Trader symbol directory first")
+    parser.add_argument("--min-price", type=float, default=5.0)
+    parser.add_argument("--max-price", type=float, default=10.0)
+    parser.add_argument("--min-volume", type=float, default=500_000)
+    parser.add_argument("--min-volatility", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.refresh:
+        print(f"Wrote {refresh_symbol_file(args.path)} symbols to {args.path or SYMBOL_FILE}")
+    tickers, info = universe_candidates((args.min_price, args.max_price), args.min_volume,
+                                        args.min_volatility, args.path)
+    print(f"{info['symbols']} symbols, {info['with_bars']} with daily bars, {info['survivors']} survivors")
+    print(" ".join(tickers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import time
+import pandas as pd
+from modules.ai_cascade import plan_escalations, run_cascade
+
+SKIPPED = {"summary": "⏳ Not analyzed (time budget)", "ai_notes": "", "score": 0, "score_label": "", "skipped": True}
+
+
+def _frame(n=6):
+    return pd.DataFrame({"Ticker": [f"T{i}" for i in range(n)], "Score": [10.0 - i for i in range(n)]})
+
+
+def _result(score):
+    return {"summary": "🔼 Bullish – ok", "ai_notes": "", "score": score, "score_label": ""}
+
+
+def test_skipped_rows_are_never_escalated():
+    df = _frame()
+    results = [SKIPPED, _result(9), SKIPPED, _result(8), _result(7), _result(1)]
+    decisions = plan_escalations(df, results, max_calls=10, max_tokens=100_000)
+    assert decisions.loc[[0, 2], "Reason"].isna().all()
+    assert not decisions.loc[[0, 2], "Escalated"].any()
+    assert (decisions.loc[[0, 2], "Decision"] == "not analyzed in time").all()
+    assert decisions.loc[1, "Escalated"]   # top rank, analyzed
+
+
+def test_no_strong_calls_past_the_deadline():
+    df = _frame()
+    calls = []
+
+    def analyze_batch(frame, model):
+        calls.append(model)
+        return [_result(5) for _ in range(len(frame))]
+
+    results, decisions = run_cascade(df, analyze_batch, cheap="cheap", strong="strong",
+                                     deadline=time.monotonic() - 1)
+    assert calls == ["cheap"]
+    assert not decisions["Escalated"].any()
+    assert (decisions["Decision"] == "past deadline").any()
+    assert all(r["model"] == "cheap" for r in results)
+
+
+def test_strong_pass_runs_before_the_deadline():
+    df = _frame()
+    calls = []
+
+    def analyze_batch(frame, model):
+        calls.append(model)
+        return [_result(5) for _ in range(len(frame))]
+
+    run_cascade(df, analyze_batch, cheap="cheap", strong="strong", deadline=time.monotonic() + 60)
+    assert calls == ["cheap", "strong"]
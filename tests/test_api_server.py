@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from modules import gpt_summary
+from modules.api_server import ApiState, changed_since
+from utils import market_cache
+
+
+def _scan(rows):
+    return pd.DataFrame(rows, columns=["Ticker", "Rank", "Score", "Last Close ($)", "Change (%)", "Volume"])
+
+
+def test_changed_since_returns_new_and_changed_rows_and_removed_tickers():
+    previous = _scan([["AAA", 1, 9.0, 5.0, 2.0, 1e6], ["BBB", 2, 8.0, 6.0, 1.0, 2e6], ["CCC", 3, 7.0, 7.0, np.nan, 3e6]])
+    current = _scan([["BBB", 1, 8.5, 6.0, 1.0, 2e6], ["CCC", 2, 7.0, 7.0, np.nan, 3e6], ["DDD", 3, 6.0, 8.0, 3.0, 4e6]])
+    current.loc[1, "Rank"] = 3   # CCC keeps its rank: unchanged
+    changed, removed = changed_since(current, previous)
+    assert changed["Ticker"].tolist() == ["BBB", "DDD"]
+    assert removed == ["AAA"]
+
+
+def test_changed_since_unchanged_scan_is_empty():
+    scan = _scan([["AAA", 1, 9.0, 5.0, np.nan, 1e6]])
+    changed, removed = changed_since(scan, scan.copy())
+    assert changed.empty and removed == []
+
+
+def test_changed_since_without_previous_returns_everything():
+    scan = _scan([["AAA", 1, 9.0, 5.0, 2.0, 1e6]])
+    changed, removed = changed_since(scan, pd.DataFrame())
+    assert changed is scan and removed == []
+
+
+def test_refresh_reports_failed_headline_sources_in_health(monkeypatch, tmp_path):
+    def collect(on_error):
+        on_error("Bloomberg: 403")
+        return [("Stocks rally", "https://example.com/a", "Reuters", "")]
+    monkeypatch.setattr(gpt_summary, "collect_headlines", collect)
+    market_cache.clear()
+    state = ApiState(tmp_path)
+    state.refresh()
+    assert state.health()["errors"] == {"headline_sources": ["Bloomberg: 403"]}
+    assert state.news[1]["Headline"].tolist() == ["Stocks rally"]
+
+    monkeypatch.setattr(gpt_summary, "collect_headlines", lambda on_error: [])
+    market_cache.clear()
+    state.refresh()
+    assert state.health()["errors"] == {}
+    market_cache.clear()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import synthetic_panel
+from modules.backtest import DEFAULT_PARAMS, WARMUP_DAYS, compute_features, evaluate, run_backtest
+from modules.scan_utils import (
+    compute_score, passes_filters, RELAX_BELOW, RELAXED_VOLUME, RELAXED_VOLATILITY
+)
+from modules.scoring import score_frame, top_k_indices
+
+
+@pytest.fixture(scope="module")
+def panel():
+    return synthetic_panel(n_tickers=120, n_days=12, seed=3)
+
+
+def _live_scan(rows, params, method):
+    """One day's scan the way scan_market does it: scalar filters, relaxed pass, Score, top N."""
+    def matches(min_volume, min_volatility):
+        return [r for r in rows if passes_filters(r["Last Close ($)"], r["Volume"], r["Volatility (%)"],
+                                                  params["price_range"], min_volume, min_volatility)]
+    results = matches(params["min_volume"], params["min_volatility"])
+    if len(results) < RELAX_BELOW:
+        results = matches(params["min_volume"] * RELAXED_VOLUME, params["min_volatility"] * RELAXED_VOLATILITY)
+    df = pd.DataFrame(results)
+    if df.empty:
+        return df, set()
+    df["Score"] = score_frame(df, params["weights"], method)
+    top = set(df["Ticker"].iloc[top_k_indices(df["Score"].to_numpy(), params["top_n"])])
+    return df, top
+
+
+@pytest.mark.parametrize("method", ["rank", "zscore", "raw"])
+def test_backtest_matches_live_filters_and_score(panel, method):
+    params = {**DEFAULT_PARAMS, "price_range": (2.0, 40.0), "min_volume": 100_000, "min_volatility": 0.5,
+              "top_n": 10, "method": method}
+    features = compute_features(panel, params["decision_slot"])
+    candidates = evaluate(features, params, panel["tickers"], panel["dates"])
+    tickers = np.asarray(panel["tickers"])
+
+    checked = 0
+    for day in range(WARMUP_DAYS, len(panel["dates"])):
+        valid = features["valid"][:, day]
+        rows = [{"Ticker": t, "Last Close ($)": p, "Volume": v, "Volatility (%)": vol, "Change (%)": c}
+                for t, p, v, vol, c in zip(tickers[valid], features["price"][valid, day],
+                                           features["volume"][valid, day], features["volatility"][valid, day],
+                                           features["change"][valid, day])]
+        live, live_top = _live_scan(rows, params, method)
+        replay = candidates[candidates["Day"] == day].set_index("Ticker")
+        assert set(replay.index) == set(live["Ticker"])
+        if live.empty:
+            continue
+        np.testing.assert_allclose(replay.loc[live["Ticker"], "Score"], live["Score"])
+        assert set(replay.index[replay["Selected"]]) == live_top
+        checked += 1
+    assert checked
+
+
+def test_raw_method_replays_compute_score(panel):
+    params = {**DEFAULT_PARAMS, "price_range": (2.0, 40.0), "min_volume": 0, "min_volatility": 0, "method": "raw"}
+    candidates = evaluate(compute_features(panel), params, panel["tickers"], panel["dates"])
+    expected = compute_score(candidates["Change (%)"], candidates["Volatility (%)"], candidates["Volume"],
+                             params["weights"])
+    np.testing.assert_allclose(candidates["Score"], expected)
+
+
+def test_chunked_backtest_matches_single_pass(panel):
+    one = run_backtest(panel, {"method": "rank"})
+    split = run_backtest(panel, {"method": "rank"}, chunks=3)
+    assert one["summary"] == pytest.approx(split["summary"], nan_ok=True)
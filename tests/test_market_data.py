@@ -0,0 +1,42 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from utils.market_data import slice_period
+
+
+def _mask_slice(bars, period):
+    # The boolean-mask implementation slice_period replaced
+    if period == "max":
+        return bars
+    if period == "ytd":
+        return bars[bars.index >= bars.index[-1].replace(month=1, day=1, hour=0, minute=0, second=0)]
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        days = bars.index.normalize()
+        return bars[days >= days.unique()[-n:][0]]
+    offset = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return bars[bars.index > bars.index[-1] - offset]
+
+
+@pytest.fixture
+def hourly():
+    index = pd.date_range("2025-11-03 09:30", "2026-02-27 15:30", freq="h", tz="America/New_York")
+    index = index[(index.dayofweek < 5) & (index.hour >= 9) & (index.hour <= 15)]
+    close = np.random.default_rng(0).uniform(5, 10, len(index))
+    return pd.DataFrame({"Close": close, "Volume": np.arange(len(index))}, index=index)
+
+
+@pytest.mark.parametrize("period", ["1d", "2d", "5d", "30d", "1wk", "1mo", "3mo", "1y", "ytd", "max"])
+def test_slice_period_matches_boolean_mask(hourly, period):
+    pd.testing.assert_frame_equal(slice_period(hourly, period), _mask_slice(hourly, period))
+
+
+def test_slice_period_returns_a_view(hourly):
+    assert np.shares_memory(slice_period(hourly, "5d")["Close"].to_numpy(), hourly["Close"].to_numpy())
+
+
+def test_slice_period_rejects_unknown_periods(hourly):
+    with pytest.raises(ValueError):
+        slice_period(hourly, "5h")
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from modules.monte_carlo import calibrate_from_bars, simulate_plan_distribution
+
+
+def test_calibration_is_driftless_and_skips_the_overnight_gap():
+    index = pd.DatetimeIndex(["2026-10-15 14:30", "2026-10-15 15:30", "2026-10-16 09:30", "2026-10-16 10:30"])
+    closes = pd.DataFrame({"Close": [10.0, 10.1, 12.0, 12.12]}, index=index)   # +20% gap overnight
+    drift, sigma = calibrate_from_bars(closes, fallback_volatility=3.0)
+    assert drift == 0.0
+    assert sigma < 1e-6   # both same-session moves are +1%
+
+
+def test_driftless_plan_has_zero_mean_profit():
+    plan = [{"Ticker": f"T{i}", "Buy": 10.0, "Sell": 10.2, "Shares": 100, "Volatility %": 3.0} for i in range(5)]
+    rng = np.random.default_rng(0)
+    bars = {row["Ticker"]: pd.DataFrame({"Close": 10 * np.exp(np.cumsum(rng.normal(0, 0.01, 14)))}) for row in plan}
+    result = simulate_plan_distribution(plan, bars, profit_goal=50, n_paths=40_000, seed=1)
+    totals = result["totals"]
+    standard_error = totals.std() / np.sqrt(len(totals))
+    assert abs(totals.mean()) < 4 * standard_error
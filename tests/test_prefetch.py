@@ -0,0 +1,23 @@
+from utils.prefetch import PrefetchScheduler, _warn
+
+
+def _partial():
+    _warn("source A: timed out")
+    return 3
+
+
+def test_run_job_records_warnings_per_run():
+    runs = iter([_partial, lambda: 5])
+    scheduler = PrefetchScheduler(jobs={"news": lambda: next(runs)()})
+
+    scheduler.run_job("news")
+    assert scheduler.status["news"]["result"] == 3
+    assert scheduler.status["news"]["warnings"] == ["source A: timed out"]
+    assert scheduler.status["news"]["error"] is None
+
+    scheduler.run_job("news")
+    assert scheduler.status["news"]["warnings"] == []
+
+
+def test_warn_outside_a_job_is_ignored():
+    _warn("nobody listening")
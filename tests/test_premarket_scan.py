@@ -0,0 +1,63 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from modules.premarket_scan import EASTERN, current_session, premarket_stats
+
+
+def _bars():
+    """Two days of 5-minute bars incl. extended hours for GAP, FLAT (no pre-market prints) and DOWN."""
+    eastern = "America/New_York"
+    prior = pd.date_range("2026-10-15 04:00", "2026-10-15 19:55", freq="5min", tz=eastern)
+    today = pd.date_range("2026-10-16 04:00", "2026-10-16 09:25", freq="5min", tz=eastern)
+    index = prior.append(today)
+    minutes = index.hour * 60 + index.minute
+    regular = (index.day == 15) & (minutes >= 570) & (minutes < 960)
+    pre_today = index.day == 16
+
+    close = pd.DataFrame(index=index, columns=["GAP", "FLAT", "DOWN"], dtype=float)
+    close.loc[regular] = [10.0, 20.0, 50.0]
+    close.loc[(index.day == 15) & ~regular] = [99.0, 99.0, 99.0]   # prior day's extended hours: ignored
+    close.loc[pre_today, "GAP"] = np.linspace(10.5, 11.0, pre_today.sum())
+    close.loc[pre_today, "DOWN"] = 45.0
+    high, low = close + 0.25, close - 0.25
+    volume = pd.DataFrame(1000.0, index=index, columns=close.columns)
+    volume.loc[pre_today, "FLAT"] = np.nan
+    return pd.concat({"Open": close, "High": high, "Low": low, "Close": close, "Volume": volume}, axis=1)
+
+
+def test_premarket_stats_on_synthetic_prepost_bars():
+    stats = premarket_stats(_bars())
+    assert list(stats.index) == ["GAP", "DOWN"]   # FLAT has no pre-market prints
+
+    gap = stats.loc["GAP"]
+    assert gap["Prior Close ($)"] == 10.0
+    assert gap["Pre-Market ($)"] == pytest.approx(11.0)
+    assert gap["Gap (%)"] == pytest.approx(10.0)
+    assert gap["Pre-Market High ($)"] == pytest.approx(11.25)
+    assert gap["Pre-Market Low ($)"] == pytest.approx(10.25)
+    assert gap["Pre-Market Volume"] == 1000.0 * 66   # 4:00-9:25 in 5-minute bars
+
+    assert stats.loc["DOWN", "Gap (%)"] == pytest.approx(-10.0)
+
+
+def test_premarket_stats_accepts_naive_eastern_index():
+    bars = _bars()
+    bars.index = bars.index.tz_localize(None)
+    assert premarket_stats(bars).loc["GAP", "Gap (%)"] == pytest.approx(10.0)
+
+
+def test_premarket_stats_is_empty_before_the_session_prints():
+    bars = _bars()
+    assert premarket_stats(bars, session=datetime.date(2026, 10, 16)).index.tolist() == ["GAP", "DOWN"]
+    assert premarket_stats(bars, session=datetime.date(2026, 10, 19)).empty   # Monday, no bars yet
+
+
+@pytest.mark.parametrize("now, session", [
+    ("2026-10-16 08:00", datetime.date(2026, 10, 16)),   # Friday pre-market
+    ("2026-10-16 03:59", datetime.date(2026, 10, 15)),   # before 4:00: previous session
+    ("2026-10-17 10:00", datetime.date(2026, 10, 16)),   # Saturday
+    ("2026-10-19 02:00", datetime.date(2026, 10, 16)),   # Monday before 4:00
+])
+def test_current_session(now, session):
+    assert current_session(EASTERN.localize(datetime.datetime.fromisoformat(now))) == session
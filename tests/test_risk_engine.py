@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from modules.risk_engine import ledoit_wolf
+
+
+def test_ledoit_wolf_hand_computed():
+    x = np.array([[2.0, 1.0], [-2.0, -1.0], [1.0, -1.0], [-1.0, 1.0]] * 2)
+    # sample = [[2.5, .5], [.5, 1]], mu = 1.75, delta = 1.625 / 2, beta = 6.75 / (2 * 8)
+    shrinkage = (6.75 / 16) / 0.8125
+    cov, intensity = ledoit_wolf(x)
+    assert intensity == pytest.approx(shrinkage)
+    expected = shrinkage * 1.75 * np.eye(2) + (1 - shrinkage) * np.array([[2.5, 0.5], [0.5, 1.0]])
+    np.testing.assert_allclose(cov, expected)
+    np.testing.assert_allclose(cov, [[109.75 / 52, 12.5 / 52], [12.5 / 52, 72.25 / 52]])
+
+
+def test_ledoit_wolf_clips_shrinkage_to_one():
+    x = np.array([[2.0, 1.0], [-2.0, -1.0], [1.0, -1.0], [-1.0, 1.0]])
+    cov, intensity = ledoit_wolf(x)
+    assert intensity == 1.0
+    np.testing.assert_allclose(cov, 1.75 * np.eye(2))
+
+
+def test_ledoit_wolf_no_shrinkage_for_scaled_identity():
+    x = np.array([[1.0, 1.0], [-1.0, 1.0], [1.0, -1.0], [-1.0, -1.0]])
+    cov, intensity = ledoit_wolf(x)
+    assert intensity == 0.0
+    np.testing.assert_allclose(cov, np.eye(2))
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.scoring import normalize, normalized_score, top_k_indices
+
+
+def test_top_k_orders_best_first_and_puts_nan_last():
+    scores = np.array([1.0, np.nan, 3.0, 2.0, np.nan])
+    assert top_k_indices(scores, 3).tolist() == [2, 3, 0]
+    assert top_k_indices(scores, 5)[:3].tolist() == [2, 3, 0]
+    assert set(top_k_indices(scores, 5)[3:].tolist()) == {1, 4}
+
+
+def test_top_k_edges():
+    assert top_k_indices([], 3).tolist() == []
+    assert top_k_indices([1.0, 2.0], 0).tolist() == []
+    assert top_k_indices([1.0, 2.0], 10).tolist() == [1, 0]
+
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(0).standard_normal(1000)
+    assert top_k_indices(scores, 25).tolist() == np.argsort(-scores)[:25].tolist()
+
+
+@pytest.mark.parametrize("method", ["rank", "zscore"])
+def test_normalize_along_axis_matches_each_column(method):
+    values = np.random.default_rng(1).lognormal(size=(50, 4))
+    values[3, 1] = np.nan
+    by_axis = normalize(values, method, axis=0)
+    for day in range(values.shape[1]):
+        np.testing.assert_allclose(by_axis[:, day], normalize(values[:, day], method), equal_nan=True)
+
+
+def test_rank_score_is_relative_to_the_universe():
+    change, volatility, volume = [1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [1e5, 2e5, 3e5]
+    scores = normalized_score(change, volatility, volume, weights=(1, 1, 1), method="rank")
+    np.testing.assert_allclose(scores, [10 / 3, 20 / 3, 10.0])
+    scaled = normalized_score(np.multiply(change, 5), volatility, volume, weights=(1, 1, 1), method="rank")
+    np.testing.assert_allclose(scaled, scores)
+
+
+def test_rank_normalization_of_series_input():
+    out = normalize(pd.Series([3.0, 1.0, 2.0]))
+    np.testing.assert_allclose(out, [1.0, 1 / 3, 2 / 3])
@@ -0,0 +1,22 @@
+import os
+import pandas as pd
+from modules import universe_scan
+from modules.universe_scan import cached_universe_stats, get_universe_stats
+from utils import market_cache
+
+
+def test_cached_stats_do_not_survive_a_same_length_symbol_change(monkeypatch, tmp_path):
+    path = str(tmp_path / "symbols.txt")
+    with open(path, "w") as f:
+        f.write("AAA\nBBB\n")
+    monkeypatch.setattr(universe_scan, "fetch_universe_stats", lambda tickers: pd.DataFrame(index=tickers))
+    market_cache.clear()
+    assert get_universe_stats(path)[0].index.tolist() == ["AAA", "BBB"]
+    assert cached_universe_stats(path) is not None
+
+    with open(path, "w") as f:
+        f.write("AAA\nCCC\n")
+    os.utime(path, (0, 0))   # a different mtime, whatever the filesystem's resolution
+    assert cached_universe_stats(path) is None
+    assert get_universe_stats(path)[0].index.tolist() == ["AAA", "CCC"]
+    market_cache.clear()
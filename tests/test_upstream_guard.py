@@ -0,0 +1,41 @@
+import pytest
+from utils.upstream_guard import UpstreamGuard
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def _interrupt():
+    raise Interrupted()
+
+
+def _half_open(guard):
+    guard.state = "open"
+    guard._open_until = 0.0
+
+
+def test_interrupted_probe_frees_the_half_open_slot():
+    guard = UpstreamGuard("test")
+    _half_open(guard)
+    with pytest.raises(Interrupted):
+        guard.call(_interrupt)
+    assert guard.in_flight == 0 and not guard._probe_in_flight
+    assert guard.state == "half_open"   # an interruption says nothing about upstream
+    assert guard.call(lambda: 42) == 42
+    assert guard.state == "closed"
+
+
+def test_interrupted_call_is_not_counted():
+    guard = UpstreamGuard("test")
+    with pytest.raises(Interrupted):
+        guard.call(_interrupt)
+    assert guard.in_flight == 0
+    assert guard.counts["ok"] == guard.counts["errors"] == 0
+
+
+def test_errors_still_release_their_slot():
+    guard = UpstreamGuard("test")
+    with pytest.raises(ValueError):
+        guard.call(lambda: int("x"))
+    assert guard.in_flight == 0 and guard.counts["errors"] == 1
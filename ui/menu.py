@@ -1,6 +1,9 @@
 # ui/menu.py
 
 import streamlit as st
+from ui.routes import ROUTES
+from utils.ai_models import CASCADE
+from utils import perf
 
 def display_sidebar():
     st.sidebar.title("📂 Navigation")
@@ -10,7 +13,7 @@ def display_sidebar():
     st.sidebar.checkbox("Enable AI Analysis", value=True, key="use_ai")
 
     # ✅ GPT Model Selector
-    AVAILABLE_MODELS = ["gpt-3.5-turbo", "gpt-4", "gpt-4o"]
+    AVAILABLE_MODELS = ["gpt-3.5-turbo", "gpt-4", "gpt-4o", CASCADE]
     DEFAULT_MODEL = "gpt-3.5-turbo"
     st.sidebar.selectbox(
         "🤖 Select GPT Model",
@@ -19,7 +22,47 @@ def display_sidebar():
         key="gpt_model"
     )
 
+    st.sidebar.checkbox("⏱️ Show Performance Panel", value=False, key="perf_panel")
+    if st.session_state.get("perf_panel"):
+        if st.sidebar.button("🔬 Profile this page (cProfile)"):
+            st.session_state["perf_profile"] = True  # consumed by the run the click starts
+
     return st.sidebar.radio(
         "Choose Option",
-        ["-- Select an Action --", "Scan Market", "Risk Allocation", "Generate Profit Plan", "GPT Market Summary"]
+        ["-- Select an Action --", *ROUTES]
     )
+
+
+def display_perf_panel(run):
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.metric("Rerun time", f"{run.elapsed_ms:,.0f} ms")
+        latency = perf.latency_percentiles(run.label)
+        if latency["runs"]:
+            st.caption(f"{run.label}: p50 {latency['p50']:,.0f} ms · p95 {latency['p95']:,.0f} ms "
+                       f"over the last {latency['runs']} runs")
+        counters = run.counters
+        st.caption(
+            f"Network requests: {counters.get('net.requests', 0)} · "
+            f"Cache hits: {counters.get('cache.hit', 0)} · "
+            f"Cache misses: {counters.get('cache.miss', 0)}"
+        )
+        from utils import market_cache
+        cache = market_cache.stats()
+        st.caption(
+            f"Shared cache: {cache['entries']:,} entries · {cache['bytes'] / 1e6:.1f} MB · "
+            f"{cache['coalesced']:,} coalesced · {cache['evictions']:,} evicted"
+        )
+        stages = run.stage_table()
+        if stages:
+            st.dataframe(stages, use_container_width=True, hide_index=True)
+        else:
+            st.write("- No spans recorded")
+        other = {k: v for k, v in counters.items() if k not in ("net.requests", "cache.hit", "cache.miss")}
+        if other:
+            st.json(other, expanded=False)
+        st.download_button("📥 Export spans (JSONL)", run.to_jsonl(),
+                           file_name="perf_run.jsonl", mime="application/x-ndjson")
+        if run.profile_text:
+            st.download_button("📥 Download profile", run.profile_text,
+                               file_name="perf_profile.txt", mime="text/plain")
+            st.code(run.profile_text[:6000], language=None)
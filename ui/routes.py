@@ -0,0 +1,31 @@
+# ui/routes.py
+
+import importlib
+
+# Page label -> (module, function). Modules are imported only when their page is
+# chosen, so a rerun pays for one page's dependencies instead of all of them.
+ROUTES = {
+    "Scan Market": ("modules.scan_market", "scan_market"),
+    "Risk Allocation": ("modules.risk_allocation", "show_risk_allocation"),
+    "Generate Profit Plan": ("modules.profit_plan", "show_profit_plan"),
+    "GPT Market Summary": ("modules.gpt_summary", "show_gpt_summary"),
+    "Sector Rotation": ("modules.sector_rollup", "show_sector_heatmap"),
+    "Pre-Market Gappers": ("modules.premarket_scan", "show_premarket_scan"),
+}
+
+# Bar windows (period, interval) each page reads; the page's DataContext fetches
+# the widest per interval once and slices the rest. Pages not listed read
+# through the plain cache.
+PAGE_WINDOWS = {
+    "Scan Market": (("5d", "1h"), ("90d", "1d")),              # scan rows, charts
+    "Generate Profit Plan": (("2d", "1h"), ("30d", "1h")),     # plan peaks; dashboards and risk model
+}
+
+def page_windows(choice):
+    return PAGE_WINDOWS.get(choice, ())
+
+def load_page(choice):
+    if choice not in ROUTES:
+        return None
+    module_name, func_name = ROUTES[choice]
+    return getattr(importlib.import_module(module_name), func_name)
@@ -0,0 +1,15 @@
+# utils/ai_models.py
+#
+# Model names shared by the sidebar selector, the OpenAI helper and the AI
+# cascade. Kept free of heavy imports: ui/menu.py loads it on every rerun.
+
+import os
+
+CASCADE = "Auto (cascade)"
+CHEAP_MODEL = os.getenv("AI_CASCADE_CHEAP", "gpt-3.5-turbo")
+STRONG_MODEL = os.getenv("AI_CASCADE_STRONG", "gpt-4o")
+
+
+def resolve_model(model):
+    """OpenAI model name for a selector value; the cascade answers single calls with the cheap model."""
+    return CHEAP_MODEL if model == CASCADE else model
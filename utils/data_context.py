@@ -0,0 +1,99 @@
+# utils/data_context.py
+#
+# Per-run view of ticker bars and metadata. A page reads overlapping windows of
+# the same ticker (Generate Profit Plan: 2d/1h plan peaks, 30d/1h dashboards
+# and risk model); the windows each page needs are listed in
+# ui.routes.PAGE_WINDOWS.
+#
+# A DataContext fetches the widest window per interval once through the shared
+# cache (scan_utils.get_history) and serves narrower requests as positional
+# slices of it (slice_period returns views, not copies). Requests wider than
+# the context knows about, or for another interval, fall through to a plain
+# cached read, so planning only the windows a page uses keeps, e.g., the scan
+# at 5d of hourly bars per mover.
+#
+# main.py starts one context per rerun with the chosen page's windows; worker
+# threads wrapped with perf.bind see the caller's context. Outside a run,
+# current() returns a throwaway one with no planned windows.
+
+import contextvars
+import re
+from utils import market_cache
+from utils.market_data import slice_period
+from utils.perf import count
+
+_UNIT_DAYS = {"d": 1, "wk": 5, "mo": 21, "y": 252}   # trading days, roughly
+
+
+def period_days(period):
+    """Approximate length of a yfinance period in trading days (for comparisons)."""
+    if period == "max":
+        return float("inf")
+    if period == "ytd":
+        return 252
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    return int(match.group(1)) * _UNIT_DAYS[match.group(2)]
+
+
+def widest_windows(windows):
+    """{interval: widest period} over (period, interval) pairs."""
+    widest = {}
+    for period, interval in windows:
+        if interval not in widest or period_days(period) > period_days(widest[interval]):
+            widest[interval] = period
+    return widest
+
+
+class DataContext:
+    def __init__(self, windows=()):
+        self.windows = widest_windows(windows)
+        self._bars = {}   # (ticker, interval) -> widest bars, or the exception fetching them raised
+        self._info = {}
+
+    def history(self, ticker, period="5d", interval="1h"):
+        """Bars for `period`, sliced from this run's widest window for `interval`."""
+        from modules.scan_utils import get_history
+        widest = self.windows.get(interval)
+        if widest is None or period_days(period) > period_days(widest):
+            count("data_context.unplanned")
+            return get_history(ticker, period, interval)
+
+        key = (ticker, interval)
+        bars = self._bars.get(key)
+        if bars is None:
+            try:
+                bars = get_history(ticker, widest, interval)
+            except Exception as e:
+                bars = e  # don't retry a failed ticker within the same run
+            self._bars[key] = bars
+        else:
+            count("data_context.hits")
+        if isinstance(bars, Exception):
+            raise bars
+        return bars if period == widest else slice_period(bars, period)
+
+    def info(self, ticker):
+        from modules.scan_utils import get_info
+        if ticker not in self._info:
+            self._info[ticker] = get_info(ticker)
+        return self._info[ticker]
+
+    def age(self, ticker, interval="1h"):
+        """Seconds since the cached widest window for `interval` was fetched."""
+        widest = self.windows.get(interval)
+        return market_cache.age(("history", ticker, widest, interval)) if widest else None
+
+
+_current = contextvars.ContextVar("data_context", default=None)
+
+
+def start_context(windows=()):
+    context = DataContext(windows)
+    _current.set(context)
+    return context
+
+
+def current():
+    return _current.get() or DataContext()
@@ -0,0 +1,219 @@
+# utils/http_client.py
+#
+# One HTTP layer for every scraper and API call:
+#
+#   - a shared requests.Session with keep-alive connection pools per host
+#   - default timeouts (HTTP_TIMEOUT="connect,read" seconds) and User-Agent
+#   - gzip/deflate, plus brotli when the Brotli package is installed
+#   - an on-disk cache (HTTP_CACHE_DIR) for GETs whose responses carry an ETag
+#     or Last-Modified; later fetches send If-None-Match / If-Modified-Since,
+#     and a 304 is answered from disk instead of a full download. Entries
+#     unused for HTTP_CACHE_MAX_AGE days are pruned, then the least recently
+#     used until the cache fits HTTP_CACHE_MAX_MB (checked every few minutes
+#     on store).
+#
+# get() and post() return ordinary requests.Response objects; responses served
+# from the disk cache have `from_cache = True`.
+
+import hashlib
+import json
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from utils.perf import count
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join("data", "http_cache"))
+CACHE_MAX_BYTES = float(os.getenv("HTTP_CACHE_MAX_MB", "200")) * 1e6
+CACHE_MAX_AGE = float(os.getenv("HTTP_CACHE_MAX_AGE", "7")) * 86400   # days
+PRUNE_INTERVAL = 300   # seconds between prune passes
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+USER_AGENT = "Mozilla/5.0"
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes "br" only when it is importable)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+_session = None
+_lock = threading.Lock()
+_store_locks = [threading.Lock() for _ in range(64)]   # striped by URL digest
+_last_prune = 0.0
+
+
+def default_timeout():
+    connect, _, read = os.getenv("HTTP_TIMEOUT", "5,20").partition(",")
+    return float(connect), float(read or connect)
+
+
+def session():
+    """The process-wide session (created on first use)."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": ACCEPT_ENCODING})
+                _session = s
+    return _session
+
+
+# --- Conditional-GET disk cache ---
+
+def _digest(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _cache_paths(url):
+    digest = _digest(url)
+    folder = os.path.join(CACHE_DIR, digest[:2])
+    return os.path.join(folder, digest + ".json"), os.path.join(folder, digest + ".body")
+
+
+def _load(url):
+    meta_path, body_path = _cache_paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("url") != url:
+            return None
+        return meta, body_path
+    except (OSError, ValueError):
+        return None
+
+
+def _store(url, response):
+    meta_path, body_path = _cache_paths(url)
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_type": response.headers.get("Content-Type"),
+        "encoding": response.encoding,
+        "size": len(response.content),
+        "stored_at": time.time(),
+    }
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        # Body and metadata of one URL are replaced together, so they always match
+        with _store_locks[int(_digest(url)[:8], 16) % len(_store_locks)]:
+            with open(body_path + suffix, "wb") as f:
+                f.write(response.content)
+            os.replace(body_path + suffix, body_path)
+            with open(meta_path + suffix, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(meta_path + suffix, meta_path)
+    except OSError:
+        return  # the cache is an optimization; a read-only disk just disables it
+    _maybe_prune()
+
+
+def _maybe_prune():
+    global _last_prune
+    now = time.time()
+    with _lock:
+        if now - _last_prune < PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    prune()
+
+
+def prune(max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+    """Drop entries unused for max_age seconds, then the least recently used beyond max_bytes."""
+    entries = []   # (last used, bytes, paths)
+    for folder, _, names in os.walk(CACHE_DIR):
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(folder, name)
+            body_path = meta_path[:-len(".json")] + ".body"
+            try:
+                used = max(os.path.getmtime(meta_path), os.path.getmtime(body_path))
+                size = os.path.getsize(meta_path) + os.path.getsize(body_path)
+            except OSError:
+                used, size = 0.0, 0
+            entries.append((used, size, (meta_path, body_path)))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age
+    removed = 0
+    for used, size, paths in entries:
+        if used >= cutoff and total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    if removed:
+        count("http.cache_pruned", removed)
+    return removed
+
+
+def _from_cache(url, meta, body_path):
+    with open(body_path, "rb") as f:
+        content = f.read()
+    if meta.get("size", len(content)) != len(content):
+        raise OSError(f"cached body of {url} does not match its metadata")
+    os.utime(body_path)  # recently used: pruned last
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = content
+    response.encoding = meta.get("encoding")
+    response.headers = CaseInsensitiveDict({
+        k: v for k, v in (("Content-Type", meta.get("content_type")), ("ETag", meta.get("etag")),
+                          ("Last-Modified", meta.get("last_modified"))) if v
+    })
+    response.from_cache = True
+    return response
+
+
+def get(url, params=None, headers=None, timeout=None, conditional=True, **kwargs):
+    """GET through the shared session; revalidates cached bodies with a conditional request."""
+    if params:
+        url = requests.Request("GET", url, params=params).prepare().url
+    headers = dict(headers or {})
+    cached = _load(url) if conditional else None
+    if cached:
+        meta, _ = cached
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = session().get(url, headers=headers, timeout=timeout or default_timeout(), **kwargs)
+    count("http.requests")
+    if response.status_code == 304 and cached:
+        count("http.not_modified")
+        try:
+            return _from_cache(url, *cached)
+        except OSError:
+            # Body vanished; fetch it again unconditionally
+            return get(url, headers={k: v for k, v in headers.items() if not k.startswith("If-")},
+                       timeout=timeout, conditional=False, **kwargs)
+    response.from_cache = False
+    if conditional and response.status_code == 200 and (
+            response.headers.get("ETag") or response.headers.get("Last-Modified")):
+        _store(url, response)
+    return response
+
+
+def post(url, timeout=None, **kwargs):
+    response = session().post(url, timeout=timeout or default_timeout(), **kwargs)
+    count("http.requests")
+    return response
+
+
+def clear_cache():
+    import shutil
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -2,6 +2,16 @@
 
 import streamlit as st
 
+_env_loaded = False
+
+def init_env():
+    # Load .env once per process instead of at import time of every helper
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
 def init_allocation_state():
     st.session_state.setdefault('low_risk', 60)
     st.session_state.setdefault('med_risk', 30)
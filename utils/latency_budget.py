@@ -0,0 +1,68 @@
+# utils/latency_budget.py
+#
+# End-to-end time budget for one page run, split into consecutive stages.
+# Each stage's deadline sits at its cumulative share of the budget, so a slow
+# fetch eats into its own share first and later stages still get theirs.
+# Pages check expired()/remaining() at their degradation points and record what
+# they left out with skip(); the list is shown to the user.
+#
+#   SCAN_BUDGET=20                      seconds for the Scan Market page (0 = off)
+#   SCAN_BUDGET_SPLIT=0.45,0.35,0.2     fetch, ai, render shares
+#
+# A disabled budget (0 seconds) never expires, so pages call it unconditionally.
+
+import os
+import time
+from utils.perf import count
+
+STAGES = ("fetch", "ai", "render")
+DEFAULT_SPLIT = (0.45, 0.35, 0.2)
+
+
+class LatencyBudget:
+    def __init__(self, seconds, split=DEFAULT_SPLIT, stages=STAGES):
+        self.seconds = float(seconds or 0)
+        self.started = time.monotonic()
+        self.skipped = []   # (stage, what was skipped or degraded)
+        total = float(sum(split)) or 1.0
+        self.deadlines = {}
+        cumulative = 0.0
+        for stage, share in zip(stages, split):
+            cumulative += share / total
+            self.deadlines[stage] = self.started + self.seconds * cumulative
+
+    @classmethod
+    def from_env(cls, prefix, seconds=None):
+        """Budget from <prefix>_BUDGET / <prefix>_BUDGET_SPLIT; `seconds` overrides the total."""
+        if seconds is None:
+            seconds = float(os.getenv(f"{prefix}_BUDGET", "0"))
+        split = os.getenv(f"{prefix}_BUDGET_SPLIT")
+        return cls(seconds, tuple(float(s) for s in split.split(",")) if split else DEFAULT_SPLIT)
+
+    @property
+    def enabled(self):
+        return self.seconds > 0
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def deadline(self, stage):
+        """time.monotonic() value the stage must finish by; None when disabled."""
+        return self.deadlines[stage] if self.enabled else None
+
+    def remaining(self, stage):
+        return max(0.0, self.deadlines[stage] - time.monotonic()) if self.enabled else float("inf")
+
+    def expired(self, stage):
+        return self.enabled and time.monotonic() >= self.deadlines[stage]
+
+    def skip(self, stage, what):
+        self.skipped.append((stage, what))
+        count(f"budget.skipped.{stage}")
+
+    def summary(self):
+        used = f"{self.elapsed:.1f} s of {self.seconds:.0f} s"
+        if not self.skipped:
+            return f"⏱️ Time budget: {used} · nothing skipped"
+        return f"⏱️ Time budget: {used} · skipped or degraded: " + "; ".join(what for _, what in self.skipped)
@@ -0,0 +1,185 @@
+# utils/market_cache.py
+#
+# Process-wide store for market data, metadata, news and AI results shared by
+# every Streamlit session and the background prefetch scheduler. Values are
+# treated as read-only by readers.
+#
+# get_or_fetch coalesces concurrent misses for the same key (singleflight): the
+# first caller fetches, everyone else waits for and shares its result. The store
+# is LRU-bounded by entry count and approximate size.
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from utils.perf import count
+
+MAX_ENTRIES = int(os.getenv("MARKET_CACHE_MAX_ENTRIES", "20000"))
+MAX_BYTES = int(float(os.getenv("MARKET_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+_store = OrderedDict()   # key -> (value, fetched_at, size)
+_inflight = {}           # key -> _Flight
+_lock = threading.Lock()
+_bytes = 0
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "fetch_errors": 0}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.fetched_at = None
+        self.error = None
+        self.aborted = False   # leader interrupted (e.g. a Streamlit rerun) before a result
+
+
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + _size_of(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_size_of(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _evict_locked():
+    global _bytes
+    while _store and (len(_store) > MAX_ENTRIES or _bytes > MAX_BYTES):
+        _, (_, _, size) = _store.popitem(last=False)
+        _bytes -= size
+        _stats["evictions"] += 1
+
+
+def put(key, value, fetched_at=None):
+    global _bytes
+    size = _size_of(value)
+    with _lock:
+        old = _store.pop(key, None)
+        if old:
+            _bytes -= old[2]
+        _store[key] = (value, fetched_at or time.time(), size)
+        _bytes += size
+        _evict_locked()
+
+
+def _lookup_locked(key, max_age):
+    entry = _store.get(key)
+    if entry is None or (max_age is not None and time.time() - entry[1] > max_age):
+        return None
+    _store.move_to_end(key)
+    return entry
+
+
+def get_entry(key, max_age=None):
+    """(value, fetched_at) if cached and no older than `max_age` seconds."""
+    with _lock:
+        entry = _lookup_locked(key, max_age)
+        _stats["hits" if entry else "misses"] += 1
+    count("cache.hit" if entry else "cache.miss")
+    return (entry[0], entry[1]) if entry else None
+
+
+def get(key, max_age=None):
+    entry = get_entry(key, max_age)
+    return entry[0] if entry else None
+
+
+def age(key):
+    with _lock:
+        entry = _store.get(key)
+    return time.time() - entry[1] if entry else None
+
+
+def get_or_fetch_entry(key, fetch, max_age=None):
+    """(value, fetched_at), fetching on a miss with one in-flight fetch per key.
+
+    `fetch` returning None means "nothing to cache" (the None is still shared
+    with coalesced callers); exceptions propagate to every waiting caller. When
+    the leader is interrupted by a BaseException (Streamlit's rerun and stop
+    signals), waiting callers retry the fetch themselves instead.
+    """
+    while True:
+        result = _get_or_fetch_once(key, fetch, max_age)
+        if result is not _RETRY:
+            return result
+
+
+_RETRY = object()
+
+
+def _get_or_fetch_once(key, fetch, max_age):
+    with _lock:
+        entry = _lookup_locked(key, max_age)
+        if entry:
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _inflight[key] = _Flight()
+            else:
+                _stats["coalesced"] += 1
+    if entry:
+        count("cache.hit")
+        return entry[0], entry[1]
+
+    count("cache.miss")
+    if not leader:
+        count("cache.coalesced")
+        flight.done.wait()
+        if flight.aborted:
+            return _RETRY
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, flight.fetched_at
+
+    try:
+        flight.value = fetch()
+        flight.fetched_at = time.time()
+        if flight.value is not None:
+            put(key, flight.value, flight.fetched_at)
+    except Exception as e:
+        flight.error = e
+        with _lock:
+            _stats["fetch_errors"] += 1
+        raise
+    except BaseException:
+        flight.aborted = True
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+    return flight.value, flight.fetched_at
+
+
+def get_or_fetch(key, fetch, max_age=None):
+    return get_or_fetch_entry(key, fetch, max_age)[0]
+
+
+def stats():
+    with _lock:
+        return {**_stats, "entries": len(_store), "bytes": _bytes, "inflight": len(_inflight)}
+
+
+def clear():
+    global _bytes
+    with _lock:
+        _store.clear()
+        _bytes = 0
+
+
+def format_age(seconds):
+    if seconds is None:
+        return "n/a"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
@@ -0,0 +1,302 @@
+# utils/market_data.py
+#
+# Market-data provider interface: bars, batched bars, quotes, metadata and the
+# mover list. Pages and modules reach data through scan_utils' cached readers,
+# which call get_provider(); nothing above this layer imports yfinance.
+#
+#   MARKET_DATA_PROVIDER=yfinance (default) | local
+#   MARKET_DATA_DIR=data/market       (local provider root)
+#
+# Local layout (what `record` writes; CSV works the same as Parquet):
+#
+#   <root>/bars/<interval>/<TICKER>.parquet   OHLCV, datetime index
+#   <root>/info/<TICKER>.json                 shortName, sector, ...
+#   <root>/movers.txt                         one ticker per line (optional)
+#
+# Local periods are measured back from the last bar in each file, so replays
+# are deterministic. Record a data set with:
+#   python -m utils.market_data record TICKERS_FILE [--period 60d --interval 1h]
+
+import argparse
+import json
+import os
+import re
+import threading
+import pandas as pd
+from io import StringIO
+from utils.perf import span
+from utils import http_client
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class MarketDataProvider:
+    name = "base"
+
+    def history(self, ticker, period="5d", interval="1h"):
+        """OHLCV bars for one ticker (DatetimeIndex); raises if none are available."""
+        raise NotImplementedError
+
+    def download(self, tickers, period="5d", interval="1h", prepost=False):
+        """Wide bars for many tickers: columns (field, ticker), like yf.download(group_by="column").
+
+        prepost=True asks for extended-hours bars too; the base implementation
+        returns whatever history() has (local files hold what was recorded).
+        """
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.history(ticker, period, interval)
+            except Exception:
+                continue
+        return _wide(frames)
+
+    def quote(self, ticker):
+        """Last price, previous close and today's volume from daily bars."""
+        bars = self.history(ticker, "5d", "1d")
+        return {
+            "price": float(bars["Close"].iloc[-1]),
+            "previous_close": float(bars["Close"].iloc[-2]) if len(bars) > 1 else None,
+            "volume": int(bars["Volume"].iloc[-1]),
+        }
+
+    def info(self, ticker):
+        """Metadata dict (shortName, sector, ...); empty when unknown."""
+        return {}
+
+    def movers(self):
+        """Tickers worth scanning right now."""
+        raise NotImplementedError
+
+
+def _wide(frames):
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat({field: pd.DataFrame({t: f[field] for t, f in frames.items()}) for field in FIELDS}, axis=1)
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance via yfinance and the mover pages; every call goes through yahoo_guard."""
+    name = "yfinance"
+
+    MOVER_PAGES = [
+        "https://finance.yahoo.com/gainers",
+        "https://finance.yahoo.com/losers",
+        "https://finance.yahoo.com/most-active",
+        "https://finance.yahoo.com/screener/pre-market",
+        "https://finance.yahoo.com/screener/new-highs"
+    ]
+
+    MAX_TICKERS = 2000   # reused yf.Ticker objects kept
+
+    # yf.download collects results in module globals (shared._DFS/_ERRORS) that
+    # each call resets, so concurrent downloads lose or mix each other's tickers
+    # and can wait forever. One download at a time; threads=True still fetches
+    # the tickers of a batch in parallel.
+    _download_lock = threading.Lock()
+
+    def __init__(self):
+        import yfinance as yf
+        from utils.upstream_guard import yahoo_guard
+        self.yf = yf
+        self.guard = yahoo_guard
+        self._tickers = {}
+
+    def ticker(self, symbol):
+        """A reused yf.Ticker (keeps its timezone lookup between history calls)."""
+        obj = self._tickers.get(symbol)
+        if obj is None:
+            if len(self._tickers) >= self.MAX_TICKERS:
+                self._tickers.clear()
+            obj = self._tickers[symbol] = self.yf.Ticker(symbol)
+        return obj
+
+    def history(self, ticker, period="5d", interval="1h"):
+        with span("yf.history", net=True, ticker=ticker):
+            return self.guard.call(self.ticker(ticker).history, period=period, interval=interval, raise_errors=True)
+
+    def download(self, tickers, period="5d", interval="1h", prepost=False):
+        with span("yf.download", net=True, tickers=len(tickers)), self._download_lock:
+            data = self.guard.call(self.yf.download, list(tickers), period=period, interval=interval,
+                                   prepost=prepost, group_by="column", auto_adjust=False, threads=True,
+                                   progress=False)
+        if not data.empty and not isinstance(data.columns, pd.MultiIndex):
+            data = pd.concat({field: data[[field]].set_axis(list(tickers)[:1], axis=1) for field in data.columns}, axis=1)
+        return data
+
+    def info(self, ticker):
+        # A fresh Ticker: yfinance memoizes .info per object, and market_cache
+        # decides when metadata is stale
+        with span("yf.info", net=True, ticker=ticker):
+            return self.guard.call(lambda: self.yf.Ticker(ticker).info)
+
+    def _get_page(self, url):
+        r = http_client.get(url)
+        r.raise_for_status()
+        return r
+
+    def _mover_table(self, url, slices=3):
+        try:
+            with span("http.yahoo_movers", net=True, url=url):
+                r = self.guard.call(self._get_page, url)
+            tables = pd.read_html(StringIO(r.text))
+            return pd.concat(tables[:slices]) if slices <= len(tables) else tables[0]
+        except Exception:
+            return pd.DataFrame()
+
+    def movers(self):
+        symbols = []
+        for url in self.MOVER_PAGES:
+            table = self._mover_table(url)
+            if not table.empty and "Symbol" in table.columns:
+                symbols.extend(table["Symbol"].tolist())
+        return list(set(s for s in symbols if isinstance(s, str) and s.isupper() and 1 <= len(s) <= 6))
+
+
+class LocalFileProvider(MarketDataProvider):
+    """Bars and metadata recorded to disk (Parquet or CSV); no network access."""
+    name = "local"
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("MARKET_DATA_DIR", os.path.join("data", "market"))
+
+    def _bars_path(self, ticker, interval):
+        base = os.path.join(self.root, "bars", interval, ticker.upper())
+        for ext in (".parquet", ".csv"):
+            if os.path.exists(base + ext):
+                return base + ext
+        return None
+
+    def _read_bars(self, ticker, interval):
+        path = self._bars_path(ticker, interval)
+        if path is None:
+            raise FileNotFoundError(f"{ticker}: no local {interval} bars under {self.root}")
+        if path.endswith(".parquet"):
+            bars = pd.read_parquet(path)
+        else:
+            bars = pd.read_csv(path, index_col=0)
+            bars.index = pd.to_datetime(bars.index, utc=True).tz_convert("America/New_York")
+        return bars.sort_index()
+
+    def history(self, ticker, period="5d", interval="1h"):
+        with span("local.history", ticker=ticker):
+            bars = slice_period(self._read_bars(ticker, interval), period)
+        if bars.empty:
+            raise ValueError(f"{ticker}: no local bars in period {period}")
+        return bars
+
+    def info(self, ticker):
+        path = os.path.join(self.root, "info", f"{ticker.upper()}.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def movers(self):
+        path = os.path.join(self.root, "movers.txt")
+        if os.path.exists(path):
+            with open(path) as f:
+                return [line.strip().upper() for line in f if line.strip()]
+        # Without a list, every ticker recorded with hourly bars is a candidate
+        folder = os.path.join(self.root, "bars", "1h")
+        return sorted({os.path.splitext(name)[0] for name in os.listdir(folder)}) if os.path.isdir(folder) else []
+
+
+def slice_period(bars, period):
+    """Bars within `period` (yfinance syntax: 5d, 3mo, 1y, ytd, max) of the last bar.
+
+    `bars` must be sorted by time. The result is a positional slice (a view
+    sharing the parent's data), so treat it as read-only.
+    """
+    if bars.empty or period in (None, "max"):
+        return bars
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if period == "ytd":
+        start = bars.index.searchsorted(bars.index[-1].replace(month=1, day=1, hour=0, minute=0, second=0))
+        return bars.iloc[start:]
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # Trading days, like yfinance: the last n distinct session dates
+        days = bars.index.normalize()
+        return bars.iloc[days.searchsorted(days.unique()[-n:][0]):]
+    offset = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+    return bars.iloc[bars.index.searchsorted(bars.index[-1] - offset, side="right"):]
+
+
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "local": LocalFileProvider,
+}
+
+_provider = None
+_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """Make another feed selectable through MARKET_DATA_PROVIDER."""
+    PROVIDERS[name] = factory
+
+
+def get_provider():
+    """The process-wide provider selected by MARKET_DATA_PROVIDER (created on first use)."""
+    global _provider
+    if _provider is None:
+        with _lock:
+            if _provider is None:
+                name = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+                if name not in PROVIDERS:
+                    raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{name}' (choose from {', '.join(PROVIDERS)})")
+                _provider = PROVIDERS[name]()
+    return _provider
+
+
+def set_provider(provider):
+    """Swap the active provider (tests, benchmarks, replays)."""
+    global _provider
+    _provider = provider
+
+
+# --- Recording a local data set ---
+
+def record(tickers, root=None, period="60d", interval="1h", source=None):
+    """Copy bars and metadata from `source` (default: yfinance) into a local provider root."""
+    source = source or YFinanceProvider()
+    root = root or LocalFileProvider().root
+    folder = os.path.join(root, "bars", interval)
+    os.makedirs(folder, exist_ok=True)
+    os.makedirs(os.path.join(root, "info"), exist_ok=True)
+    saved = 0
+    for ticker in tickers:
+        try:
+            bars = source.history(ticker, period, interval)
+            info = source.info(ticker)
+        except Exception:
+            continue
+        bars[list(FIELDS)].to_parquet(os.path.join(folder, f"{ticker}.parquet"))
+        keep = {k: info.get(k) for k in ("shortName", "longName", "sector", "industry",
+                                         "floatShares", "sharesOutstanding", "marketCap") if k in info}
+        with open(os.path.join(root, "info", f"{ticker}.json"), "w", encoding="utf-8") as f:
+            json.dump(keep, f)
+        saved += 1
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record market data for the local provider.")
+    parser.add_argument("command", choices=["record"])
+    parser.add_argument("tickers_file", help="text file with one ticker per line")
+    parser.add_argument("--root", default=None)
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--interval", default="1h")
+    args = parser.parse_args()
+
+    with open(args.tickers_file) as f:
+        tickers = [line.strip().upper() for line in f if line.strip()]
+    saved = record(tickers, args.root, args.period, args.interval)
+    print(f"Recorded {saved} of {len(tickers)} tickers ({args.interval}, {args.period})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,80 @@
 # utils/openai_helper.py
 import os
 import requests
+from utils import http_client
 import re
 import streamlit as st
 import json
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.init_state import init_env
+from utils.perf import span, count
+from utils.ai_models import resolve_model
 
 USE_OPENAI = os.getenv("USE_OPENAI", "true").lower() == "true"
 
-def call_openai_chat(prompt):
-    import streamlit as st  # Ensure this is imported
-
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+SCORE_LABELS = ["Avoid", "Caution", "Moderate Opportunity", "Strong Buy"]
+LABEL_MAP = {
+    "Avoid": "🔴 Avoid",
+    "Caution": "⚠️ Caution",
+    "Moderate Opportunity": "🟡 Moderate Opportunity",
+    "Strong Buy": "🟢 Strong Buy"
+}
+
+# Static system prompt shared by every per-ticker analysis call. It is identical
+# byte-for-byte across calls so the provider can cache the prefix; the user
+# message carries only the compact stock JSON.
+ANALYSIS_SYSTEM_PROMPT = """You are an elite real-time day trading analyst AI. For the stock given as JSON \
+(ticker, company, sector, volume, change_pct, volatility_pct), assess its suitability for a same-day profit trade \
+using volume, momentum, volatility and likely catalysts (news or chart patterns).
+
+Return one JSON object with:
+- "summary": one sentence for a dashboard, starting with a sentiment tag such as "🔼 Bullish –", "🔽 Bearish –" or "⏸️ Neutral –"
+- "why": why the stock is active today
+- "risk": risk profile (liquidity, volatility, support/resistance, risk/reward)
+- "who_benefits": which type of trader benefits (scalper, momentum trader, range-bound trader, ...)
+- "score": integer 0-10 recommendation based on setup strength, news, volume confirmation and risk
+- "score_label": "Avoid" (0-3), "Caution" (4-5), "Moderate Opportunity" (6-7) or "Strong Buy" (8-10)
+
+Respond with the JSON object only."""
+
+ANALYSIS_SCHEMA = {
+    "name": "stock_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string"},
+            "why": {"type": "string"},
+            "risk": {"type": "string"},
+            "who_benefits": {"type": "string"},
+            "score": {"type": "integer"},
+            "score_label": {"type": "string", "enum": SCORE_LABELS},
+        },
+        "required": ["summary", "why", "risk", "who_benefits", "score", "score_label"],
+        "additionalProperties": False,
+    },
+}
+ANALYSIS_MAX_TOKENS = 400
+
+
+def response_format_for(model):
+    """Strictest structured-output mode the model supports (None: prompt-only JSON)."""
+    if model.startswith("gpt-4o"):
+        return {"type": "json_schema", "json_schema": ANALYSIS_SCHEMA}
+    if model.startswith("gpt-3.5-turbo") or model.startswith("gpt-4-turbo"):
+        return {"type": "json_object"}
+    return None
+
+
+def chat_completion(messages, model=None, response_format=None, max_tokens=None, temperature=0.3):
+    """(content, usage) for one chat completion; ("", {}) when AI is off or the call fails."""
+    init_env()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key or not USE_OPENAI:
-        return ""  # Skip if API not set or disabled
+        return "", {}  # Skip if API not set or disabled
 
-    model = st.session_state.get("gpt_model", "gpt-3.5-turbo")  # 🧠 Use selected model
+    model = resolve_model(model or st.session_state.get("gpt_model", DEFAULT_MODEL))  # 🧠 Use selected model
 
     headers = {
         "Authorization": f"Bearer {api_key}",
@@ -26,118 +83,128 @@ def call_openai_chat(prompt):
 
     payload = {
         "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3
+        "messages": messages,
+        "temperature": temperature
     }
+    if response_format:
+        payload["response_format"] = response_format
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
 
     try:
-        response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+        with span("openai.chat", net=True, model=model):
+            response = http_client.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload,
+                                        timeout=(5, 90))
+        count("openai.calls")
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"].strip()
+        body = response.json()
+        usage = body.get("usage", {})
+        count("openai.tokens", usage.get("total_tokens", 0))
+        return body["choices"][0]["message"]["content"].strip(), usage
     except requests.exceptions.HTTPError:
-        return ""
+        return "", {}
     except Exception:
-        return ""
+        return "", {}
 
 
-def generate_ai_score(row):
-    prompt = f"""
-    You are an elite real-time day trading analyst AI. Based on the most current intraday data, analyze this stock and assess its suitability for a same-day profit trade. Use live volume, momentum, volatility, and potential catalysts (news or chart patterns) to support your evaluation.
-
-    Stock Details:
-    - Ticker: {row['Ticker']}
-    - Company: {row['Company Name']}
-    - Sector: {row['Sector']}
-    - Volume: {row['Volume']}
-    - Change: {row['Change (%)']}%
-    - Volatility: {row['Volatility (%)']}%
-
-    Perform the following:
-
-    1. Identify why this stock is active today (mention chart patterns, momentum signals, or recent news/catalyst).
-    2. Evaluate risk profile: discuss liquidity, volatility, price support/resistance, and risk/reward potential.
-    3. Suggest which type of trader would benefit (e.g., scalper, momentum trader, range-bound trader).
-    4. Give a final recommendation score (0–10) based on setup strength, news, volume confirmation, and risk profile.
-
-    Respond in JSON with keys:
-    - "why": string
-    - "risk": string
-    - "who_benefits": string
-    - "score": integer (0–10)
-    """
-    response = call_openai_chat(prompt)
-    match = re.search(r"score.*?(\d{1,2})", response, re.IGNORECASE)
-    score = int(match.group(1)) if match else 0
-    return response, min(score, 10)
+def call_openai_chat(prompt, model=None):
+    return chat_completion([{"role": "user", "content": prompt}], model)[0]
 
-def analyze_stock_summary_and_details(row):
-    prompt = f"""
-You are an elite real-time day trading analyst AI. Analyze the stock below using the most current intraday data and return:
-
-1. A one-sentence summary with a sentiment tag for dashboard display.
-2. A detailed breakdown including:
-   - Why it's active
-   - Risk profile
-   - Who benefits
-   - Final recommendation score (0–10)
-
-Also include a plain-language score label based on this scale:
-- 0–3: "Avoid"
-- 4–5: "Caution"
-- 6–7: "Moderate Opportunity"
-- 8–10: "Strong Buy"
-
-Stock Details:
-- Ticker: {row['Ticker']}
-- Company: {row['Company Name']}
-- Sector: {row['Sector']}
-- Volume: {row['Volume']}
-- Change: {row['Change (%)']}%
-- Volatility: {row['Volatility (%)']}%
-
-Respond only in this JSON format:
-{{
-  "summary": "🔼 Bullish – ...",
-  "why": "...",
-  "risk": "...",
-  "who_benefits": "...",
-  "score": 0–10,
-  "score_label": "Avoid | Caution | Moderate Opportunity | Strong Buy"
-}}
-"""
-    response = call_openai_chat(prompt)
+
+def compact_stock(row):
+    """Minimal per-ticker user content for the analysis prompt."""
+    return json.dumps({
+        "ticker": str(row['Ticker']),
+        "company": str(row['Company Name']),
+        "sector": str(row['Sector']),
+        "volume": int(row['Volume']),
+        "change_pct": round(float(row['Change (%)']), 2),
+        "volatility_pct": round(float(row['Volatility (%)']), 2),
+    }, ensure_ascii=False, separators=(",", ":"))
+
+
+def _label_for(score):
+    return SCORE_LABELS[0 if score <= 3 else 1 if score <= 5 else 2 if score <= 7 else 3]
+
+
+def parse_analysis(text):
+    """Validated analysis fields from a model reply, or None if the reply is unusable."""
     try:
-        match = re.search(r"\{.*\}", response, re.DOTALL)
-        data = json.loads(match.group(0)) if match else {}
-        score = min(int(data.get("score", 0)), 10)
-
-        label_map = {
-            "Avoid": "🔴 Avoid",
-            "Caution": "⚠️ Caution",
-            "Moderate Opportunity": "🟡 Moderate Opportunity",
-            "Strong Buy": "🟢 Strong Buy"
-        }
-        score_label = data.get("score_label", "")
-        tagged_label = label_map.get(score_label, score_label)
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        # Models without a response_format may wrap the JSON in prose
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        return None
+
+    score = data.get("score")
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score.strip())
+    if isinstance(score, float) and score.is_integer():
+        score = int(score)
+    summary = data.get("summary")
+    if isinstance(score, bool) or not isinstance(score, int) or not 0 <= score <= 10:
+        return None
+    if not isinstance(summary, str) or not summary.strip():
+        return None
+
+    label = data.get("score_label")
+    return {
+        "summary": summary.strip(),
+        "why": str(data.get("why", "")),
+        "risk": str(data.get("risk", "")),
+        "who_benefits": str(data.get("who_benefits", "")),
+        "score": score,
+        "score_label": label if label in SCORE_LABELS else _label_for(score),
+    }
 
-        # Only return clean summary and breakdown
-        summary = data.get("summary", "⚠️ No summary")
-        ai_notes = f"📘 Why:\n{data.get('why','')}\n\n📉 Risk:\n{data.get('risk','')}\n\n🎯 Who Benefits:\n{data.get('who_benefits','')}\n\n🏁 Score: {score} – {tagged_label}"
 
-        return {
-            "summary": summary,
-            "ai_notes": ai_notes,
-            "score": score,
-            "score_label": tagged_label
-        }
-    except Exception as e:
+def request_analysis(row, model=None):
+    """(validated fields or None, usage) for one structured analysis call."""
+    model = resolve_model(model or st.session_state.get("gpt_model", DEFAULT_MODEL))
+    text, usage = chat_completion(
+        [{"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+         {"role": "user", "content": compact_stock(row)}],
+        model, response_format_for(model), ANALYSIS_MAX_TOKENS
+    )
+    data = parse_analysis(text)
+    if text and data is None:
+        count("openai.invalid")
+    return data, usage
+
+
+def generate_ai_score(row, model=None):
+    data, _ = request_analysis(row, model)
+    if data is None:
+        return "", 0
+    return json.dumps(data, ensure_ascii=False), data["score"]
+
+def analyze_stock_summary_and_details(row, model=None):
+    data, usage = request_analysis(row, model)
+    if data is None:
         return {
             "summary": "⚠️ Analysis unavailable.",
-            "ai_notes": f"Error: {str(e)}",
+            "ai_notes": "Error: no valid analysis returned",
             "score": 0,
-            "score_label": "🔴 Avoid"
+            "score_label": "🔴 Avoid",
+            "tokens": usage.get("total_tokens", 0)
         }
 
+    score = data["score"]
+    tagged_label = LABEL_MAP[data["score_label"]]
+    ai_notes = f"📘 Why:\n{data['why']}\n\n📉 Risk:\n{data['risk']}\n\n🎯 Who Benefits:\n{data['who_benefits']}\n\n🏁 Score: {score} – {tagged_label}"
+    return {
+        "summary": data["summary"],
+        "ai_notes": ai_notes,
+        "score": score,
+        "score_label": tagged_label,
+        "tokens": usage.get("total_tokens", 0)
+    }
+
 
 def get_stock_summary(ticker, details):
     prompt = f"""
@@ -185,8 +252,7 @@ def get_final_score_justification(details):
     return call_openai_chat(prompt)
 
 def is_ai_enabled():
-    from dotenv import load_dotenv
-    load_dotenv()
+    init_env()
     env_flag = os.getenv("USE_OPENAI", "false").lower() == "true"
     ui_flag = st.session_state.get("use_ai", True)
     return env_flag and ui_flag
@@ -0,0 +1,158 @@
+# utils/perf.py
+#
+# Lightweight timing spans and counters collected per Streamlit rerun.
+#
+#   with span("yf.history", net=True, ticker=t): ...
+#   count("cache.hit")
+#   executor.map(bind(analyze_stock), tickers)   # carry the run into worker threads
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PERF_LOG = os.getenv("PERF_LOG")  # optional JSONL file every finished run is appended to
+LATENCY_WINDOW = int(os.getenv("PERF_LATENCY_WINDOW", "200"))  # recent runs per page kept for p50/p95
+
+
+class PerfRun:
+    def __init__(self, label=""):
+        self.label = label
+        self.started = time.time()
+        self.finished = None
+        self.spans = []
+        self.counters = {}
+        self.profile_text = None
+        self._lock = threading.Lock()
+
+    def add_span(self, name, start, duration, meta):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start": round(start - self.started, 6),
+                "ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                **meta,
+            })
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @property
+    def elapsed_ms(self):
+        return ((self.finished or time.time()) - self.started) * 1000
+
+    def stage_table(self):
+        # name -> calls, total and max milliseconds, slowest first
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            row = stages.setdefault(s["name"], {"Stage": s["name"], "Calls": 0, "Total ms": 0.0, "Max ms": 0.0})
+            row["Calls"] += 1
+            row["Total ms"] += s["ms"]
+            row["Max ms"] = max(row["Max ms"], s["ms"])
+        return sorted(stages.values(), key=lambda r: r["Total ms"], reverse=True)
+
+    def to_jsonl(self):
+        header = {
+            "type": "run",
+            "label": self.label,
+            "started": self.started,
+            "ms": round(self.elapsed_ms, 3),
+            "counters": self.counters,
+        }
+        lines = [json.dumps(header)]
+        lines += [json.dumps({"type": "span", **s}, default=str) for s in self.spans]
+        return "\n".join(lines) + "\n"
+
+
+_current = contextvars.ContextVar("perf_run", default=None)
+
+
+def start_run(label=""):
+    run = PerfRun(label)
+    _current.set(run)
+    return run
+
+
+_latencies = {}   # run label -> recent run times (ms), process-wide
+_latency_lock = threading.Lock()
+
+
+def finish_run(run):
+    run.finished = time.time()
+    with _latency_lock:
+        _latencies.setdefault(run.label, deque(maxlen=LATENCY_WINDOW)).append(run.elapsed_ms)
+    if PERF_LOG:
+        with open(PERF_LOG, "a", encoding="utf-8") as f:
+            f.write(run.to_jsonl())
+    return run
+
+
+def current_run():
+    return _current.get()
+
+
+def latency_percentiles(label):
+    """{"runs", "p50", "p95"} in ms over the last LATENCY_WINDOW runs of `label`."""
+    with _latency_lock:
+        times = sorted(_latencies.get(label, ()))
+    if not times:
+        return {"runs": 0, "p50": None, "p95": None}
+    pick = lambda q: times[min(len(times) - 1, int(q * len(times)))]
+    return {"runs": len(times), "p50": pick(0.5), "p95": pick(0.95)}
+
+
+@contextmanager
+def span(name, net=False, **meta):
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    if net:
+        run.incr("net.requests")
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_span(name, start, time.perf_counter() - t0, meta)
+
+
+def count(name, n=1):
+    run = _current.get()
+    if run is not None:
+        run.incr(name, n)
+
+
+def bind(fn):
+    """Wrap `fn` so calls from worker threads record into the caller's run (and
+    see the caller's other context variables, e.g. its data context)."""
+    context = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def profile(run, limit=40):
+    """cProfile the enclosed block (script thread only) into run.profile_text."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        run.profile_text = out.getvalue()
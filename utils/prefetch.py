@@ -0,0 +1,191 @@
+# utils/prefetch.py
+#
+# In-process background scheduler that keeps market_cache warm so pages render
+# from fresh data instead of fetching on demand in the script thread.
+#
+# Enable with PREFETCH_ENABLED=true. Per-job intervals (seconds) are
+# "<market hours>,<extended hours>" and can be overridden per job, e.g.
+# PREFETCH_BARS_INTERVAL=180,1200. Jobs pause overnight and on weekends.
+# Each job's last run is kept in PrefetchScheduler.status: its result, the
+# error that aborted it, and non-fatal warnings (e.g. a news source failing).
+
+import concurrent.futures
+import contextvars
+import datetime
+import os
+import threading
+import time
+import pytz
+
+EASTERN = pytz.timezone("US/Eastern")
+
+DEFAULT_INTERVALS = {
+    "movers": (120, 900),
+    "bars": (300, 1800),
+    "metadata": (3600, 6 * 3600),
+    "news": (600, 1800),
+    "premarket": (3600, 60),   # only does work 4:00-9:30 ET
+}
+
+_warnings = contextvars.ContextVar("prefetch_warnings", default=None)
+
+
+def market_session(now=None):
+    """'market', 'extended' or 'closed' for US equities (holidays not handled)."""
+    now = (now or datetime.datetime.now(EASTERN)).astimezone(EASTERN)
+    if now.weekday() >= 5:
+        return "closed"
+    minutes = now.hour * 60 + now.minute
+    if 9 * 60 + 30 <= minutes < 16 * 60:
+        return "market"
+    if 4 * 60 <= minutes < 20 * 60:
+        return "extended"
+    return "closed"
+
+
+def job_intervals(name):
+    override = os.getenv(f"PREFETCH_{name.upper()}_INTERVAL")
+    if override:
+        market, _, extended = override.partition(",")
+        return float(market), float(extended or market)
+    return DEFAULT_INTERVALS[name]
+
+
+# --- Jobs: each refreshes one family of market_cache keys ---
+
+def refresh_movers():
+    from modules.scan_utils import get_movers
+    return len(get_movers(max_age=0))
+
+
+def refresh_bars():
+    # Warm the hourly window Scan Market slices its rows from (utils.data_context)
+    from modules.scan_utils import get_movers, get_history
+    from utils.data_context import widest_windows
+    from ui.routes import page_windows
+    period = widest_windows(page_windows("Scan Market"))["1h"]
+    tickers = get_movers()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_workers()) as executor:
+        list(executor.map(lambda t: _quietly(get_history, t, period, "1h", max_age=0), tickers))
+    return len(tickers)
+
+
+def refresh_metadata():
+    from modules.scan_utils import get_movers, get_info, INFO_MAX_AGE
+    tickers = get_movers()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_workers()) as executor:
+        list(executor.map(lambda t: _quietly(get_info, t, max_age=INFO_MAX_AGE), tickers))
+    return len(tickers)
+
+
+def refresh_news():
+    from modules.risk_allocation import fetch_market_articles
+    from modules.gpt_summary import collect_headlines
+    from utils import market_cache
+    market_cache.put(("market_articles",), fetch_market_articles())
+    headlines = collect_headlines(on_error=_warn)
+    market_cache.put(("headlines",), headlines)
+    return len(headlines)
+
+
+def refresh_premarket():
+    from modules.premarket_scan import is_premarket, premarket_universe, get_premarket, default_source
+    if not is_premarket():
+        return 0
+    return len(get_premarket(premarket_universe(default_source()), max_age=0)[0])
+
+
+def _workers():
+    return int(os.getenv("PREFETCH_WORKERS", "8"))
+
+
+def _warn(message):
+    """Record a non-fatal problem in the running job's status["warnings"]."""
+    warnings = _warnings.get()
+    if warnings is not None:
+        warnings.append(str(message))
+
+
+def _quietly(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        return None
+
+
+JOBS = {
+    "movers": refresh_movers,
+    "bars": refresh_bars,
+    "metadata": refresh_metadata,
+    "news": refresh_news,
+    "premarket": refresh_premarket,
+}
+
+
+class PrefetchScheduler:
+    def __init__(self, jobs=JOBS, tick=5):
+        self.jobs = jobs
+        self.tick = tick
+        self.status = {name: {"last_run": None, "duration": None, "result": None, "error": None,
+                              "warnings": []}
+                       for name in jobs}
+        self._next_due = {name: 0.0 for name in jobs}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_job(self, name):
+        started = time.time()
+        status = self.status[name]
+        warnings = []
+        token = _warnings.set(warnings)
+        try:
+            status["result"] = self.jobs[name]()
+            status["error"] = None
+        except Exception as e:
+            status["error"] = str(e)
+        finally:
+            _warnings.reset(token)
+        status["warnings"] = warnings
+        status["last_run"] = started
+        status["duration"] = time.time() - started
+
+    def _loop(self):
+        # Jobs run one at a time in list order, so movers refresh before bars/metadata
+        while not self._stop.is_set():
+            session = market_session()
+            if session != "closed":
+                for name in self.jobs:
+                    if time.time() >= self._next_due[name]:
+                        self.run_job(name)
+                        market, extended = job_intervals(name)
+                        self._next_due[name] = time.time() + (market if session == "market" else extended)
+            self._stop.wait(self.tick)
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def start_prefetch():
+    """Start the process-wide scheduler once; returns it, or None when disabled."""
+    global _scheduler
+    if os.getenv("PREFETCH_ENABLED", "false").lower() != "true":
+        return None
+    with _lock:
+        if _scheduler is None:
+            _scheduler = PrefetchScheduler()
+        _scheduler.start()
+    return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
@@ -0,0 +1,169 @@
+# utils/upstream_guard.py
+#
+# Adaptive concurrency limit (AIMD) plus circuit breaker for an upstream API.
+#
+# Each success under the latency target grows the limit by ~1 per window
+# (+increase / limit per call); rate limits, network errors and slow responses
+# shrink it multiplicatively. `trip_after` consecutive rate limits open the
+# breaker: calls fail fast with CircuitOpenError until the cooldown passes,
+# then a single probe call decides whether to close it again.
+
+import os
+import threading
+import time
+import requests
+from utils.perf import count
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_rate_limit(error):
+    text = f"{type(error).__name__} {error}".lower()
+    return "429" in text or "too many requests" in text or "ratelimit" in text or "rate limit" in text
+
+
+def is_overload(error):
+    if is_rate_limit(error):
+        return True
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and getattr(response, "status_code", 0) >= 500
+
+
+class UpstreamGuard:
+    def __init__(self, name, initial=8, min_limit=2, max_limit=32, increase=1.0, decrease=0.5,
+                 latency_target=3.0, trip_after=5, cooldown=30.0, max_cooldown=300.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.trip_after = trip_after
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.state = "closed"
+        self.in_flight = 0
+        self.counts = {"ok": 0, "errors": 0, "rate_limited": 0, "rejected": 0, "trips": 0}
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._consecutive_limited = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def call(self, fn, *args, **kwargs):
+        self._acquire()
+        start = time.perf_counter()
+        error = None
+        interrupted = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            interrupted = True  # Streamlit rerun/stop, KeyboardInterrupt: says nothing about upstream
+            raise
+        finally:
+            if interrupted:
+                self._abandon()
+            else:
+                self._release(time.perf_counter() - start, error)
+
+    def _abandon(self):
+        """Free the slot (and the half-open probe) of an interrupted call."""
+        with self._cond:
+            self.in_flight -= 1
+            if self.state == "half_open":
+                self._probe_in_flight = False
+            self._cond.notify_all()
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self.state == "open":
+                    if time.monotonic() < self._open_until:
+                        self.counts["rejected"] += 1
+                        count(f"{self.name}.rejected")
+                        raise CircuitOpenError(f"{self.name} circuit open after repeated rate limits")
+                    self.state = "half_open"
+                    self._probe_in_flight = False
+                if self.state == "half_open":
+                    if not self._probe_in_flight:
+                        self._probe_in_flight = True
+                        self.in_flight += 1
+                        return
+                elif self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(0.25)
+
+    def _release(self, latency, error):
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            probe = self.state == "half_open"
+            if error is None:
+                self.counts["ok"] += 1
+                self._consecutive_limited = 0
+                if probe:
+                    self.state = "closed"
+                    self._cooldown = self.base_cooldown
+                if latency > self.latency_target:
+                    self._shrink(now)
+                else:
+                    self.limit = min(self.max_limit, self.limit + self.increase / max(self.limit, 1.0))
+            else:
+                self.counts["errors"] += 1
+                if is_rate_limit(error):
+                    self.counts["rate_limited"] += 1
+                    count(f"{self.name}.rate_limited")
+                    self._consecutive_limited += 1
+                    if probe or self._consecutive_limited >= self.trip_after:
+                        self._trip(now, reopen=probe)
+                elif probe:
+                    self.state = "closed"  # upstream answered; the error is about the request itself
+                if is_overload(error):
+                    self._shrink(now)
+            if probe:
+                self._probe_in_flight = False
+            self._cond.notify_all()
+
+    def _shrink(self, now):
+        # At most one decrease per second so a burst of in-flight failures counts once
+        if now - self._last_decrease >= 1.0:
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self._last_decrease = now
+
+    def _trip(self, now, reopen=False):
+        if reopen:
+            self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+        self.state = "open"
+        self._open_until = now + self._cooldown
+        self._consecutive_limited = 0
+        self.counts["trips"] += 1
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "retry_in": max(0.0, self._open_until - time.monotonic()) if self.state == "open" else 0.0,
+                **self.counts,
+            }
+
+
+# Process-wide guard for Yahoo Finance (yfinance calls and Yahoo page scrapes)
+yahoo_guard = UpstreamGuard(
+    "yahoo",
+    initial=int(os.getenv("YAHOO_INITIAL_CONCURRENCY", "8")),
+    max_limit=int(os.getenv("YAHOO_MAX_CONCURRENCY", "32")),
+)